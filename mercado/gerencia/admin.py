@@ -1,3 +1,21 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Produto, Pedido, ItemPedido
+
+
+@admin.register(Produto)
+class ProdutoAdmin(admin.ModelAdmin):
+    list_display = ("codigo", "nome", "preco", "estoque")
+    search_fields = ("nome",)
+
+
+class ItemPedidoInline(admin.TabularInline):
+    model = ItemPedido
+    raw_id_fields = ("produto",)
+    extra = 0
+
+
+@admin.register(Pedido)
+class PedidoAdmin(admin.ModelAdmin):
+    list_display = ("id", "cliente", "criado_em", "total")
+    inlines = [ItemPedidoInline]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GerenciaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gerencia'
+
+    def ready(self):
+        from . import catalogo  # conecta os sinais que invalidam o cache do catálogo
@@ -0,0 +1,60 @@
+# Versão do catálogo e cache das páginas da API.
+#
+# As páginas ficam no cache com a versão na chave. Quando um produto muda,
+# a versão é incrementada: as páginas antigas deixam de ser usadas (e
+# expiram sozinhas) e as novas são montadas na próxima requisição.
+#
+# A própria versão também fica no cache, por CATALOGO_VERSAO_TIMEOUT
+# segundos, para não custar uma consulta por requisição. Alterações feitas
+# neste processo apagam essa entrada na hora; as feitas por outro processo
+# (o comando de importação, outro worker) aparecem depois desse prazo.
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Produto, VersaoCatalogo
+
+CHAVE_VERSAO = "catalogo:versao"
+
+
+def versao_catalogo():
+    """Retorna (versao, modificado_em)."""
+    atual = cache.get(CHAVE_VERSAO)
+    if atual is not None:
+        return atual
+    atual = VersaoCatalogo.objects.filter(pk=1).values_list("versao", "modificado_em").first()
+    if atual is None:
+        objeto, _ = VersaoCatalogo.objects.get_or_create(pk=1, defaults={"modificado_em": timezone.now()})
+        atual = objeto.versao, objeto.modificado_em
+    cache.set(CHAVE_VERSAO, atual, settings.CATALOGO_VERSAO_TIMEOUT)
+    return atual
+
+
+async def aversao_catalogo():
+    """Como `versao_catalogo`, para views assíncronas."""
+    atual = await cache.aget(CHAVE_VERSAO)
+    if atual is not None:
+        return atual
+    atual = await VersaoCatalogo.objects.filter(pk=1).values_list("versao", "modificado_em").afirst()
+    if atual is None:
+        objeto, _ = await VersaoCatalogo.objects.aget_or_create(pk=1, defaults={"modificado_em": timezone.now()})
+        atual = objeto.versao, objeto.modificado_em
+    await cache.aset(CHAVE_VERSAO, atual, settings.CATALOGO_VERSAO_TIMEOUT)
+    return atual
+
+def invalidar_catalogo():
+    """Incrementa a versão. Deve ser chamada após bulk_create/bulk_update, que não disparam sinais."""
+    alterados = VersaoCatalogo.objects.filter(pk=1).update(versao=F("versao") + 1, modificado_em=timezone.now())
+    if not alterados:
+        VersaoCatalogo.objects.get_or_create(pk=1, defaults={"versao": 1, "modificado_em": timezone.now()})
+    cache.delete(CHAVE_VERSAO)
+
+
+@receiver(post_save, sender=Produto)
+@receiver(post_delete, sender=Produto)
+def _produto_alterado(sender, **kwargs):
+    invalidar_catalogo()
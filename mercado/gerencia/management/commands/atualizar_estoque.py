@@ -0,0 +1,139 @@
+# Aplica o arquivo noturno dos fornecedores: variações de estoque e preços
+# novos, em CSV (colunas codigo,estoque,preco) ou JSONL. `estoque` é uma
+# variação (+50, -3) e `preco` o novo preço; qualquer um pode ficar vazio.
+#
+# O arquivo é lido linha a linha e as linhas do mesmo código são somadas
+# (estoque) ou sobrepostas (vale o último preço) dentro de um lote de até
+# --lote códigos distintos. Cada lote é uma transação: lê os produtos com
+# select_for_update, confere que o estoque não fica negativo e grava tudo
+# num INSERT ... ON CONFLICT DO UPDATE (ou bulk_update, nos bancos sem
+# suporte). A memória depende do tamanho do lote, não do arquivo.
+#
+# A leitura e a validação das linhas são as do carga_fornecedor.py do
+# mercado_projeto, para os dois aceitarem e rejeitarem as mesmas linhas.
+#
+# Uso: python manage.py atualizar_estoque feed.csv [--lote 5000] [--rejeitadas rejeitadas.csv]
+
+import csv
+import time
+from collections import Counter
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from gerencia import projeto
+from gerencia.catalogo import invalidar_catalogo
+from gerencia.models import Produto
+
+projeto.habilitar()
+import carga_fornecedor  # noqa: E402  (o mesmo leitor do feed do programa de terminal)
+from carga_fornecedor import ler_feed  # noqa: E402
+
+PRECO_MAXIMO = Decimal(10) ** 10  # Produto.preco: 12 dígitos, 2 decimais
+CAMPOS_ATUALIZADOS = ["preco", "estoque"]
+
+
+def interpretar(dados):
+    """Como carga_fornecedor.interpretar, com o preço em Decimal (reais) e no limite do campo."""
+    codigo, variacao, preco = carga_fornecedor.interpretar(dados)
+    if preco is None:
+        return codigo, variacao, None
+    preco = Decimal(preco).scaleb(-2)
+    if preco >= PRECO_MAXIMO:
+        raise ValueError(f"preço inválido: {preco}")
+    return codigo, variacao, preco
+
+
+class Command(BaseCommand):
+    help = "Aplica variações de estoque e preços do arquivo dos fornecedores, em lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("caminho", help="feed em CSV (codigo,estoque,preco) ou JSONL")
+        parser.add_argument("--lote", type=int, default=5000, help="códigos distintos por transação")
+        parser.add_argument("--rejeitadas", help="grava as linhas rejeitadas neste arquivo CSV")
+
+    def handle(self, *args, **options):
+        self.resumo = Counter()
+        saida = open(options["rejeitadas"], "w", encoding="utf-8", newline="") if options["rejeitadas"] else None
+        self.rejeitadas = csv.writer(saida) if saida else None
+        if self.rejeitadas:
+            self.rejeitadas.writerow(("linha", "codigo", "motivo"))
+
+        inicio = time.perf_counter()
+        try:
+            pendentes = {}  # codigo -> [variacao, preco, linhas]
+            for numero, dados in ler_feed(options["caminho"]):
+                self.resumo["lidas"] += 1
+                try:
+                    codigo, variacao, preco = interpretar(dados)
+                except ValueError as erro:
+                    self.rejeitar(numero, dados.get("codigo") if isinstance(dados, dict) else None, erro, 1)
+                    continue
+                if variacao == 0 and preco is None:
+                    self.resumo["ignoradas"] += 1
+                    continue
+                grupo = pendentes.get(codigo)
+                if grupo is None:
+                    pendentes[codigo] = [variacao, preco, 1]
+                else:
+                    grupo[0] += variacao
+                    grupo[1] = preco if preco is not None else grupo[1]
+                    grupo[2] += 1
+                if len(pendentes) >= options["lote"]:
+                    self.aplicar_lote(pendentes)
+                    pendentes = {}
+            if pendentes:
+                self.aplicar_lote(pendentes)
+        except OSError as erro:
+            raise CommandError(f"Não foi possível ler {options['caminho']}: {erro}")
+        finally:
+            if saida:
+                saida.close()
+
+        decorrido = time.perf_counter() - inicio
+        r = self.resumo
+        self.stdout.write(self.style.SUCCESS(
+            f"{r['lidas']} linhas: {r['aplicadas']} aplicadas, {r['ignoradas']} ignoradas, "
+            f"{r['rejeitadas']} rejeitadas; {r['produtos']} produtos alterados em {decorrido:.1f} s"
+        ))
+
+    def rejeitar(self, numero, codigo, motivo, linhas):
+        self.resumo["rejeitadas"] += linhas
+        if self.rejeitadas:
+            self.rejeitadas.writerow((numero or "", codigo, motivo))
+
+    @transaction.atomic
+    def aplicar_lote(self, pendentes):
+        existentes = {
+            p.codigo: p for p in
+            Produto.objects.select_for_update().filter(codigo__in=pendentes)
+        }
+        alterados = []
+        for codigo, (variacao, preco, linhas) in pendentes.items():
+            produto = existentes.get(codigo)
+            if produto is None:
+                self.rejeitar(None, codigo, "produto inexistente", linhas)
+            elif produto.estoque + variacao < 0:
+                self.rejeitar(None, codigo, f"estoque ficaria negativo ({produto.estoque} {variacao:+d})", linhas)
+            elif variacao == 0 and (preco is None or preco == produto.preco):
+                self.resumo["ignoradas"] += linhas
+            else:
+                produto.estoque += variacao
+                if preco is not None:
+                    produto.preco = preco
+                alterados.append(produto)
+                self.resumo["aplicadas"] += linhas
+        if not alterados:
+            return
+        if connection.features.supports_update_conflicts_with_target:
+            # Todos os códigos já existem: o INSERT só serve para cair no UPDATE.
+            Produto.objects.bulk_create(
+                alterados, update_conflicts=True, unique_fields=["codigo"],
+                update_fields=CAMPOS_ATUALIZADOS,
+            )
+        else:
+            Produto.objects.bulk_update(alterados, CAMPOS_ATUALIZADOS, batch_size=500)
+        self.resumo["produtos"] += len(alterados)
+        # bulk_create/bulk_update não disparam sinais; a API vê cada lote assim que ele é gravado.
+        transaction.on_commit(invalidar_catalogo)
@@ -0,0 +1,59 @@
+# Teste de carga da API do catálogo (gerencia/api/produtos/).
+#
+# Faz o mesmo conjunto de requisições (páginas sorteadas com semente fixa)
+# em três situações e mostra requisições por segundo:
+#   sem cache    - cache trocado por DummyCache: toda página vai ao banco
+#   com cache    - LocMemCache aquecido
+#   condicional  - o cliente manda If-None-Match e recebe 304
+# As requisições passam por todo o Django (middlewares, URLs, view) via
+# django.test.Client, sem servidor HTTP no meio.
+#
+# Uso: python manage.py carga_catalogo [--requisicoes 2000] [--paginas 100]
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+SEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+class Command(BaseCommand):
+    help = "Mede requisições/s da API do catálogo com e sem cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requisicoes", type=int, default=2000)
+        parser.add_argument("--paginas", type=int, default=100, help="páginas distintas sorteadas")
+        parser.add_argument("--semente", type=int, default=42)
+
+    def handle(self, *args, **options):
+        aleatorio = random.Random(options["semente"])
+        paginas = [aleatorio.randint(1, options["paginas"]) for _ in range(options["requisicoes"])]
+        url = reverse("catalogo")
+        cliente = Client(SERVER_NAME="localhost")
+
+        with override_settings(CACHES=SEM_CACHE):
+            sem_cache = self.medir(cliente, url, paginas)
+        for pagina in set(paginas):  # aquece o cache
+            cliente.get(url, {"pagina": pagina})
+        com_cache = self.medir(cliente, url, paginas)
+        etags = {pagina: cliente.get(url, {"pagina": pagina})["ETag"] for pagina in set(paginas)}
+        condicional = self.medir(cliente, url, paginas, etags)
+
+        self.stdout.write(f"{'situação':<12} {'req/s':>10}")
+        for nome, valor in (("sem cache", sem_cache), ("com cache", com_cache), ("condicional", condicional)):
+            self.stdout.write(f"{nome:<12} {valor:>10,.0f}")
+        self.stdout.write(self.style.SUCCESS(f"cache: {com_cache / sem_cache:.1f}x mais rápido"))
+
+    def medir(self, cliente, url, paginas, etags=None):
+        esperado = 304 if etags else 200
+        inicio = time.perf_counter()
+        for pagina in paginas:
+            cabecalhos = {"HTTP_IF_NONE_MATCH": etags[pagina]} if etags else {}
+            resposta = cliente.get(url, {"pagina": pagina}, **cabecalhos)
+            if resposta.status_code != esperado:
+                raise RuntimeError(f"página {pagina}: status {resposta.status_code}, esperado {esperado}")
+        return len(paginas) / (time.perf_counter() - inicio)
@@ -0,0 +1,90 @@
+# Compara a vazão da API do catálogo servida por WSGI e por ASGI.
+#
+# WSGI: django.test.Client (handler WSGI) em um pool de --threads threads,
+#       como um servidor WSGI com esse número de workers.
+# ASGI: django.test.AsyncClient (handler ASGI) com --concorrencia
+#       requisições ao mesmo tempo num único event loop.
+#
+# Cada cenário roda duas vezes: com clientes rápidos e com clientes lentos,
+# que levam --leitura segundos para consumir cada resposta. Com clientes
+# lentos, cada thread WSGI fica presa esperando o cliente; o ASGI só
+# suspende a corrotina e segue atendendo os outros.
+#
+# Uso: python manage.py comparar_wsgi_asgi [--requisicoes 1000] [--threads 16]
+#                                         [--concorrencia 1000] [--leitura 0.5]
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    help = "Compara requisições/s da API do catálogo via WSGI e via ASGI."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requisicoes", type=int, default=1000)
+        parser.add_argument("--threads", type=int, default=16, help="threads do 'servidor' WSGI")
+        parser.add_argument("--concorrencia", type=int, default=1000, help="clientes simultâneos no ASGI")
+        parser.add_argument("--leitura", type=float, default=0.5,
+                            help="segundos que um cliente lento leva para ler a resposta")
+        parser.add_argument("--paginas", type=int, default=50)
+        parser.add_argument("--semente", type=int, default=42)
+
+    def handle(self, *args, **options):
+        setup_test_environment()  # libera o host "testserver" dos clientes de teste
+        try:
+            aleatorio = random.Random(options["semente"])
+            paginas = [aleatorio.randint(1, options["paginas"]) for _ in range(options["requisicoes"])]
+            self.stdout.write(f"{'cenário':<20} {'WSGI req/s':>12} {'ASGI req/s':>12}")
+            for nome, leitura in (("clientes rápidos", 0.0), ("clientes lentos", options["leitura"])):
+                wsgi = self.medir_wsgi(paginas, options["threads"], leitura)
+                asgi = asyncio.run(self.medir_asgi(paginas, options["concorrencia"], leitura))
+                self.stdout.write(f"{nome:<20} {wsgi:>12,.0f} {asgi:>12,.0f}")
+        finally:
+            teardown_test_environment()
+
+    def medir_wsgi(self, paginas, threads, leitura):
+        url = reverse("catalogo")
+        locais = threading.local()
+
+        def requisitar(pagina):
+            if not hasattr(locais, "cliente"):
+                locais.cliente = Client()
+            resposta = locais.cliente.get(url, {"pagina": pagina})
+            assert resposta.status_code == 200, resposta.status_code
+            if leitura:
+                time.sleep(leitura)
+
+        def fechar_conexao(_):
+            connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            inicio = time.perf_counter()
+            list(executor.map(requisitar, paginas))
+            decorrido = time.perf_counter() - inicio
+            list(executor.map(fechar_conexao, range(threads)))
+        return len(paginas) / decorrido
+
+    async def medir_asgi(self, paginas, concorrencia, leitura):
+        url = reverse("catalogo_async")
+        cliente = AsyncClient()
+        vagas = asyncio.Semaphore(concorrencia)
+
+        async def requisitar(pagina):
+            async with vagas:
+                resposta = await cliente.get(url, {"pagina": pagina})
+                assert resposta.status_code == 200, resposta.status_code
+                if leitura:
+                    await asyncio.sleep(leitura)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(requisitar(p) for p in paginas))
+        return len(paginas) / (time.perf_counter() - inicio)
@@ -0,0 +1,90 @@
+# Importa os produtos do mercado_projeto para o banco.
+#
+# O estado é lido por `persistencia.ler_dados()`, o mesmo caminho das
+# consultas do programa: o snapshot (mercado.json, mercado.bin ou
+# mercado.db, conforme persistencia.FORMATO_DADOS) com o diário aplicado
+# por cima. Ler só o mercado.json deixaria de fora tudo o que ainda não foi
+# compactado.
+#
+# Os produtos são gravados em lotes, cada lote numa transação. Nos bancos
+# com INSERT ... ON CONFLICT (SQLite, PostgreSQL) o lote é um bulk_create
+# com update_conflicts; nos outros, um bulk_create para os códigos novos e
+# um bulk_update para os existentes (bem mais lento: o bulk_update monta um
+# CASE por linha). Rodar de novo com os dados atualizados só atualiza
+# nome, preço e estoque.
+#
+# Uso: python manage.py importar_mercado [pasta do mercado_projeto] [--formato json|binario|sqlite] [--lote 5000]
+
+import time
+from decimal import Decimal
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from gerencia import projeto
+from gerencia.catalogo import invalidar_catalogo
+from gerencia.models import Produto
+
+CAMPOS_ATUALIZADOS = ["nome", "preco", "estoque"]
+
+
+class Command(BaseCommand):
+    help = "Importa (ou atualiza) os produtos do mercado_projeto em lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("pasta", nargs="?", default=str(projeto.PASTA_PROJETO),
+                            help="pasta com os arquivos de dados do mercado_projeto")
+        parser.add_argument("--formato", choices=("json", "binario", "sqlite"),
+                            help="formato dos dados (padrão: persistencia.FORMATO_DADOS)")
+        parser.add_argument("--lote", type=int, default=5000, help="produtos por transação")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        criados = atualizados = 0
+        with projeto.na_pasta(options["pasta"]):
+            import persistencia
+            if options["formato"]:
+                persistencia.FORMATO_DADOS = options["formato"]
+            try:
+                produtos = persistencia.ler_dados()[0]
+                linhas = ((p.codigo, p.nome, p.preco, p.estoque) for p in produtos.values())
+                while lote := list(islice(linhas, options["lote"])):
+                    c, a = self.importar_lote(lote)
+                    criados += c
+                    atualizados += a
+            except (OSError, ValueError) as erro:
+                raise CommandError(f"Não foi possível ler os dados em {options['pasta']}: {erro}")
+            finally:
+                persistencia.fechar_dados()
+        # bulk_create/bulk_update não disparam sinais: invalida o cache da API aqui.
+        invalidar_catalogo()
+        decorrido = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{criados} produtos criados, {atualizados} atualizados em {decorrido:.1f} s"
+        ))
+
+    @transaction.atomic
+    def importar_lote(self, lote):
+        # Linhas (codigo, nome, preco em centavos, estoque).
+        codigos = [codigo for codigo, _, _, _ in lote]
+        produtos = [
+            Produto(codigo=codigo, nome=nome, estoque=estoque, preco=Decimal(preco).scaleb(-2))
+            for codigo, nome, preco, estoque in lote
+        ]
+        if connection.features.supports_update_conflicts_with_target:
+            # Um INSERT ... ON CONFLICT (codigo) DO UPDATE por lote.
+            atualizados = Produto.objects.filter(codigo__in=codigos).count()
+            Produto.objects.bulk_create(
+                produtos, update_conflicts=True, unique_fields=["codigo"],
+                update_fields=CAMPOS_ATUALIZADOS,
+            )
+            return len(produtos) - atualizados, atualizados
+        existentes = dict(Produto.objects.filter(codigo__in=codigos).values_list("codigo", "id"))
+        novos, alterados = [], []
+        for produto in produtos:
+            produto.id = existentes.get(produto.codigo)
+            (novos if produto.id is None else alterados).append(produto)
+        Produto.objects.bulk_create(novos)
+        Produto.objects.bulk_update(alterados, CAMPOS_ATUALIZADOS, batch_size=500)
+        return len(novos), len(alterados)
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cliente', models.CharField(db_index=True, max_length=100)),
+                ('criado_em', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['-criado_em'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Produto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.PositiveIntegerField(unique=True)),
+                ('nome', models.CharField(db_index=True, max_length=200)),
+                ('preco', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('estoque', models.PositiveIntegerField(db_index=True)),
+            ],
+            options={
+                'ordering': ['codigo'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemPedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantidade', models.PositiveIntegerField()),
+                ('preco_unitario', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='gerencia.pedido')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='itens_pedido', to='gerencia.produto')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('pedido', 'produto'), name='item_pedido_unico')],
+            },
+        ),
+    ]
@@ -1,3 +1,52 @@
 from django.db import models
 
-# Create your models here.
\ No newline at end of file
+
+class Produto(models.Model):
+    codigo = models.PositiveIntegerField(unique=True)
+    nome = models.CharField(max_length=200, db_index=True)
+    preco = models.DecimalField(max_digits=12, decimal_places=2)
+    estoque = models.PositiveIntegerField(db_index=True)
+
+    class Meta:
+        ordering = ["codigo"]
+
+    def __str__(self):
+        return f"{self.codigo} - {self.nome}"
+
+
+class Pedido(models.Model):
+    cliente = models.CharField(max_length=100, db_index=True)
+    criado_em = models.DateTimeField(auto_now_add=True, db_index=True)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["-criado_em"]
+
+    def __str__(self):
+        return f"Pedido {self.pk} ({self.cliente})"
+
+
+class ItemPedido(models.Model):
+    pedido = models.ForeignKey(Pedido, on_delete=models.CASCADE, related_name="itens")
+    produto = models.ForeignKey(Produto, on_delete=models.PROTECT, related_name="itens_pedido")
+    quantidade = models.PositiveIntegerField()
+    preco_unitario = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["pedido", "produto"], name="item_pedido_unico"),
+        ]
+
+    def __str__(self):
+        return f"{self.quantidade}x {self.produto.nome}"
+
+
+class VersaoCatalogo(models.Model):
+    """Linha única com a versão do catálogo; muda a cada alteração de produto.
+
+    Fica no banco (e não no cache) para que todos os processos, inclusive
+    o comando de importação, enxerguem a mesma versão.
+    """
+
+    versao = models.PositiveBigIntegerField(default=0)
+    modificado_em = models.DateTimeField()
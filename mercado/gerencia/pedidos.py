@@ -0,0 +1,51 @@
+# Fechamento de pedidos a partir do carrinho (guardado na sessão).
+#
+# A baixa de estoque é um UPDATE condicional (estoque >= quantidade) por
+# produto, dentro de uma transação: se algum item não tiver estoque,
+# nada é gravado. O ORM assíncrono não tem transações, então as views
+# assíncronas chamam `finalizar_pedido` via sync_to_async.
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from .catalogo import invalidar_catalogo
+from .models import ItemPedido, Pedido, Produto
+
+
+class PedidoInvalido(Exception):
+    pass
+
+
+class EstoqueInsuficiente(PedidoInvalido):
+    def __init__(self, codigo):
+        super().__init__(f"Estoque insuficiente para o produto {codigo}")
+        self.codigo = codigo
+
+
+def finalizar_pedido(cliente: str, itens: dict) -> Pedido:
+    """`itens` é {codigo: quantidade}. Retorna o Pedido criado."""
+    if not itens:
+        raise PedidoInvalido("Carrinho vazio")
+    with transaction.atomic():
+        produtos = {p.codigo: p for p in Produto.objects.select_for_update().filter(codigo__in=itens)}
+        for codigo, quantidade in itens.items():
+            if codigo not in produtos:
+                raise PedidoInvalido(f"Produto {codigo} não existe mais")
+            baixados = Produto.objects.filter(pk=produtos[codigo].pk, estoque__gte=quantidade).update(
+                estoque=F("estoque") - quantidade
+            )
+            if not baixados:
+                raise EstoqueInsuficiente(codigo)
+        pedido = Pedido.objects.create(
+            cliente=cliente,
+            total=sum((produtos[c].preco * q for c, q in itens.items()), Decimal(0)),
+        )
+        ItemPedido.objects.bulk_create(
+            ItemPedido(pedido=pedido, produto=produtos[c], quantidade=q, preco_unitario=produtos[c].preco)
+            for c, q in itens.items()
+        )
+        # update() não dispara post_save: o estoque mudou, então o catálogo também.
+        transaction.on_commit(invalidar_catalogo)
+    return pedido
@@ -0,0 +1,33 @@
+# Acesso ao mercado_projeto (o programa de terminal) a partir do Django.
+#
+# Os módulos de lá se importam pelo nome (`import persistencia`), como
+# quando rodam de dentro da própria pasta, e leem os arquivos de dados
+# (mercado.json, o diário, mercado.db) da pasta atual. `na_pasta` coloca a
+# pasta no caminho de importação e torna-a a pasta atual enquanto durar o
+# bloco `with`.
+
+import contextlib
+import os
+import sys
+
+from django.conf import settings
+
+PASTA_PROJETO = settings.BASE_DIR.parent / "mercado_projeto"
+
+
+def habilitar(pasta=PASTA_PROJETO):
+    """Deixa os módulos do mercado_projeto importáveis pelo nome."""
+    pasta = str(pasta)
+    if pasta not in sys.path:
+        sys.path.insert(0, pasta)
+
+
+@contextlib.contextmanager
+def na_pasta(pasta=PASTA_PROJETO):
+    habilitar()
+    anterior = os.getcwd()
+    os.chdir(pasta)
+    try:
+        yield
+    finally:
+        os.chdir(anterior)
@@ -1,3 +1,89 @@
+import json
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import Pedido, Produto
+from .pedidos import EstoqueInsuficiente, finalizar_pedido
+
+
+class PedidoTests(TestCase):
+    def setUp(self):
+        Produto.objects.create(codigo=1, nome="arroz", preco=Decimal("18.00"), estoque=5)
+        Produto.objects.create(codigo=2, nome="feijão", preco=Decimal("7.50"), estoque=1)
+
+    def test_finalizar_baixa_o_estoque_e_grava_o_pedido(self):
+        pedido = finalizar_pedido("ana", {1: 2, 2: 1})
+        self.assertEqual(pedido.total, Decimal("43.50"))
+        self.assertEqual(pedido.itens.count(), 2)
+        self.assertEqual(Produto.objects.get(codigo=1).estoque, 3)
+        self.assertEqual(Produto.objects.get(codigo=2).estoque, 0)
+
+    def test_item_sem_estoque_nao_grava_nada(self):
+        with self.assertRaises(EstoqueInsuficiente):
+            finalizar_pedido("ana", {1: 2, 2: 5})
+        self.assertEqual(Produto.objects.get(codigo=1).estoque, 5)
+        self.assertFalse(Pedido.objects.exists())
+
+
+class CatalogoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Produto.objects.create(codigo=1, nome="arroz", preco=Decimal("18.00"), estoque=5)
+
+    def test_pagina_responde_304_ate_o_catalogo_mudar(self):
+        url = reverse("catalogo")
+        resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(json.loads(resposta.content)["produtos"][0]["nome"], "arroz")
+
+        etag = resposta["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        produto = Produto.objects.get(codigo=1)
+        produto.estoque = 4
+        produto.save()  # o sinal post_save incrementa a versão
+        resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(json.loads(resposta.content)["produtos"][0]["estoque"], 4)
+
+
+class ComandosTests(TestCase):
+    def setUp(self):
+        self.pasta = Path(self.enterContext(tempfile.TemporaryDirectory()))
+
+    def test_atualizar_estoque_rejeita_linha_sem_derrubar_o_feed(self):
+        Produto.objects.create(codigo=1, nome="arroz", preco=Decimal("18.00"), estoque=5)
+        feed = self.pasta / "feed.jsonl"
+        feed.write_text('{"codigo": 1, "preco": Infinity}\n'
+                        '{"codigo": 1, "estoque": "+3", "preco": "19,90"}\n'
+                        '{"codigo": 9, "estoque": 1}\n', encoding="utf-8")
+        rejeitadas = self.pasta / "rejeitadas.csv"
+
+        call_command("atualizar_estoque", str(feed), rejeitadas=str(rejeitadas), stdout=StringIO())
+
+        produto = Produto.objects.get(codigo=1)
+        self.assertEqual((produto.estoque, produto.preco), (8, Decimal("19.90")))
+        linhas = rejeitadas.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(linhas), 3)  # cabeçalho, Infinity e o produto inexistente
+        self.assertIn("preço inválido", linhas[1])
+
+    def test_importar_mercado_inclui_o_diario(self):
+        (self.pasta / "mercado.json").write_text(json.dumps({
+            "seq": 1,
+            "produtos": [{"codigo": 1, "nome": "arroz", "preco": 18.0, "estoque": 10}],
+        }), encoding="utf-8")
+        (self.pasta / "mercado.diario.jsonl").write_text(
+            '{"seq": 2, "tipo": "produto_editado", "codigo": 1, "nome": "arroz", "preco": 17.5, "estoque": 7}\n',
+            encoding="utf-8")
+
+        call_command("importar_mercado", str(self.pasta), formato="json", stdout=StringIO())
 
-# Create your tests here.
+        produto = Produto.objects.get(codigo=1)
+        self.assertEqual((produto.preco, produto.estoque), (Decimal("17.50"), 7))
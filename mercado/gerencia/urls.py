@@ -3,5 +3,12 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    path("", views.gerencia, name="gerencia")
+    path("", views.gerencia, name="gerencia"),
+    path("api/produtos/", views.catalogo, name="catalogo"),
+    # Versões assíncronas (servidas por mercado/asgi.py)
+    path("api/async/produtos/", views.catalogo_async, name="catalogo_async"),
+    path("api/async/produtos/todos/", views.catalogo_completo, name="catalogo_completo"),
+    path("api/async/carrinho/", views.carrinho, name="carrinho"),
+    path("api/async/carrinho/<int:codigo>/", views.remover_do_carrinho, name="remover_do_carrinho"),
+    path("api/async/finalizar/", views.finalizar, name="finalizar"),
 ]
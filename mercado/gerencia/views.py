@@ -1,6 +1,209 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
-from django.http import HttpResponse
-# Create your views here.
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import condition, require_GET, require_http_methods, require_POST
+
+from .catalogo import aversao_catalogo, versao_catalogo
+from .models import Produto
+from .pedidos import EstoqueInsuficiente, PedidoInvalido, finalizar_pedido
+
+TAMANHO_PAGINA = 50
+TAMANHO_MAXIMO = 200
+CAMPOS_PRODUTO = ("codigo", "nome", "preco", "estoque")
+LOTE_STREAMING = 2000  # produtos lidos do banco por vez no catálogo completo
 
 def gerencia(request):
-    return render(request, "gerencia/gerencia.html")
\ No newline at end of file
+    return render(request, "gerencia/gerencia.html")
+
+# =========================
+# API do catálogo
+# =========================
+
+def _parametros(request):
+    try:
+        pagina = max(int(request.GET.get("pagina", 1)), 1)
+        tamanho = min(max(int(request.GET.get("tamanho", TAMANHO_PAGINA)), 1), TAMANHO_MAXIMO)
+    except ValueError:
+        pagina, tamanho = 1, TAMANHO_PAGINA
+    return pagina, tamanho
+
+def _versao(request):
+    # etag, last_modified e a view precisam da versão: uma consulta por requisição.
+    if not hasattr(request, "_versao_catalogo"):
+        request._versao_catalogo = versao_catalogo()
+    return request._versao_catalogo
+
+def _etag(request):
+    pagina, tamanho = _parametros(request)
+    return f'"{_versao(request)[0]}-{pagina}-{tamanho}"'
+
+def _modificado_em(request):
+    return _versao(request)[1]
+
+def _pagina_json(versao, pagina, tamanho, total, produtos):
+    return json.dumps({
+        "versao": versao,
+        "pagina": pagina,
+        "tamanho": tamanho,
+        "total": total,
+        "paginas": max(1, -(-total // tamanho)),
+        "produtos": produtos,
+    }, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+def _montar_pagina(versao, pagina, tamanho):
+    inicio = (pagina - 1) * tamanho
+    produtos = list(Produto.objects.order_by("codigo").values(*CAMPOS_PRODUTO)[inicio:inicio + tamanho])
+    return _pagina_json(versao, pagina, tamanho, Produto.objects.count(), produtos)
+
+def _resposta_catalogo(corpo):
+    response = HttpResponse(corpo, content_type="application/json")
+    response["Cache-Control"] = "no-cache"  # o cliente sempre revalida (e recebe 304 se nada mudou)
+    return response
+
+@require_GET
+@condition(etag_func=_etag, last_modified_func=_modificado_em)
+def catalogo(request):
+    """Página do catálogo em JSON. Requisições condicionais recebem 304."""
+    versao = _versao(request)[0]
+    pagina, tamanho = _parametros(request)
+    chave = f"catalogo:{versao}:{pagina}:{tamanho}"
+    corpo = cache.get(chave)
+    if corpo is None:
+        corpo = _montar_pagina(versao, pagina, tamanho)
+        cache.set(chave, corpo, settings.CATALOGO_CACHE_TIMEOUT)
+    return _resposta_catalogo(corpo)
+
+# =========================
+# Versões assíncronas (ASGI)
+# =========================
+# Sob um servidor ASGI estas views não prendem uma thread enquanto esperam
+# o banco, o cache ou um cliente lento lendo a resposta.
+
+async def _amontar_pagina(versao, pagina, tamanho):
+    inicio = (pagina - 1) * tamanho
+    consulta = Produto.objects.order_by("codigo").values(*CAMPOS_PRODUTO)[inicio:inicio + tamanho]
+    produtos = [p async for p in consulta]
+    return _pagina_json(versao, pagina, tamanho, await Produto.objects.acount(), produtos)
+
+@require_GET
+async def catalogo_async(request):
+    """Mesma resposta de `catalogo`, com ETag/Last-Modified e 304."""
+    versao, modificado_em = await aversao_catalogo()
+    pagina, tamanho = _parametros(request)
+    etag = f'"{versao}-{pagina}-{tamanho}"'
+    modificado_em = int(modificado_em.timestamp())
+    # O decorator `condition` chama etag_func de forma síncrona; aqui a
+    # versão vem do ORM assíncrono, então a checagem é feita à mão.
+    response = get_conditional_response(request, etag=etag, last_modified=modificado_em)
+    if response is None:
+        chave = f"catalogo:{versao}:{pagina}:{tamanho}"
+        corpo = await cache.aget(chave)
+        if corpo is None:
+            corpo = await _amontar_pagina(versao, pagina, tamanho)
+            await cache.aset(chave, corpo, settings.CATALOGO_CACHE_TIMEOUT)
+        response = _resposta_catalogo(corpo)
+    response.headers.setdefault("ETag", etag)
+    response.headers.setdefault("Last-Modified", http_date(modificado_em))
+    return response
+
+async def _catalogo_em_partes():
+    # Um pedaço da resposta por lote lido do banco, não um por produto.
+    yield '{"produtos": ['
+    separador = ""
+    lote = []
+    consulta = Produto.objects.order_by("codigo").values(*CAMPOS_PRODUTO)
+    async for produto in consulta.aiterator(chunk_size=LOTE_STREAMING):
+        lote.append(json.dumps(produto, cls=DjangoJSONEncoder, ensure_ascii=False))
+        if len(lote) == LOTE_STREAMING:
+            yield separador + ",".join(lote)
+            separador, lote = ",", []
+    if lote:
+        yield separador + ",".join(lote)
+    yield "]}"
+
+@require_GET
+async def catalogo_completo(request):
+    """Catálogo inteiro, enviado aos poucos: memória constante no servidor."""
+    return StreamingHttpResponse(_catalogo_em_partes(), content_type="application/json")
+
+# =========================
+# Carrinho e checkout (assíncronos)
+# =========================
+# O carrinho fica na sessão como {"codigo": quantidade}; o estoque só é
+# baixado no checkout.
+
+async def _ler_carrinho(request):
+    return {int(c): q for c, q in (await request.session.aget("carrinho", {})).items()}
+
+async def _gravar_carrinho(request, carrinho):
+    await request.session.aset("carrinho", {str(c): q for c, q in carrinho.items()})
+
+def _dados_entrada(request):
+    if request.content_type == "application/json":
+        try:
+            dados = json.loads(request.body or b"{}")
+        except ValueError:
+            return {}
+        return dados if isinstance(dados, dict) else {}
+    return request.POST
+
+async def _resumo_carrinho(carrinho):
+    produtos = {p.codigo: p async for p in Produto.objects.filter(codigo__in=carrinho)}
+    itens = [
+        {"codigo": c, "nome": produtos[c].nome, "preco": produtos[c].preco, "quantidade": q,
+         "subtotal": produtos[c].preco * q}
+        for c, q in carrinho.items() if c in produtos
+    ]
+    return {"itens": itens, "total": sum(item["subtotal"] for item in itens)}
+
+@require_http_methods(["GET", "POST"])
+async def carrinho(request):
+    """GET mostra o carrinho; POST (codigo, quantidade) adiciona um item."""
+    itens = await _ler_carrinho(request)
+    if request.method == "POST":
+        dados = _dados_entrada(request)
+        try:
+            codigo, quantidade = int(dados.get("codigo")), int(dados.get("quantidade", 1))
+        except (TypeError, ValueError):
+            return JsonResponse({"erro": "Informe codigo e quantidade inteiros."}, status=400)
+        if quantidade <= 0:
+            return JsonResponse({"erro": "A quantidade deve ser maior que 0."}, status=400)
+        try:
+            produto = await Produto.objects.aget(codigo=codigo)
+        except Produto.DoesNotExist:
+            return JsonResponse({"erro": "Produto não encontrado."}, status=404)
+        if itens.get(codigo, 0) + quantidade > produto.estoque:
+            return JsonResponse({"erro": f"Estoque insuficiente! Disponível: {produto.estoque}"}, status=409)
+        itens[codigo] = itens.get(codigo, 0) + quantidade
+        await _gravar_carrinho(request, itens)
+    return JsonResponse(await _resumo_carrinho(itens))
+
+@require_http_methods(["DELETE", "POST"])
+async def remover_do_carrinho(request, codigo):
+    itens = await _ler_carrinho(request)
+    if itens.pop(codigo, None) is None:
+        return JsonResponse({"erro": "Produto não encontrado no carrinho."}, status=404)
+    await _gravar_carrinho(request, itens)
+    return JsonResponse(await _resumo_carrinho(itens))
+
+@require_POST
+async def finalizar(request):
+    itens = await _ler_carrinho(request)
+    if request.session.session_key is None:
+        await request.session.acreate()
+    cliente = request.session.session_key
+    try:
+        pedido = await sync_to_async(finalizar_pedido)(cliente, itens)
+    except EstoqueInsuficiente as erro:
+        return JsonResponse({"erro": str(erro), "codigo": erro.codigo}, status=409)
+    except PedidoInvalido as erro:
+        return JsonResponse({"erro": str(erro)}, status=400)
+    await request.session.apop("carrinho", None)
+    return JsonResponse({"pedido": pedido.pk, "total": pedido.total}, status=201)
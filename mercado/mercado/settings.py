@@ -81,6 +81,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Em memória, por processo. Com vários processos, troque por um cache
+# compartilhado (Redis/Memcached); a invalidação já usa a versão no banco.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mercado',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+CATALOGO_CACHE_TIMEOUT = 60 * 60  # segundos; a versão na chave cuida da invalidação
+CATALOGO_VERSAO_TIMEOUT = 1  # segundos que outro processo leva para ver uma alteração
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,357 @@
+# banco_sqlite.py
+#
+# Backend de armazenamento em SQLite. Os produtos ficam numa tabela
+# indexada e são lidos sob demanda por `ProdutosSQLite`, que se comporta
+# como o dicionário `produtos` usado pela interface. As alterações
+# chegam pelos eventos de `eventos.py` e são gravadas na hora.
+
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+from collections.abc import MutableMapping
+from models import Produto, CLIENTE_LOCAL
+from sessoes import GerenciadorCarrinhos
+from credenciais import RegistroAdmins
+from utils import para_centavos, para_reais
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS produtos (
+    codigo  INTEGER PRIMARY KEY,
+    nome    TEXT NOT NULL,
+    preco   REAL NOT NULL,
+    estoque INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_produtos_nome ON produtos (nome);
+CREATE TABLE IF NOT EXISTS carrinhos (
+    cliente       TEXT PRIMARY KEY,
+    ultimo_acesso REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS itens_carrinho (
+    cliente    TEXT NOT NULL,
+    codigo     INTEGER NOT NULL,
+    quantidade INTEGER NOT NULL,
+    PRIMARY KEY (cliente, codigo)
+);
+CREATE TABLE IF NOT EXISTS admins (
+    cpf        TEXT PRIMARY KEY,
+    senha_hash TEXT NOT NULL
+);
+"""
+
+def abrir(caminho: str) -> sqlite3.Connection:
+    # A thread de expiração de carrinhos também grava; BancoSQLite serializa.
+    conexao = sqlite3.connect(caminho, check_same_thread=False)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA synchronous=NORMAL")
+    conexao.executescript(ESQUEMA)
+    _migrar_carrinho_unico(conexao)
+    _migrar_senhas(conexao)
+    return conexao
+
+def abrir_leitura(caminho: str) -> sqlite3.Connection:
+    """Conexão só para consulta: não cria tabelas nem migra (o banco é de outra sessão)."""
+    uri = "file:" + urllib.request.pathname2url(os.path.abspath(caminho)) + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+def _colunas(conexao, tabela):
+    return [linha[1] for linha in conexao.execute(f"PRAGMA table_info({tabela})")]
+
+def _migrar_senhas(conexao):
+    # Bancos antigos guardavam a senha dos admins em texto puro.
+    if "senha" not in _colunas(conexao, "admins"):
+        return
+    antigos = conexao.execute("SELECT cpf, senha FROM admins").fetchall()
+    admins = RegistroAdmins.from_list({"cpf": cpf, "senha": senha} for cpf, senha in antigos)
+    # Tudo numa transação só: o sqlite3 não abre transação sozinho antes de
+    # CREATE/DROP, e um DROP já gravado sem os INSERTs deixaria o banco sem
+    # admins (e a carga cairia no admin padrão).
+    with conexao:
+        conexao.execute("BEGIN")
+        conexao.execute("CREATE TABLE admins_novo (cpf TEXT PRIMARY KEY, senha_hash TEXT NOT NULL)")
+        conexao.executemany("INSERT INTO admins_novo (cpf, senha_hash) VALUES (?, ?)",
+                            ((adm["cpf"], adm["senha_hash"]) for adm in admins.to_list()))
+        conexao.execute("DROP TABLE admins")
+        conexao.execute("ALTER TABLE admins_novo RENAME TO admins")
+
+def _migrar_carrinho_unico(conexao):
+    # Bancos antigos tinham uma tabela `carrinho` só com o carrinho local.
+    existe = conexao.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'carrinho'").fetchone()
+    if not existe:
+        return
+    with conexao:
+        conexao.execute("INSERT OR REPLACE INTO itens_carrinho (cliente, codigo, quantidade) "
+                        "SELECT ?, codigo, quantidade FROM carrinho", (CLIENTE_LOCAL,))
+        conexao.execute("INSERT OR REPLACE INTO carrinhos (cliente, ultimo_acesso) VALUES (?, ?)",
+                        (CLIENTE_LOCAL, time.time()))
+        conexao.execute("DROP TABLE carrinho")
+
+def _produto(linha):
+    # A coluna `preco` guarda reais, como o mercado.json.
+    codigo, nome, preco, estoque = linha
+    return Produto(codigo, nome, para_centavos(preco), estoque)
+
+
+class ProdutosSQLite(MutableMapping):
+    """Mapeamento codigo -> Produto que só carrega as linhas acessadas.
+
+    Produtos já entregues ficam em cache, para que o carrinho e a
+    interface continuem alterando sempre o mesmo objeto.
+    """
+
+    def __init__(self, conexao: sqlite3.Connection):
+        self._conexao = conexao
+        self._cache = {}
+
+    def _linha(self, codigo):
+        return self._conexao.execute(
+            "SELECT codigo, nome, preco, estoque FROM produtos WHERE codigo = ?", (codigo,)
+        ).fetchone()
+
+    def __getitem__(self, codigo):
+        produto = self._cache.get(codigo)
+        if produto is None:
+            linha = self._linha(codigo)
+            if linha is None:
+                raise KeyError(codigo)
+            produto = self._cache[codigo] = _produto(linha)
+        return produto
+
+    def consultar(self, codigo):
+        """Como `get`, sem guardar no cache um produto que ainda não estava lá."""
+        produto = self._cache.get(codigo)
+        if produto is None:
+            linha = self._linha(codigo)
+            produto = _produto(linha) if linha is not None else None
+        return produto
+
+    def __contains__(self, codigo):
+        return codigo in self._cache or self._linha(codigo) is not None
+
+    def __setitem__(self, codigo, produto):
+        self._cache[codigo] = produto
+        self.gravar(produto)
+
+    def __delitem__(self, codigo):
+        with self._conexao:
+            cursor = self._conexao.execute("DELETE FROM produtos WHERE codigo = ?", (codigo,))
+        self._cache.pop(codigo, None)
+        if cursor.rowcount == 0:
+            raise KeyError(codigo)
+
+    def __iter__(self):
+        for (codigo,) in self._conexao.execute("SELECT codigo FROM produtos ORDER BY codigo"):
+            yield codigo
+
+    def __len__(self):
+        return self._conexao.execute("SELECT COUNT(*) FROM produtos").fetchone()[0]
+
+    def __bool__(self):
+        return self._conexao.execute("SELECT 1 FROM produtos LIMIT 1").fetchone() is not None
+
+    def values(self):
+        consulta = "SELECT codigo, nome, preco, estoque FROM produtos ORDER BY codigo"
+        for linha in self._conexao.execute(consulta):
+            yield self._cache.get(linha[0]) or _produto(linha)
+
+    def items(self):
+        for produto in self.values():
+            yield produto.codigo, produto
+
+    def retrato(self):
+        """Os produtos como estão agora no banco (`RetratoSQLite`), sem passar pelo cache."""
+        caminho = self._conexao.execute("PRAGMA database_list").fetchone()[2]
+        return RetratoSQLite(caminho)
+
+    def gravar(self, produto: Produto):
+        with self._conexao:
+            self.escrever(produto)
+
+    def inserir_varios(self, produtos):
+        """Grava vários produtos novos numa transação só, sem guardá-los no cache."""
+        with self._conexao:
+            self._conexao.executemany(
+                "INSERT OR REPLACE INTO produtos (codigo, nome, preco, estoque) VALUES (?, ?, ?, ?)",
+                ((p.codigo, p.nome, para_reais(p.preco), p.estoque) for p in produtos),
+            )
+
+    def escrever(self, produto: Produto):
+        """Como `gravar`, mas sem commit (para uso dentro de uma transação)."""
+        self._conexao.execute(
+            "INSERT OR REPLACE INTO produtos (codigo, nome, preco, estoque) VALUES (?, ?, ?, ?)",
+            (produto.codigo, produto.nome, para_reais(produto.preco), produto.estoque),
+        )
+
+    def escrever_dados(self, dados: dict):
+        """Grava um produto no formato dos eventos: o objeto em cache, se houver, ou o próprio dict."""
+        produto = self._cache.get(dados["codigo"])
+        if produto is not None:
+            self.escrever(produto)
+            return
+        self._conexao.execute(
+            "INSERT OR REPLACE INTO produtos (codigo, nome, preco, estoque) VALUES (?, ?, ?, ?)",
+            (dados["codigo"], dados["nome"], dados["preco"], dados["estoque"]),
+        )
+
+
+class RetratoSQLite:
+    """Os produtos do banco num instante, lidos sob demanda (versoes.py).
+
+    Tem uma conexão própria, só de leitura, com uma transação aberta: no
+    modo WAL ela continua vendo o banco daquele instante enquanto a sessão
+    grava, e pode ser lida de outra thread sem dividir a conexão da sessão.
+    Enquanto a transação estiver aberta, o WAL não volta para o começo;
+    `renovar` dá um retrato novo, e este fecha quando ninguém mais o usa.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._conexao = abrir_leitura(caminho)
+        self._trava = threading.Lock()
+        self._conexao.execute("BEGIN")
+        # A primeira leitura fixa o instante da transação.
+        maior = self._conexao.execute("SELECT MAX(codigo) FROM produtos").fetchone()[0]
+        self.limite = (maior or 0) + 1  # nenhum código daqui para cima
+
+    def __len__(self):
+        with self._trava:
+            return self._conexao.execute("SELECT COUNT(*) FROM produtos").fetchone()[0]
+
+    def faixa(self, inicio: int, fim: int):
+        """Tuplas (codigo, nome, preco em centavos, estoque) dos códigos em [inicio, fim), em ordem."""
+        with self._trava:
+            linhas = self._conexao.execute(
+                "SELECT codigo, nome, preco, estoque FROM produtos WHERE codigo >= ? AND codigo < ? ORDER BY codigo",
+                (inicio, fim),
+            ).fetchall()
+        return [(codigo, nome, para_centavos(preco), estoque) for codigo, nome, preco, estoque in linhas]
+
+    def renovar(self):
+        return RetratoSQLite(self.caminho)
+
+
+class BancoSQLite:
+    def __init__(self, caminho: str, somente_leitura: bool = False):
+        self.conexao = abrir_leitura(caminho) if somente_leitura else abrir(caminho)
+        self.produtos = ProdutosSQLite(self.conexao)
+        self._trava = threading.RLock()
+
+    def carregar(self, admins_padrao):
+        """`admins_padrao` é chamado só se o banco ainda não tiver admins."""
+        sessoes = GerenciadorCarrinhos()
+        sessoes.from_dict(self._ler_carrinhos(), self.produtos)
+        if "senha" in _colunas(self.conexao, "admins"):
+            # Só acontece na leitura: abrir() já teria migrado as senhas.
+            linhas = self.conexao.execute("SELECT cpf, senha FROM admins").fetchall()
+            linhas = [{"cpf": cpf, "senha": senha} for cpf, senha in linhas]
+        else:
+            linhas = [{"cpf": cpf, "senha_hash": h}
+                      for cpf, h in self.conexao.execute("SELECT cpf, senha_hash FROM admins")]
+        if linhas:
+            admins = RegistroAdmins.from_list(linhas)
+        else:
+            admins = admins_padrao()
+        return self.produtos, sessoes, admins
+
+    def _ler_carrinhos(self):
+        conexao = self.conexao
+        if not _colunas(conexao, "carrinhos"):
+            # Banco antigo aberto só para leitura: um carrinho só, o local.
+            if not _colunas(conexao, "carrinho"):
+                return {}
+            itens = {codigo: {"quantidade": quantidade}
+                     for codigo, quantidade in conexao.execute("SELECT codigo, quantidade FROM carrinho")}
+            return {CLIENTE_LOCAL: {"ultimo_acesso": time.time(), "itens": itens}}
+        itens = {}
+        for cliente, codigo, quantidade in conexao.execute(
+                "SELECT cliente, codigo, quantidade FROM itens_carrinho"):
+            itens.setdefault(cliente, {})[codigo] = {"quantidade": quantidade}
+        return {cliente: {"ultimo_acesso": ultimo_acesso, "itens": itens.get(cliente, {})}
+                for cliente, ultimo_acesso in conexao.execute("SELECT cliente, ultimo_acesso FROM carrinhos")}
+
+    def importar(self, produtos, sessoes, admins):
+        """Carga inicial em uma única transação (migração do mercado.json)."""
+        carrinhos = sessoes.to_dict()
+        with self.conexao:
+            self.conexao.executemany(
+                "INSERT OR REPLACE INTO produtos (codigo, nome, preco, estoque) VALUES (?, ?, ?, ?)",
+                ((p.codigo, p.nome, para_reais(p.preco), p.estoque) for p in produtos.values()),
+            )
+            self.conexao.executemany(
+                "INSERT OR REPLACE INTO carrinhos (cliente, ultimo_acesso) VALUES (?, ?)",
+                ((cliente, info["ultimo_acesso"]) for cliente, info in carrinhos.items()),
+            )
+            self.conexao.executemany(
+                "INSERT OR REPLACE INTO itens_carrinho (cliente, codigo, quantidade) VALUES (?, ?, ?)",
+                ((cliente, codigo, item["quantidade"])
+                 for cliente, info in carrinhos.items() for codigo, item in info["itens"].items()),
+            )
+            self.conexao.executemany(
+                "INSERT OR REPLACE INTO admins (cpf, senha_hash) VALUES (?, ?)",
+                ((adm["cpf"], adm["senha_hash"]) for adm in admins.to_list()),
+            )
+
+    def _gravar_estoque(self, codigo):
+        produto = self.produtos._cache.get(codigo)
+        if produto is not None:
+            self.produtos.escrever(produto)
+
+    def _tocar_carrinho(self, dados):
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO carrinhos (cliente, ultimo_acesso) VALUES (?, ?)",
+            (dados["cliente"], dados["instante"]),
+        )
+
+    def _apagar_carrinho(self, cliente):
+        self.conexao.execute("DELETE FROM itens_carrinho WHERE cliente = ?", (cliente,))
+        self.conexao.execute("DELETE FROM carrinhos WHERE cliente = ?", (cliente,))
+
+    def registrar(self, tipo: str, dados: dict):
+        with self._trava:
+            self._registrar(tipo, dados)
+
+    def _registrar(self, tipo: str, dados: dict):
+        conexao = self.conexao
+        if tipo in ("produto_cadastrado", "produto_editado"):
+            self.produtos.gravar(self.produtos[dados["codigo"]])
+        elif tipo == "produtos_cadastrados":
+            pass  # o Cadastro já gravou o lote (ProdutosSQLite.inserir_varios)
+        elif tipo == "produtos_atualizados":
+            with conexao:
+                for produto in dados["produtos"]:
+                    self.produtos.escrever_dados(produto)
+        elif tipo == "carrinho_adicionado":
+            with conexao:
+                conexao.execute(
+                    "INSERT INTO itens_carrinho (cliente, codigo, quantidade) VALUES (?, ?, ?) "
+                    "ON CONFLICT (cliente, codigo) DO UPDATE SET quantidade = quantidade + excluded.quantidade",
+                    (dados["cliente"], dados["codigo"], dados["quantidade"]),
+                )
+                self._tocar_carrinho(dados)
+                self._gravar_estoque(dados["codigo"])
+        elif tipo == "carrinho_removido":
+            with conexao:
+                conexao.execute("DELETE FROM itens_carrinho WHERE cliente = ? AND codigo = ?",
+                                (dados["cliente"], dados["codigo"]))
+                self._tocar_carrinho(dados)
+                self._gravar_estoque(dados["codigo"])
+        elif tipo == "compra_finalizada":
+            with conexao:
+                self._apagar_carrinho(dados["cliente"])
+        elif tipo == "carrinho_expirado":
+            with conexao:
+                self._apagar_carrinho(dados["cliente"])
+                for codigo in dados["itens"]:
+                    self._gravar_estoque(codigo)
+        elif tipo == "admin_cadastrado":
+            with conexao:
+                conexao.execute("INSERT OR REPLACE INTO admins (cpf, senha_hash) VALUES (?, ?)",
+                                (dados["cpf"], dados["senha_hash"]))
+        elif tipo == "admin_removido":
+            with conexao:
+                conexao.execute("DELETE FROM admins WHERE cpf = ?", (dados["cpf"],))
+
+    def fechar(self):
+        self.conexao.close()
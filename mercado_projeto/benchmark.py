@@ -0,0 +1,257 @@
+# benchmark.py
+#
+# Benchmarks dos caminhos mais usados do mercado_projeto sobre catálogos
+# sintéticos (por padrão 1 mil, 100 mil e 1 milhão de produtos):
+#   - persistencia.carregar_dados / salvar_dados
+#   - Carrinho.adicionar / remover / ver / finalizar
+#   - interface.cadastrar_produto (alocação do código)
+#   - interface.mostrar_produtos (com a saída redirecionada)
+# Para cada caso mede o tempo por operação e o pico de memória
+# (tracemalloc, numa execução separada para não distorcer o tempo).
+# Fechar a sessão e descartar o diário ficam fora da medida, e a
+# compactação automática fica desligada: cada repetição parte do mesmo
+# snapshot. A compactação é medida à parte, no caso persistencia.compactar.
+#
+# Os resultados são gravados em JSON. Com --comparar, o resultado é
+# conferido contra uma execução anterior e o programa termina com erro
+# se algum caso ficou mais lento que o limite.
+#
+# Uso: python benchmark.py [--tamanhos 1000 100000] [--formato json|binario|sqlite]
+#                          [--saida bench.json]
+#                          [--comparar anterior.json] [--limite 1.2]
+
+import argparse
+import builtins
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import interface
+import persistencia
+from cadastro import obter_cadastro
+from catalogo import ProdutoStore
+
+TAMANHOS_PADRAO = (1_000, 100_000, 1_000_000)
+OPERACOES_CARRINHO = 1_000
+
+def catalogo_sintetico(tamanho: int, semente: int = 0) -> ProdutoStore:
+    aleatorio = random.Random(semente)
+    return ProdutoStore.from_dicts(
+        {"codigo": c, "nome": f"produto {c}", "preco": round(aleatorio.uniform(1, 100), 2),
+         "estoque": 1_000_000}
+        for c in range(1, tamanho + 1)
+    )
+
+@contextlib.contextmanager
+def entradas(*respostas):
+    """Responde aos `input()` da interface com as respostas dadas, em ciclo."""
+    original = builtins.input
+    fila = itertools.cycle(respostas)
+    builtins.input = lambda mensagem="": next(fila)
+    try:
+        yield
+    finally:
+        builtins.input = original
+
+def encerrar():
+    """Fecha a sessão e descarta o diário: a próxima parte do snapshot salvo."""
+    persistencia.fechar_dados()
+    for arquivo in (persistencia.ARQUIVO_DIARIO, persistencia.ARQUIVO_DIARIO_SELADO):
+        if os.path.exists(arquivo):
+            os.remove(arquivo)
+
+def medir(funcao, repeticoes: int, com_memoria: bool):
+    """Executa o caso e devolve (tempos, pico_de_memoria).
+
+    `funcao` é um par (preparar, executar); `executar` recebe o que
+    `preparar()` devolveu e só ele entra no tempo medido. `encerrar()`
+    roda depois de cada execução, fora da medida.
+    """
+    preparar, executar = funcao
+    tempos = []
+    for _ in range(repeticoes):
+        estado = preparar()
+        inicio = time.perf_counter()
+        executar(estado)
+        tempos.append(time.perf_counter() - inicio)
+        encerrar()
+    pico = None
+    if com_memoria:
+        estado = preparar()
+        tracemalloc.start()
+        executar(estado)
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        encerrar()
+    return tempos, pico
+
+def casos(tamanho: int):
+    """Gera (nome, operacoes, (preparar, executar)) para um catálogo de `tamanho` produtos."""
+    base = catalogo_sintetico(tamanho)
+    persistencia.salvar_dados(base, persistencia.GerenciadorCarrinhos(), persistencia.admins_padrao(), 0)
+    aleatorio = random.Random(tamanho)
+    codigos = [aleatorio.randint(1, tamanho) for _ in range(OPERACOES_CARRINHO)]
+
+    def sessao():
+        produtos, sessoes, admins = persistencia.carregar_dados()
+        return produtos, sessoes.obter(), admins
+
+    def salvar(estado):
+        persistencia.salvar_dados(estado[0], estado[1], estado[2], 0)
+
+    def carregar(_):
+        persistencia.carregar_dados()
+
+    def adicionar(estado):
+        produtos, carrinho, _ = estado
+        for codigo in codigos:
+            carrinho.adicionar(produtos[codigo], 1)
+        carrinho.esvaziar()
+
+    def com_carrinho_cheio():
+        produtos, carrinho, admins = sessao()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for codigo in codigos:
+                carrinho.adicionar(produtos[codigo], 1)
+        return produtos, carrinho, admins
+
+    def remover(estado):
+        _, carrinho, _ = estado
+        for codigo in codigos:
+            carrinho.remover(codigo)
+
+    def ver(estado):
+        _, carrinho, _ = estado
+        for _ in range(10):
+            carrinho.ver()
+        carrinho.esvaziar()
+
+    def finalizar(estado):
+        _, carrinho, _ = estado
+        carrinho.finalizar()
+
+    def com_cadastro():
+        # O índice de nomes é montado no primeiro cadastro; fica fora da medida.
+        estado = sessao()
+        obter_cadastro(estado[0])
+        return estado
+
+    def cadastrar(estado):
+        produtos = estado[0]
+        # Nomes diferentes: um nome repetido seria recusado, não cadastrado.
+        respostas = itertools.chain.from_iterable((f"novo produto {i}", "9.90", "10") for i in range(100))
+        with entradas(*respostas):
+            for _ in range(100):
+                interface.cadastrar_produto(produtos)
+
+    def mostrar(estado):
+        produtos = estado[0]
+        for pagina in range(1, 11):
+            interface.mostrar_produtos(produtos, pagina)
+
+    def compactar(_):
+        # Dobra no snapshot o diário deixado por com_carrinho_cheio.
+        persistencia.compactar(forcar=True)
+        persistencia._aguardar_compactacao()
+
+    yield "persistencia.salvar_dados", 1, (lambda: (base, persistencia.GerenciadorCarrinhos(),
+                                                    persistencia.admins_padrao()), salvar)
+    yield "persistencia.carregar_dados", 1, (lambda: None, carregar)
+    yield "carrinho.adicionar", OPERACOES_CARRINHO, (sessao, adicionar)
+    yield "carrinho.remover", OPERACOES_CARRINHO, (com_carrinho_cheio, remover)
+    yield "carrinho.ver", 10, (com_carrinho_cheio, ver)
+    yield "carrinho.finalizar", 1, (com_carrinho_cheio, finalizar)
+    yield "interface.cadastrar_produto", 100, (com_cadastro, cadastrar)
+    yield "interface.mostrar_produtos", 10, (sessao, mostrar)
+    if persistencia.FORMATO_DADOS != "sqlite":  # o SQLite não tem diário
+        yield "persistencia.compactar", 1, (com_carrinho_cheio, compactar)
+
+def executar(tamanhos, repeticoes: int, com_memoria: bool):
+    resultados = []
+    diretorio = tempfile.mkdtemp(prefix="mercado-bench-")
+    anterior = os.getcwd()
+    limite_diario = persistencia.LIMITE_DIARIO
+    # Sem compactação no meio de um caso: ela roda no caso persistencia.compactar.
+    persistencia.LIMITE_DIARIO = float("inf")
+    os.chdir(diretorio)
+    try:
+        for tamanho in tamanhos:
+            for nome, operacoes, funcao in casos(tamanho):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    tempos, pico = medir(funcao, repeticoes, com_memoria)
+                resultado = {
+                    "caso": nome,
+                    "tamanho": tamanho,
+                    "operacoes": operacoes,
+                    "repeticoes": repeticoes,
+                    "segundos_por_operacao": min(tempos) / operacoes,
+                    "media_segundos": sum(tempos) / len(tempos),
+                    "pico_memoria_bytes": pico,
+                }
+                resultados.append(resultado)
+                print(f"{nome:<30} {tamanho:>9}  {resultado['segundos_por_operacao'] * 1e6:>12.1f} µs/op"
+                      + (f"  pico {pico / 2**20:>8.1f} MiB" if pico is not None else ""))
+            for arquivo in os.listdir(diretorio):
+                os.remove(arquivo)
+    finally:
+        persistencia.LIMITE_DIARIO = limite_diario
+        os.chdir(anterior)
+        shutil.rmtree(diretorio, ignore_errors=True)
+    return resultados
+
+def comparar(resultados, caminho_anterior: str, limite: float):
+    """Lista os casos que ficaram mais de `limite` vezes mais lentos que na execução anterior."""
+    with open(caminho_anterior, "r", encoding="utf-8") as f:
+        anteriores = {(r["caso"], r["tamanho"]): r for r in json.load(f)["resultados"]}
+    regressoes = []
+    for r in resultados:
+        antes = anteriores.get((r["caso"], r["tamanho"]))
+        if antes and r["segundos_por_operacao"] > antes["segundos_por_operacao"] * limite:
+            regressoes.append((r["caso"], r["tamanho"],
+                               r["segundos_por_operacao"] / antes["segundos_por_operacao"]))
+    return regressoes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do mercado_projeto.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS_PADRAO))
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--formato", choices=("json", "binario", "sqlite"), default=persistencia.FORMATO_DADOS,
+                        help="formato de persistência (persistencia.FORMATO_DADOS)")
+    parser.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória")
+    parser.add_argument("--saida", default="benchmark.json")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    parser.add_argument("--limite", type=float, default=1.2,
+                        help="razão de tempo acima da qual um caso conta como regressão")
+    args = parser.parse_args(argv)
+    persistencia.FORMATO_DADOS = args.formato
+
+    resultados = executar(args.tamanhos, args.repeticoes, not args.sem_memoria)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump({
+            "gerado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "formato": args.formato,
+            "resultados": resultados,
+        }, f, ensure_ascii=False, indent=4)
+    print(f"\nResultados gravados em {args.saida}")
+
+    if args.comparar:
+        regressoes = comparar(resultados, args.comparar, args.limite)
+        for caso, tamanho, razao in regressoes:
+            print(f"REGRESSÃO: {caso} ({tamanho} produtos) {razao:.2f}x mais lento")
+        if regressoes:
+            sys.exit(1)
+        print("Nenhuma regressão em relação à execução anterior.")
+
+if __name__ == "__main__":
+    main()
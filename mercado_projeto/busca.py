@@ -0,0 +1,109 @@
+# busca.py
+#
+# Índice invertido sobre Produto.nome. Cada nome é quebrado em termos
+# normalizados (sem acento, minúsculos) e cada termo aponta para o
+# conjunto de códigos que o contêm. Os termos também ficam numa lista
+# ordenada, para que a busca por prefixo seja um `bisect` em vez de uma
+# varredura do catálogo. O índice é mantido pelos eventos de produto.
+
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+import eventos
+
+LIMITE_RESULTADOS = 20
+
+def normalizar(texto: str) -> str:
+    if texto.isascii():
+        return texto.casefold()
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+def termos(texto: str):
+    return re.findall(r"\w+", normalizar(texto))
+
+
+class IndiceBusca:
+    def __init__(self, produtos=None):
+        self.produtos = produtos
+        self._postagens = {}           # termo -> set de códigos
+        self._termos_ordenados = []    # todos os termos, em ordem
+        self._termos_por_codigo = {}   # codigo -> tupla de termos do nome
+        if produtos is not None:
+            # Carga inicial: ordena os termos uma vez só no fim.
+            for produto in produtos.values():
+                self._indexar(produto.codigo, produto.nome)
+            self._termos_ordenados = sorted(self._postagens)
+
+    def _indexar(self, codigo: int, nome: str):
+        termos_nome = tuple(set(termos(nome)))
+        self._termos_por_codigo[codigo] = termos_nome
+        novos = []
+        for termo in termos_nome:
+            codigos = self._postagens.get(termo)
+            if codigos is None:
+                codigos = self._postagens[termo] = set()
+                novos.append(termo)
+            codigos.add(codigo)
+        return novos
+
+    def adicionar(self, codigo: int, nome: str):
+        if codigo in self._termos_por_codigo:
+            self.remover(codigo)
+        for termo in self._indexar(codigo, nome):
+            insort(self._termos_ordenados, termo)
+
+    def remover(self, codigo: int):
+        for termo in self._termos_por_codigo.pop(codigo, ()):
+            codigos = self._postagens[termo]
+            codigos.discard(codigo)
+            if not codigos:
+                del self._postagens[termo]
+                del self._termos_ordenados[bisect_left(self._termos_ordenados, termo)]
+
+    def _com_prefixo(self, prefixo: str):
+        i = bisect_left(self._termos_ordenados, prefixo)
+        while i < len(self._termos_ordenados) and self._termos_ordenados[i].startswith(prefixo):
+            yield self._termos_ordenados[i]
+            i += 1
+
+    def buscar(self, consulta: str, limite: int = LIMITE_RESULTADOS):
+        """Os `limite` menores códigos cujo nome tem, para cada palavra da
+        consulta, um termo com esse prefixo."""
+        palavras = termos(consulta)
+        if not palavras:
+            return []
+        # A palavra mais longa costuma ser a mais seletiva: gera os candidatos
+        # por ela e confere as demais só nesses candidatos.
+        palavras.sort(key=len, reverse=True)
+        principal, demais = palavras[0], palavras[1:]
+        candidatos = set()
+        for termo in self._com_prefixo(principal):
+            candidatos.update(self._postagens[termo])
+        termos_por_codigo = self._termos_por_codigo
+        encontrados = (codigo for codigo in candidatos
+                       if all(any(t.startswith(p) for t in termos_por_codigo[codigo]) for p in demais))
+        return heapq.nsmallest(limite, encontrados)
+
+    def registrar(self, tipo: str, dados: dict):
+        if tipo in ("produto_cadastrado", "produto_editado"):
+            self.adicionar(dados["codigo"], dados["nome"])
+        elif tipo == "produtos_cadastrados":
+            for produto in dados["produtos"]:
+                self.adicionar(produto["codigo"], produto["nome"])
+        elif tipo == "produto_removido":
+            self.remover(dados["codigo"])
+
+
+_indice = None
+
+def obter_indice(produtos) -> IndiceBusca:
+    """Índice do catálogo, construído na primeira busca e mantido pelos eventos."""
+    global _indice
+    if _indice is None or _indice.produtos is not produtos:
+        if _indice is not None:
+            eventos.cancelar(_indice.registrar)
+        _indice = IndiceBusca(produtos)
+        eventos.assinar(_indice.registrar)
+    return _indice
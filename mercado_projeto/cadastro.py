@@ -0,0 +1,262 @@
+# cadastro.py
+#
+# Cadastro de produtos, um a um (menu e comandos) ou em massa (arquivo ou
+# qualquer iterável), sempre pelo mesmo caminho:
+#
+# - Códigos vêm de uma sequência crescente gravada em mercado.sequencia.json,
+#   reservada em blocos de BLOCO_SEQUENCIA: uma gravação no disco a cada
+#   bloco, não a cada produto, e nenhum código é reaproveitado, nem o de um
+#   produto removido (antes, o código era max(codigos) + 1, que percorria
+#   o catálogo a cada cadastro). Ao reabrir, os códigos que sobraram do
+#   último bloco são pulados.
+# - Nomes repetidos são recusados: o nome é normalizado (sem acento,
+#   minúsculo, espaços simples) e aponta para o código do produto. O nome
+#   atual do produto é conferido a cada consulta, então entradas de
+#   produtos removidos ou renomeados não precisam ser apagadas.
+# - Os produtos aceitos são publicados em lotes de até `tamanho_lote` num
+#   evento `produtos_cadastrados`: uma linha no diário ou uma transação no
+#   SQLite por lote. No SQLite, o próprio lote vai para o banco de uma vez
+#   (`inserir_varios`), sem passar pelo cache do catálogo.
+#
+# Arquivo: CSV (colunas nome,preco,estoque) ou JSONL (um objeto com essas
+# chaves por linha), preço em reais.
+#
+# Uso: python cadastro.py produtos.csv [--lote 5000] [--saida resultados.jsonl]
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import eventos
+from busca import normalizar
+from carga_fornecedor import ler_feed
+from models import Produto
+
+ARQUIVO_SEQUENCIA = "mercado.sequencia.json"
+BLOCO_SEQUENCIA = 1000
+TAMANHO_LOTE = 5_000
+
+CADASTRADO = "cadastrado"
+DUPLICADO = "duplicado"
+INVALIDO = "invalido"
+
+
+def nome_normalizado(nome: str) -> str:
+    return " ".join(normalizar(nome).split())
+
+
+class Sequencia:
+    """Códigos crescentes, reservados em blocos gravados no disco."""
+
+    def __init__(self, caminho: str = ARQUIVO_SEQUENCIA, minimo: int = 1, bloco: int = BLOCO_SEQUENCIA):
+        self.caminho = caminho
+        self.bloco = bloco
+        self._trava = threading.Lock()
+        reservado = 1
+        if os.path.exists(caminho):
+            with open(caminho, "r", encoding="utf-8") as f:
+                reservado = json.load(f)["proximo"]
+        self._proximo = max(reservado, minimo)
+        self._limite = self._proximo  # nada reservado ainda nesta sessão
+
+    def alocar(self) -> int:
+        with self._trava:
+            if self._proximo >= self._limite:
+                self._reservar(self._proximo + self.bloco)
+            codigo = self._proximo
+            self._proximo += 1
+            return codigo
+
+    def avancar(self, minimo: int):
+        """Garante que os próximos códigos sejam >= `minimo` (código vindo de fora)."""
+        with self._trava:
+            self._proximo = max(self._proximo, minimo)
+
+    def _reservar(self, limite: int):
+        # Gravado antes de qualquer código do bloco ser usado: depois de uma
+        # queda, a sequência recomeça do limite e nunca repete um código.
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"proximo": limite}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.caminho)
+        self._limite = limite
+
+
+class Cadastro:
+    def __init__(self, produtos, caminho_sequencia: str = ARQUIVO_SEQUENCIA):
+        self.produtos = produtos
+        self._trava = threading.Lock()
+        self._por_nome = {}  # nome normalizado -> codigo
+        # Catálogo no SQLite: o lote fica aqui até ser gravado de uma vez.
+        self._inserir_varios = getattr(produtos, "inserir_varios", None)
+        self._pendentes = {}  # codigo -> Produto ainda não gravado
+        maior = 0
+        for produto in produtos.values():
+            maior = max(maior, produto.codigo)
+            self._por_nome.setdefault(nome_normalizado(produto.nome), produto.codigo)
+        self.sequencia = Sequencia(caminho_sequencia, minimo=maior + 1)
+
+    def duplicado(self, nome: str):
+        """Código do produto que já tem esse nome (normalizado), ou None."""
+        return self._duplicado(nome_normalizado(nome))
+
+    def _duplicado(self, normalizado: str):
+        codigo = self._por_nome.get(normalizado)
+        produto = None
+        if codigo is not None:
+            produto = self._pendentes.get(codigo) or self._consultar(codigo)
+        if produto is not None and nome_normalizado(produto.nome) == normalizado:
+            return codigo
+        return None
+
+    def _consultar(self, codigo):
+        # No SQLite, `get` guardaria no cache cada produto conferido.
+        return getattr(self.produtos, "consultar", self.produtos.get)(codigo)
+
+    def _gravar_lote(self, lote):
+        if self._inserir_varios is not None:
+            with self._trava:
+                self._inserir_varios(self._pendentes.values())
+                self._pendentes.clear()
+        eventos.publicar("produtos_cadastrados", produtos=lote)
+
+    def _indexar(self, codigo: int, normalizado: str):
+        # Não toma o lugar de outro produto que ainda tem esse nome.
+        if self._duplicado(normalizado) is None:
+            self._por_nome[normalizado] = codigo
+
+    def cadastrar_varios(self, linhas, tamanho_lote: int = TAMANHO_LOTE, permitir_duplicados: bool = False):
+        """Cadastra cada linha de `linhas`, pares (numero, dados) como os de `carga_fornecedor.ler_feed`.
+
+        `dados` é um dict com nome, preco (em reais) e estoque. Retorna, na
+        ordem de entrada, (numero, status, codigo, motivo); para um
+        duplicado, `codigo` é o do produto que já existe.
+        """
+        resultados = []
+        lote = []
+        for numero, dados in linhas:
+            try:
+                nome, preco, estoque = _interpretar(dados)
+            except ValueError as erro:
+                resultados.append((numero, INVALIDO, None, str(erro)))
+                continue
+            normalizado = nome_normalizado(nome)
+            with self._trava:
+                existente = self._duplicado(normalizado)
+                if existente is not None and not permitir_duplicados:
+                    resultados.append((numero, DUPLICADO, existente, f"já cadastrado como {existente}"))
+                    continue
+                codigo = self.sequencia.alocar()
+                produto = Produto(codigo, nome, preco, estoque)
+                if self._inserir_varios is not None:
+                    self._pendentes[codigo] = produto
+                else:
+                    self.produtos[codigo] = produto
+                if existente is None:
+                    self._por_nome[normalizado] = codigo
+            lote.append(produto.to_dict())
+            resultados.append((numero, CADASTRADO, codigo, ""))
+            if len(lote) >= tamanho_lote:
+                self._gravar_lote(lote)
+                lote = []
+        if lote:
+            self._gravar_lote(lote)
+        return resultados
+
+    def cadastrar(self, nome: str, preco: str, estoque, permitir_duplicados: bool = False):
+        """Um produto só, pelo mesmo caminho. Retorna (status, codigo, motivo)."""
+        dados = {"nome": nome, "preco": preco, "estoque": estoque}
+        _, status, codigo, motivo = self.cadastrar_varios([(1, dados)], permitir_duplicados=permitir_duplicados)[0]
+        return status, codigo, motivo
+
+    def registrar(self, tipo: str, dados: dict):
+        """Ouvinte de eventos: nomes novos ou alterados fora deste módulo
+        (os lotes `produtos_cadastrados` já saem daqui indexados)."""
+        if tipo in ("produto_cadastrado", "produto_editado"):
+            with self._trava:
+                self._indexar(dados["codigo"], nome_normalizado(dados["nome"]))
+                self.sequencia.avancar(dados["codigo"] + 1)
+
+
+def _interpretar(dados):
+    """Retorna (nome, preco_em_centavos, estoque)."""
+    from utils import para_centavos
+
+    if not isinstance(dados, dict):
+        raise ValueError("linha mal formada")
+    nome = str(dados.get("nome") or "").strip()
+    if not nome:
+        raise ValueError("nome vazio")
+    preco = dados.get("preco")
+    try:
+        preco = para_centavos(preco)
+    except (TypeError, ValueError):
+        raise ValueError(f"preço inválido: {preco!r}") from None
+    if preco < 0:
+        raise ValueError("preço negativo")
+    estoque = dados.get("estoque")
+    try:
+        estoque = int(estoque)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"estoque inválido: {estoque!r}") from None
+    if estoque < 0:
+        raise ValueError("estoque negativo")
+    return nome, preco, estoque
+
+
+_cadastro = None
+
+def obter_cadastro(produtos) -> Cadastro:
+    """Cadastro do catálogo, montado no primeiro uso e mantido pelos eventos."""
+    global _cadastro
+    if _cadastro is None or _cadastro.produtos is not produtos:
+        if _cadastro is not None:
+            eventos.cancelar(_cadastro.registrar)
+        _cadastro = Cadastro(produtos)
+        eventos.assinar(_cadastro.registrar)
+    return _cadastro
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cadastra os produtos de um arquivo.")
+    parser.add_argument("arquivo", help="produtos em CSV (nome,preco,estoque) ou JSONL")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE,
+                        help="produtos por lote (cada lote é gravado de uma vez)")
+    parser.add_argument("--saida", help="grava o resultado de cada linha neste arquivo JSONL")
+    parser.add_argument("--permitir-duplicados", action="store_true",
+                        help="cadastra mesmo se já houver um produto com o mesmo nome")
+    args = parser.parse_args(argv)
+
+    from persistencia import carregar_dados, fechar_dados
+    produtos, sessoes, admins = carregar_dados()
+    try:
+        inicio = time.perf_counter()
+        resultados = obter_cadastro(produtos).cadastrar_varios(
+            ler_feed(args.arquivo), max(args.lote, 1), args.permitir_duplicados)
+        decorrido = time.perf_counter() - inicio
+    finally:
+        fechar_dados()
+
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    try:
+        for numero, status, codigo, motivo in resultados:
+            saida.write(json.dumps({"linha": numero, "status": status, "codigo": codigo, "motivo": motivo},
+                                   ensure_ascii=False) + "\n")
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+    contagem = {status: 0 for status in (CADASTRADO, DUPLICADO, INVALIDO)}
+    for _, status, _, _ in resultados:
+        contagem[status] += 1
+    print(f"\nLinhas: {len(resultados)}  cadastradas: {contagem[CADASTRADO]}  "
+          f"duplicadas: {contagem[DUPLICADO]}  inválidas: {contagem[INVALIDO]}", file=sys.stderr)
+    print(f"Tempo: {decorrido:.2f} s  ({len(resultados) / max(decorrido, 1e-9):,.0f} linhas/s)",
+          file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# carga_fornecedor.py
+#
+# Atualização em massa de estoque e preço pelo arquivo noturno dos
+# fornecedores (alternativa a editar produto por produto no menu).
+# Lê um arquivo CSV (colunas codigo,estoque,preco) ou JSONL (um objeto com
+# essas chaves por linha). `estoque` é uma variação (+50, -3) e `preco` o
+# novo preço em reais; qualquer um dos dois pode ficar vazio.
+#
+# O arquivo é lido linha a linha. As linhas de um mesmo código são somadas
+# (variações de estoque) ou sobrepostas (vale o último preço) dentro de um
+# lote de até `tamanho_lote` códigos distintos; cada lote é aplicado sob as
+# travas de reserva e publicado num único evento `produtos_atualizados`,
+# que vira uma linha no diário ou uma transação no SQLite. A memória usada
+# depende do tamanho do lote, não do tamanho do arquivo.
+#
+# Linhas inválidas, de produtos inexistentes ou que deixariam o estoque
+# negativo são rejeitadas; linhas que não mudam nada são ignoradas.
+#
+# Uso: python carga_fornecedor.py feed.csv [--lote 5000] [--rejeitadas rejeitadas.csv]
+
+import argparse
+import collections
+import csv
+import json
+import sys
+import time
+
+TAMANHO_LOTE = 5_000
+
+def ler_feed(caminho: str):
+    """Gera (numero_da_linha, dados) linha a linha, sem carregar o arquivo todo."""
+    with open(caminho, "r", encoding="utf-8", newline="") as f:
+        if caminho.endswith(".csv"):
+            for numero, linha in enumerate(csv.DictReader(f), start=2):
+                yield numero, linha
+        else:
+            for numero, linha in enumerate(f, start=1):
+                if linha.strip():
+                    try:
+                        yield numero, json.loads(linha)
+                    except ValueError:
+                        yield numero, None
+
+def interpretar(dados):
+    """Retorna (codigo, variacao_estoque, preco_em_centavos ou None); ValueError se a linha é inválida.
+
+    Também usado pelo comando atualizar_estoque do Django, que lê o mesmo feed.
+    """
+    from utils import para_centavos
+
+    if not isinstance(dados, dict):
+        raise ValueError("linha mal formada")
+    # OverflowError: Infinity num JSON vira float('inf'), e int() dele estoura.
+    try:
+        codigo = int(dados["codigo"])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        raise ValueError("código inválido") from None
+    estoque = dados.get("estoque")
+    try:
+        variacao = int(estoque) if estoque not in (None, "") else 0
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"estoque inválido: {estoque!r}") from None
+    preco = dados.get("preco")
+    try:
+        preco = para_centavos(preco) if preco not in (None, "") else None
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"preço inválido: {preco!r}") from None
+    if preco is not None and preco < 0:
+        raise ValueError("preço negativo")
+    return codigo, variacao, preco
+
+def aplicar_feed(linhas, produtos, tamanho_lote: int = TAMANHO_LOTE, rejeitar=None):
+    """Aplica o feed ao catálogo. Retorna um Counter com o resumo.
+
+    `rejeitar(linha, codigo, motivo)`, se dado, é chamado a cada rejeição;
+    `linha` é None quando o que falhou foi o grupo inteiro de um código.
+    """
+    resumo = collections.Counter()
+    pendentes = {}  # codigo -> [variacao, preco, linhas]
+    for numero, dados in linhas:
+        resumo["lidas"] += 1
+        try:
+            codigo, variacao, preco = interpretar(dados)
+        except ValueError as erro:
+            resumo["rejeitadas"] += 1
+            if rejeitar:
+                rejeitar(numero, dados.get("codigo") if isinstance(dados, dict) else None, str(erro))
+            continue
+        if variacao == 0 and preco is None:
+            resumo["ignoradas"] += 1
+            continue
+        grupo = pendentes.get(codigo)
+        if grupo is None:
+            pendentes[codigo] = [variacao, preco, 1]
+        else:
+            grupo[0] += variacao
+            grupo[1] = preco if preco is not None else grupo[1]
+            grupo[2] += 1
+        if len(pendentes) >= tamanho_lote:
+            _aplicar_lote(pendentes, produtos, resumo, rejeitar)
+            pendentes = {}
+    if pendentes:
+        _aplicar_lote(pendentes, produtos, resumo, rejeitar)
+    return resumo
+
+def _aplicar_lote(pendentes, produtos, resumo, rejeitar):
+    from eventos import publicar
+    from reserva import trava_do_produto
+
+    # No SQLite, `get` guarda cada produto lido no cache do catálogo; o feed
+    # passa por cada código uma vez só, então lê sem guardar.
+    consultar = getattr(produtos, "consultar", produtos.get)
+    alterados = []
+    for codigo, (variacao, preco, linhas) in pendentes.items():
+        produto = consultar(codigo)
+        motivo = None
+        if produto is None:
+            motivo = "produto inexistente"
+        else:
+            with trava_do_produto(codigo):
+                if produto.estoque + variacao < 0:
+                    motivo = f"estoque ficaria negativo ({produto.estoque} {variacao:+d})"
+                elif variacao == 0 and (preco is None or preco == produto.preco):
+                    resumo["ignoradas"] += linhas
+                    continue
+                else:
+                    produto.estoque += variacao
+                    if preco is not None:
+                        produto.preco = preco
+                    # A variação vai junto: o diário refaz o `ajuste`, não o estoque absoluto.
+                    alterado = {**produto.to_dict(), "ajuste": variacao}
+        if motivo is not None:
+            resumo["rejeitadas"] += linhas
+            if rejeitar:
+                rejeitar(None, codigo, motivo)
+            continue
+        alterados.append(alterado)
+        resumo["aplicadas"] += linhas
+    if alterados:
+        resumo["produtos"] += len(alterados)
+        resumo["lotes"] += 1
+        publicar("produtos_atualizados", produtos=alterados)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aplica o arquivo de estoque e preços dos fornecedores.")
+    parser.add_argument("arquivo", help="feed em CSV (codigo,estoque,preco) ou JSONL")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE,
+                        help="códigos distintos por lote (cada lote é gravado de uma vez)")
+    parser.add_argument("--rejeitadas", help="grava as linhas rejeitadas neste arquivo CSV")
+    args = parser.parse_args(argv)
+
+    from persistencia import carregar_dados, fechar_dados
+    saida = None
+    rejeitar = None
+    if args.rejeitadas:
+        saida = open(args.rejeitadas, "w", encoding="utf-8", newline="")
+        escritor = csv.writer(saida)
+        escritor.writerow(("linha", "codigo", "motivo"))
+        rejeitar = lambda numero, codigo, motivo: escritor.writerow((numero or "", codigo, motivo))
+
+    produtos, sessoes, admins = carregar_dados()
+    try:
+        inicio = time.perf_counter()
+        resumo = aplicar_feed(ler_feed(args.arquivo), produtos, max(args.lote, 1), rejeitar)
+        decorrido = time.perf_counter() - inicio
+    finally:
+        fechar_dados()
+        if saida is not None:
+            saida.close()
+
+    print(f"Linhas: {resumo['lidas']}  aplicadas: {resumo['aplicadas']}  "
+          f"ignoradas: {resumo['ignoradas']}  rejeitadas: {resumo['rejeitadas']}", file=sys.stderr)
+    print(f"Produtos alterados: {resumo['produtos']} em {resumo['lotes']} lote(s)", file=sys.stderr)
+    print(f"Tempo: {decorrido:.2f} s  ({resumo['lidas'] / max(decorrido, 1e-9):,.0f} linhas/s)",
+          file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
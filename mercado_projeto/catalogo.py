@@ -0,0 +1,271 @@
+# catalogo.py
+#
+# Representação compacta do catálogo. Em vez de um objeto Produto (com
+# __dict__) por código, `ProdutoStore` guarda codigo/preco (centavos)/estoque
+# em colunas `array` e os nomes numa tabela de strings (um único bytearray
+# UTF-8 com offsets), sem um objeto str por produto. Quem acessa
+# `store[codigo]` recebe um `ProdutoView`, que lê e escreve direto nas
+# colunas e se comporta como um Produto para o Carrinho e a interface.
+# `retrato()` copia as colunas de uma vez (versoes.py lê essa cópia fixa
+# sob demanda, sem um objeto por produto).
+
+from array import array
+from collections.abc import MutableMapping
+from reserva import todas_as_travas
+from utils import para_centavos, para_reais
+
+VAZIO = -1
+# O índice codigo -> linha cresce até o código inserido; um código muito à
+# frente do maior já visto alocaria um array enorme de linhas vazias.
+SALTO_MAXIMO = 1_000_000
+
+
+class ProdutoView:
+    __slots__ = ("_store", "_linha", "codigo")
+
+    def __init__(self, store, linha: int, codigo: int):
+        self._store = store
+        self._linha = linha
+        self.codigo = codigo
+
+    @property
+    def nome(self):
+        return self._store._nome(self._linha)
+
+    @nome.setter
+    def nome(self, valor):
+        self._store._gravar_nome(self._linha, valor)
+
+    @property
+    def preco(self):
+        return self._store._precos[self._linha]
+
+    @preco.setter
+    def preco(self, valor):
+        self._store._precos[self._linha] = valor
+
+    @property
+    def estoque(self):
+        return self._store._estoques[self._linha]
+
+    @estoque.setter
+    def estoque(self, valor):
+        self._store._estoques[self._linha] = valor
+
+    def to_dict(self):
+        return {"codigo": self.codigo, "nome": self.nome, "preco": para_reais(self.preco),
+                "estoque": self.estoque}
+
+    def __repr__(self):
+        return f"ProdutoView({self.codigo}, {self.nome!r}, {self.preco}, {self.estoque})"
+
+
+class ProdutoStore(MutableMapping):
+    """Catálogo em colunas: codigo -> ProdutoView.
+
+    Linhas removidas não são reaproveitadas: um ProdutoView antigo (em
+    um carrinho, por exemplo) continua apontando para os dados do
+    produto removido, como acontecia com o objeto Produto. O espaço é
+    recuperado quando o catálogo é recarregado do snapshot.
+    """
+
+    def __init__(self):
+        self._codigos = array("q")
+        self._precos = array("q")
+        self._estoques = array("q")
+        self._inicio_nome = array("q")
+        self._tamanho_nome = array("l")
+        self._textos = bytearray()
+        # Códigos são sequenciais, então o índice codigo -> linha é um array.
+        self._linha_por_codigo = array("q")
+        self._tamanho = 0
+
+    @classmethod
+    def from_dicts(cls, dados):
+        """Dicts no formato dos arquivos (preço em reais)."""
+        store = cls()
+        for d in dados:
+            store._inserir(d["codigo"], d["nome"], para_centavos(d["preco"]), d["estoque"])
+        return store
+
+    def _nome(self, linha: int) -> str:
+        inicio = self._inicio_nome[linha]
+        return str(self._textos[inicio:inicio + self._tamanho_nome[linha]], "utf-8")
+
+    def _guardar_texto(self, nome: str):
+        dados = nome.encode("utf-8")
+        inicio = len(self._textos)
+        self._textos += dados
+        return inicio, len(dados)
+
+    def _gravar_nome(self, linha: int, nome: str):
+        if nome == self._nome(linha):
+            return
+        # O texto antigo fica sem uso até o próximo snapshot.
+        self._inicio_nome[linha], self._tamanho_nome[linha] = self._guardar_texto(nome)
+
+    def _linha(self, codigo):
+        if isinstance(codigo, int) and 0 <= codigo < len(self._linha_por_codigo):
+            return self._linha_por_codigo[codigo]
+        return VAZIO
+
+    def _inserir(self, codigo: int, nome: str, preco: int, estoque: int):
+        if not isinstance(codigo, int) or codigo < 1:
+            raise ValueError(f"código inválido: {codigo!r}")
+        linha = self._linha(codigo)
+        if linha != VAZIO:
+            self._gravar_nome(linha, nome)
+            self._precos[linha] = preco
+            self._estoques[linha] = estoque
+            return
+        if codigo >= len(self._linha_por_codigo):
+            if codigo - len(self._linha_por_codigo) > SALTO_MAXIMO:
+                raise ValueError(f"código {codigo} muito acima do maior código do catálogo")
+            self._linha_por_codigo.extend([VAZIO] * (codigo + 1 - len(self._linha_por_codigo)))
+        self._linha_por_codigo[codigo] = len(self._codigos)
+        self._codigos.append(codigo)
+        self._precos.append(preco)
+        self._estoques.append(estoque)
+        inicio, tamanho = self._guardar_texto(nome)
+        self._inicio_nome.append(inicio)
+        self._tamanho_nome.append(tamanho)
+        self._tamanho += 1
+
+    def __getitem__(self, codigo):
+        linha = self._linha(codigo)
+        if linha == VAZIO:
+            raise KeyError(codigo)
+        return ProdutoView(self, linha, codigo)
+
+    def __contains__(self, codigo):
+        return self._linha(codigo) != VAZIO
+
+    def __setitem__(self, codigo, produto):
+        self._inserir(codigo, produto.nome, produto.preco, produto.estoque)
+
+    def __delitem__(self, codigo):
+        linha = self._linha(codigo)
+        if linha == VAZIO:
+            raise KeyError(codigo)
+        self._linha_por_codigo[codigo] = VAZIO
+        self._codigos[linha] = VAZIO
+        self._tamanho -= 1
+
+    def __iter__(self):
+        for codigo in self._codigos:
+            if codigo != VAZIO:
+                yield codigo
+
+    def __len__(self):
+        return self._tamanho
+
+    def values(self):
+        for linha, codigo in enumerate(self._codigos):
+            if codigo != VAZIO:
+                yield ProdutoView(self, linha, codigo)
+
+    def items(self):
+        for produto in self.values():
+            yield produto.codigo, produto
+
+    def estoques(self):
+        """Pares (codigo, estoque) direto das colunas."""
+        for codigo, estoque in zip(self._codigos, self._estoques):
+            if codigo != VAZIO:
+                yield codigo, estoque
+
+    def retrato(self):
+        """Cópia das colunas (`Retrato`), tirada com as reservas bloqueadas.
+
+        São cópias de arrays inteiros, sem um objeto por produto; nada do
+        catálogo vivo fica exportado para quem lê a cópia em outra thread.
+        """
+        # Cadastros e remoções saem da thread do menu, a mesma que tira o
+        # retrato; as reservas, de qualquer thread, ficam paradas na cópia.
+        with todas_as_travas():
+            linha_por_codigo = array("q", self._linha_por_codigo)
+            codigos = array("q", self._codigos)
+            precos = array("q", self._precos)
+            estoques = array("q", self._estoques)
+            inicio_nome, tamanho_nome, textos = self._nomes_fixos()
+        return Retrato(linha_por_codigo, codigos, precos, estoques, inicio_nome, tamanho_nome, textos)
+
+    def _nomes_fixos(self):
+        # Os offsets antes do texto: o texto só cresce, então já tem tudo o
+        # que eles apontam.
+        return array("q", self._inicio_nome), array("l", self._tamanho_nome), bytes(self._textos)
+
+    def linhas(self):
+        """Tuplas (codigo, nome, preco em centavos, estoque) sem criar views nem dicts."""
+        textos = memoryview(self._textos)
+        inicios, tamanhos = self._inicio_nome, self._tamanho_nome
+        precos, estoques = self._precos, self._estoques
+        for linha, codigo in enumerate(self._codigos):
+            if codigo != VAZIO:
+                inicio = inicios[linha]
+                nome = str(textos[inicio:inicio + tamanhos[linha]], "utf-8")
+                yield codigo, nome, precos[linha], estoques[linha]
+
+
+class Retrato:
+    """Cópia fixa das colunas de um ProdutoStore (ver `ProdutoStore.retrato`).
+
+    `faixa` monta as tuplas (codigo, nome, preco em centavos, estoque) na
+    hora da leitura; nada muda depois de pronto, então várias threads podem
+    ler ao mesmo tempo, sem trava.
+    """
+
+    def __init__(self, linha_por_codigo, codigos, precos, estoques, inicio_nome, tamanho_nome, textos):
+        self._linha_por_codigo = linha_por_codigo
+        self._codigos = codigos
+        self._precos = precos
+        self._estoques = estoques
+        self._inicio_nome = inicio_nome
+        self._tamanho_nome = tamanho_nome
+        self._textos = textos
+        # Uma linha cadastrada no meio da cópia pode estar só em parte das
+        # colunas: vale o que está em todas.
+        self._linhas = min(len(codigos), len(precos), len(estoques), len(inicio_nome), len(tamanho_nome))
+        self._tamanho = self._linhas - codigos[:self._linhas].count(VAZIO)
+        self.limite = len(linha_por_codigo)  # nenhum código daqui para cima
+
+    def __len__(self):
+        return self._tamanho
+
+    def faixa(self, inicio: int, fim: int):
+        """Tuplas dos códigos em [inicio, fim), em ordem."""
+        codigos, linhas = self._codigos, self._linha_por_codigo
+        for codigo in range(max(inicio, 0), min(fim, self.limite)):
+            linha = linhas[codigo]
+            if linha == VAZIO or linha >= self._linhas or codigos[linha] != codigo:
+                continue
+            inicio_nome = self._inicio_nome[linha]
+            # `replace`: um nome trocado no meio da cópia pode ter início e
+            # tamanho de versões diferentes; o evento da troca corrige.
+            nome = str(self._textos[inicio_nome:inicio_nome + self._tamanho_nome[linha]], "utf-8", "replace")
+            yield codigo, nome, self._precos[linha], self._estoques[linha]
+
+
+def bytes_por_produto(n: int = 100_000):
+    """Compara o consumo de memória por produto: dict de Produto x ProdutoStore."""
+    import tracemalloc
+    from models import Produto
+
+    def medir(construir):
+        tracemalloc.start()
+        catalogo = construir()
+        usado = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del catalogo
+        return usado / n
+
+    antes = medir(lambda: {i: Produto(i, f"produto {i}", 150 + 100 * i, i % 100) for i in range(1, n + 1)})
+    depois = medir(lambda: ProdutoStore.from_dicts(
+        {"codigo": i, "nome": f"produto {i}", "preco": 1.5 + i, "estoque": i % 100} for i in range(1, n + 1)))
+    return antes, depois
+
+
+if __name__ == "__main__":
+    antes, depois = bytes_por_produto()
+    print(f"dict de Produto: {antes:.1f} bytes/produto")
+    print(f"ProdutoStore:    {depois:.1f} bytes/produto")
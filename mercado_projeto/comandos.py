@@ -0,0 +1,362 @@
+# comandos.py
+#
+# Modo não interativo: cada chamada executa uma operação e sai, sem menus
+# nem input().
+#
+#   python main.py produtos listar [--pagina N] [--ordem n|p|e] [--json]
+#   python main.py produtos mostrar 3 [--json]
+#   python main.py produtos buscar arroz [--json]
+#   python main.py produtos cadastrar "Arroz 5kg" 24,90 10        (admin)
+#   python main.py produtos editar 3 [--nome N] [--preco P] [--estoque E]   (admin)
+#   python main.py produtos remover 3                              (admin)
+#   python main.py carrinho ver|finalizar [--cliente C] [--json]
+#   python main.py carrinho adicionar 3 2 [--cliente C] [--json]
+#   python main.py carrinho remover 3 [--cliente C] [--json]
+#   python main.py estoque baixo [--limite 50] [--json]
+#   python main.py vendas resumo [--json]
+#   python main.py executar comandos.txt [--parar]   ("-" lê da entrada padrão)
+#
+# Cada comando importa só os módulos que usa e carrega só o que precisa:
+# consultas leem o estado sem abrir o diário (persistencia.ler_dados),
+# `vendas resumo` lê só o livro de vendas, e só os comandos que alteram
+# algo passam por carregar_dados/fechar_dados. Em `executar`, cada linha do
+# arquivo é um comando e os dados são carregados uma vez para o arquivo
+# todo.
+#
+# Comandos de admin usam as credenciais de MERCADO_ADMIN_CPF e
+# MERCADO_ADMIN_SENHA. Código de saída: 0 se tudo deu certo, 1 se algum
+# comando falhou.
+
+import argparse
+import contextlib
+import json
+import os
+import shlex
+import sys
+
+
+class ErroComando(Exception):
+    pass
+
+
+class Contexto:
+    """Dados carregados sob demanda e compartilhados pelos comandos de um processo."""
+
+    def __init__(self):
+        self.dados = None
+        self.escrita = False
+        self.admin = False
+
+    def obter(self, escrita: bool = False):
+        """(produtos, sessoes, admins); com `escrita`, as alterações vão para o diário."""
+        if self.dados is None or (escrita and not self.escrita):
+            import persistencia
+            if escrita:
+                self.dados = persistencia.carregar_dados()
+                self.escrita = True
+                self.dados[1].expirar()  # carrinhos abandonados desde a última execução
+            else:
+                self.dados = persistencia.ler_dados()
+        return self.dados
+
+    def exigir_admin(self):
+        if self.admin:
+            return
+        admins = self.obter()[2]
+        cpf, senha = os.environ.get("MERCADO_ADMIN_CPF"), os.environ.get("MERCADO_ADMIN_SENHA")
+        if not cpf or not senha or not admins.verificar(cpf, senha):
+            raise ErroComando("comando de admin: defina MERCADO_ADMIN_CPF e MERCADO_ADMIN_SENHA de um admin")
+        self.admin = True
+
+    def fechar(self):
+        if self.dados is not None:
+            import persistencia
+            persistencia.fechar_dados()
+        self.dados = None
+        self.escrita = False
+
+
+def _emitir(args, dados, texto=None):
+    if args.json:
+        print(json.dumps(dados, ensure_ascii=False))
+    elif texto is not None:
+        print(texto)
+
+@contextlib.contextmanager
+def _mensagens(args):
+    # Com --json, as mensagens das classes do modelo vão para stderr e
+    # stdout fica só com o JSON.
+    if args.json:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+    else:
+        yield
+
+def _codigo_existente(produtos, codigo):
+    if codigo not in produtos:
+        raise ErroComando(f"produto {codigo} não encontrado")
+    return produtos[codigo]
+
+def _preco(texto):
+    from utils import para_centavos
+    try:
+        preco = para_centavos(texto)
+    except ValueError as erro:
+        raise ErroComando(str(erro)) from None
+    if preco < 0:
+        raise ErroComando("o preço não pode ser negativo")
+    return preco
+
+# =========================
+# Produtos
+# =========================
+
+def produtos_listar(ctx, args):
+    from interface import contar_paginas, mostrar_produtos, pagina_de_produtos
+    produtos = ctx.obter()[0]
+    if not args.json:
+        mostrar_produtos(produtos, args.pagina, args.ordem)
+        return
+    pagina = min(max(args.pagina, 1), contar_paginas(produtos))
+    _emitir(args, {"pagina": pagina, "paginas": contar_paginas(produtos), "total": len(produtos),
+                   "produtos": [p.to_dict() for p in pagina_de_produtos(produtos, pagina, args.ordem)]})
+
+def produtos_mostrar(ctx, args):
+    from utils import formatar_reais
+    p = _codigo_existente(ctx.obter()[0], args.codigo)
+    _emitir(args, p.to_dict(), f"{p.codigo} | {p.nome} | R$ {formatar_reais(p.preco)} | estoque {p.estoque}")
+
+def produtos_buscar(ctx, args):
+    from busca import obter_indice
+    from interface import mostrar_produtos
+    produtos = ctx.obter()[0]
+    codigos = obter_indice(produtos).buscar(args.texto)
+    if args.json:
+        _emitir(args, [produtos[c].to_dict() for c in codigos])
+    elif codigos:
+        mostrar_produtos({c: produtos[c] for c in codigos})
+    else:
+        print("Nenhum produto encontrado.")
+
+def produtos_cadastrar(ctx, args):
+    from interface import incluir_produto
+    ctx.exigir_admin()
+    produtos = ctx.obter(escrita=True)[0]
+    status, codigo, motivo = incluir_produto(produtos, args.nome, _preco(args.preco), args.estoque)
+    if status != "cadastrado":
+        raise ErroComando(motivo)
+    _emitir(args, produtos[codigo].to_dict(), f"Produto {args.nome} cadastrado com sucesso! (Código: {codigo})")
+
+def produtos_editar(ctx, args):
+    from interface import alterar_produto
+    ctx.exigir_admin()
+    produtos = ctx.obter(escrita=True)[0]
+    produto = _codigo_existente(produtos, args.codigo)
+    nome = produto.nome if args.nome is None else args.nome
+    preco = produto.preco if args.preco is None else _preco(args.preco)
+    if args.estoque is not None and args.estoque < 0:
+        raise ErroComando("o estoque não pode ser negativo")
+    alterar_produto(produto, nome, preco, args.estoque)
+    _emitir(args, produto.to_dict(), "Produto atualizado com sucesso!")
+
+def produtos_remover(ctx, args):
+    from interface import excluir_produto
+    ctx.exigir_admin()
+    produtos = ctx.obter(escrita=True)[0]
+    nome = _codigo_existente(produtos, args.codigo).nome
+    excluir_produto(produtos, args.codigo)
+    _emitir(args, {"codigo": args.codigo}, f"Produto {nome} removido com sucesso!")
+
+# =========================
+# Carrinho
+# =========================
+
+def _carrinho_dict(carrinho):
+    from utils import para_reais
+    return {
+        "cliente": carrinho.cliente,
+        "itens": [{"codigo": c, "nome": item["produto"].nome, "quantidade": item["quantidade"],
+                   "preco": para_reais(item["preco"])} for c, item in carrinho.itens.items()],
+        "total": para_reais(carrinho.total),
+    }
+
+def carrinho_ver(ctx, args):
+    carrinho = ctx.obter()[1].obter(args.cliente)
+    if args.json:
+        _emitir(args, _carrinho_dict(carrinho))
+    else:
+        carrinho.ver()
+
+def carrinho_adicionar(ctx, args):
+    produtos, sessoes, _ = ctx.obter(escrita=True)
+    produto = _codigo_existente(produtos, args.codigo)
+    carrinho = sessoes.obter(args.cliente)
+    with _mensagens(args):
+        if not carrinho.adicionar(produto, args.quantidade):
+            raise ErroComando(f"não foi possível adicionar (estoque disponível: {produto.estoque})")
+    _emitir(args, _carrinho_dict(carrinho))
+
+def carrinho_remover(ctx, args):
+    carrinho = ctx.obter(escrita=True)[1].obter(args.cliente)
+    with _mensagens(args):
+        if not carrinho.remover(args.codigo):
+            raise ErroComando(f"produto {args.codigo} não está no carrinho")
+    _emitir(args, _carrinho_dict(carrinho))
+
+def carrinho_finalizar(ctx, args):
+    carrinho = ctx.obter(escrita=True)[1].obter(args.cliente)
+    if not carrinho.itens:
+        raise ErroComando("carrinho vazio")
+    resumo = _carrinho_dict(carrinho)
+    with _mensagens(args):
+        carrinho.finalizar()
+    _emitir(args, resumo)
+
+# =========================
+# Relatórios
+# =========================
+
+def estoque_baixo(ctx, args):
+    from reposicao import obter_indice
+    produtos = ctx.obter()[0]
+    abaixo = obter_indice(produtos).abaixo_do_minimo(args.limite)
+    linhas = [{"codigo": c, "nome": produtos[c].nome, "estoque": e, "minimo": m} for c, e, m in abaixo]
+    _emitir(args, linhas, "\n".join(f"{l['codigo']:<8} {l['nome'][:30]:<30} {l['estoque']:>8} {l['minimo']:>8}"
+                                     for l in linhas) or "Nenhum produto abaixo do estoque mínimo.")
+
+def vendas_resumo(ctx, args):
+    # Só o livro de vendas: não carrega o catálogo. Sem sessão aberta, o
+    # livro é lido sem ser aberto para escrita.
+    from utils import formatar_reais, para_reais
+    aberto = sys.modules.get("persistencia") and sys.modules["persistencia"].livro_vendas()
+    if aberto:
+        resumo = aberto.resumo
+    else:
+        from vendas import LivroVendas
+        resumo = LivroVendas(somente_leitura=True).resumo
+    dados = {
+        "vendas": resumo.vendas,
+        "receita": para_reais(resumo.receita),
+        "ultimos_dias": [{"dia": d, "receita": para_reais(r)} for d, r in resumo.ultimos_dias(args.dias)],
+        "mais_vendidos": [{"codigo": c, "unidades": u} for c, u in resumo.mais_vendidos(args.top)],
+    }
+    _emitir(args, dados, "\n".join(
+        [f"Vendas: {resumo.vendas}  |  Receita total: R$ {formatar_reais(resumo.receita)}"]
+        + [f"  {d}  R$ {formatar_reais(r):>12}" for d, r in resumo.ultimos_dias(args.dias)]
+        + [f"  {i:>2}. produto {c}: {u} unidades" for i, (c, u) in enumerate(resumo.mais_vendidos(args.top), 1)]
+    ))
+
+# =========================
+# Linha de comando
+# =========================
+
+class _Parser(argparse.ArgumentParser):
+    # No modo `executar`, um comando inválido não pode encerrar o processo.
+    def error(self, message):
+        raise ErroComando(message)
+
+def criar_parser():
+    parser = _Parser(prog="main.py", description="Mercado Projeto: modo de comandos.")
+    grupos = parser.add_subparsers(dest="grupo", required=True, parser_class=_Parser)
+
+    def comando(subparsers, nome, funcao, ajuda):
+        p = subparsers.add_parser(nome, help=ajuda)
+        p.add_argument("--json", action="store_true", help="saída em JSON")
+        p.set_defaults(funcao=funcao)
+        return p
+
+    produtos = grupos.add_parser("produtos", help="consultar e administrar o catálogo")
+    sub = produtos.add_subparsers(dest="acao", required=True, parser_class=_Parser)
+    p = comando(sub, "listar", produtos_listar, "lista uma página do catálogo")
+    p.add_argument("--pagina", type=int, default=1)
+    p.add_argument("--ordem", choices=("n", "p", "e"), help="nome, preço ou estoque")
+    p = comando(sub, "mostrar", produtos_mostrar, "mostra um produto")
+    p.add_argument("codigo", type=int)
+    p = comando(sub, "buscar", produtos_buscar, "busca pelo nome")
+    p.add_argument("texto")
+    p = comando(sub, "cadastrar", produtos_cadastrar, "cadastra um produto (admin)")
+    p.add_argument("nome")
+    p.add_argument("preco")
+    p.add_argument("estoque", type=int)
+    p = comando(sub, "editar", produtos_editar, "altera nome, preço e/ou estoque (admin)")
+    p.add_argument("codigo", type=int)
+    p.add_argument("--nome")
+    p.add_argument("--preco")
+    p.add_argument("--estoque", type=int)
+    p = comando(sub, "remover", produtos_remover, "remove um produto (admin)")
+    p.add_argument("codigo", type=int)
+
+    carrinho = grupos.add_parser("carrinho", help="operações no carrinho de um cliente")
+    sub = carrinho.add_subparsers(dest="acao", required=True, parser_class=_Parser)
+    for nome, funcao, ajuda in (("ver", carrinho_ver, "mostra o carrinho"),
+                                ("adicionar", carrinho_adicionar, "adiciona um produto"),
+                                ("remover", carrinho_remover, "remove um produto"),
+                                ("finalizar", carrinho_finalizar, "finaliza a compra")):
+        p = comando(sub, nome, funcao, ajuda)
+        if nome in ("adicionar", "remover"):
+            p.add_argument("codigo", type=int)
+        if nome == "adicionar":
+            p.add_argument("quantidade", type=int)
+        p.add_argument("--cliente", default="local")
+
+    estoque = grupos.add_parser("estoque", help="relatórios de estoque")
+    sub = estoque.add_subparsers(dest="acao", required=True, parser_class=_Parser)
+    p = comando(sub, "baixo", estoque_baixo, "produtos abaixo do estoque mínimo")
+    p.add_argument("--limite", type=int, default=50)
+
+    vendas = grupos.add_parser("vendas", help="relatórios de vendas")
+    sub = vendas.add_subparsers(dest="acao", required=True, parser_class=_Parser)
+    p = comando(sub, "resumo", vendas_resumo, "receita por dia e mais vendidos")
+    p.add_argument("--dias", type=int, default=7)
+    p.add_argument("--top", type=int, default=10)
+
+    p = grupos.add_parser("executar", help="executa um arquivo de comandos, um por linha")
+    p.add_argument("arquivo", help='arquivo de comandos ("-" para a entrada padrão)')
+    p.add_argument("--parar", action="store_true", help="para no primeiro comando que falhar")
+    return parser
+
+def _executar_um(parser, ctx, argv):
+    args = parser.parse_args(argv)
+    if args.grupo == "executar":
+        raise ErroComando("`executar` não pode ser usado dentro de um arquivo de comandos")
+    args.funcao(ctx, args)
+
+def executar_arquivo(parser, ctx, caminho: str, parar: bool = False) -> int:
+    """Executa cada linha como um comando. Retorna o número de falhas."""
+    arquivo = sys.stdin if caminho == "-" else open(caminho, "r", encoding="utf-8")
+    executados = falhas = 0
+    try:
+        for numero, linha in enumerate(arquivo, start=1):
+            argv = shlex.split(linha, comments=True)
+            if not argv:
+                continue
+            executados += 1
+            try:
+                _executar_um(parser, ctx, argv)
+            except SystemExit:
+                pass  # --help dentro do arquivo: a ajuda já foi impressa
+            except ErroComando as erro:
+                falhas += 1
+                print(f"linha {numero}: {erro}", file=sys.stderr)
+                if parar:
+                    break
+    finally:
+        if arquivo is not sys.stdin:
+            arquivo.close()
+    print(f"{executados} comandos, {falhas} falharam", file=sys.stderr)
+    return falhas
+
+def executar_cli(argv) -> int:
+    parser = criar_parser()
+    ctx = Contexto()
+    try:
+        args = parser.parse_args(argv)
+        if args.grupo == "executar":
+            return 1 if executar_arquivo(parser, ctx, args.arquivo, args.parar) else 0
+        args.funcao(ctx, args)
+        return 0
+    except ErroComando as erro:
+        print(f"erro: {erro}", file=sys.stderr)
+        return 1
+    finally:
+        ctx.fechar()
@@ -0,0 +1,110 @@
+# credenciais.py
+#
+# Cadastro de administradores indexado pelo CPF normalizado (só dígitos),
+# com senhas guardadas como hash com sal (scrypt, ou PBKDF2 quando o
+# OpenSSL não oferece scrypt). O custo do hash é configurável e fica
+# gravado junto com cada hash, então mudar o custo não invalida as senhas
+# antigas. Logins recentes ficam em cache por SESSAO_TTL segundos para
+# que ações repetidas não paguem o custo do KDF toda vez.
+
+import hashlib
+import hmac
+import os
+import time
+from utils import normalizar_cpf
+
+ALGORITMO = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2_sha256"
+CUSTO_SCRYPT = 2 ** 14          # parâmetro N do scrypt
+ITERACOES_PBKDF2 = 600_000
+SESSAO_TTL = 15 * 60            # segundos que um login verificado fica em cache
+
+def gerar_hash(senha: str) -> str:
+    sal = os.urandom(16)
+    if ALGORITMO == "scrypt":
+        n, r, p = CUSTO_SCRYPT, 8, 1
+        chave = hashlib.scrypt(senha.encode(), salt=sal, n=n, r=r, p=p, maxmem=256 * n * r)
+        return f"scrypt${n}${r}${p}${sal.hex()}${chave.hex()}"
+    chave = hashlib.pbkdf2_hmac("sha256", senha.encode(), sal, ITERACOES_PBKDF2)
+    return f"pbkdf2_sha256${ITERACOES_PBKDF2}${sal.hex()}${chave.hex()}"
+
+def conferir_hash(senha: str, senha_hash: str) -> bool:
+    partes = senha_hash.split("$")
+    if partes[0] == "scrypt":
+        n, r, p = (int(x) for x in partes[1:4])
+        sal, esperado = bytes.fromhex(partes[4]), bytes.fromhex(partes[5])
+        chave = hashlib.scrypt(senha.encode(), salt=sal, n=n, r=r, p=p, maxmem=256 * n * r)
+    elif partes[0] == "pbkdf2_sha256":
+        iteracoes = int(partes[1])
+        sal, esperado = bytes.fromhex(partes[2]), bytes.fromhex(partes[3])
+        chave = hashlib.pbkdf2_hmac("sha256", senha.encode(), sal, iteracoes)
+    else:
+        return False
+    return hmac.compare_digest(chave, esperado)
+
+
+class RegistroAdmins:
+    def __init__(self):
+        self._hashes = {}     # cpf normalizado -> hash da senha
+        self._sessoes = {}    # cpf -> (marca da senha verificada, expira_em)
+        self.migrados = 0     # senhas em texto puro convertidas na carga
+
+    @classmethod
+    def from_list(cls, dados):
+        """Aceita o formato novo ({cpf, senha_hash}) e o antigo ({cpf, senha})."""
+        registro = cls()
+        for adm in dados:
+            if "senha_hash" in adm:
+                registro.incluir(adm["cpf"], adm["senha_hash"])
+            else:
+                registro.cadastrar(adm["cpf"], adm["senha"])
+                registro.migrados += 1
+        return registro
+
+    def to_list(self):
+        return [{"cpf": cpf, "senha_hash": senha_hash} for cpf, senha_hash in self._hashes.items()]
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __iter__(self):
+        return iter(list(self._hashes))
+
+    def __contains__(self, cpf):
+        return normalizar_cpf(cpf) in self._hashes
+
+    def hash_de(self, cpf: str) -> str:
+        return self._hashes[normalizar_cpf(cpf)]
+
+    def incluir(self, cpf: str, senha_hash: str):
+        cpf = normalizar_cpf(cpf)
+        self._hashes[cpf] = senha_hash
+        self._sessoes.pop(cpf, None)
+
+    def cadastrar(self, cpf: str, senha: str) -> str:
+        """Cadastra (ou troca a senha de) um admin. Retorna o hash gerado."""
+        senha_hash = gerar_hash(senha)
+        self.incluir(cpf, senha_hash)
+        return senha_hash
+
+    def remover(self, cpf: str) -> bool:
+        cpf = normalizar_cpf(cpf)
+        self._sessoes.pop(cpf, None)
+        return self._hashes.pop(cpf, None) is not None
+
+    def _marca(self, senha_hash: str, senha: str) -> bytes:
+        # Identifica a dupla (hash cadastrado, senha digitada) sem guardar a senha.
+        return hashlib.sha256(senha_hash.encode() + b"\0" + senha.encode()).digest()
+
+    def verificar(self, cpf: str, senha: str) -> bool:
+        cpf = normalizar_cpf(cpf)
+        senha_hash = self._hashes.get(cpf)
+        if senha_hash is None:
+            return False
+        marca = self._marca(senha_hash, senha)
+        sessao = self._sessoes.get(cpf)
+        if sessao is not None and sessao[1] > time.monotonic() and hmac.compare_digest(sessao[0], marca):
+            return True
+        if not conferir_hash(senha, senha_hash):
+            return False
+        self._sessoes[cpf] = (marca, time.monotonic() + SESSAO_TTL)
+        return True
@@ -0,0 +1,151 @@
+# diario.py
+#
+# Diário (write-ahead log) das alterações feitas durante a sessão.
+# Cada evento vira uma linha JSON no fim do arquivo, com um número de
+# sequência crescente. O snapshot (mercado.json) guarda o último `seq`
+# que já contém, então reaplicar o diário sobre ele é idempotente.
+#
+# Edições de estoque trazem, além do estoque absoluto (que os outros
+# ouvintes usam), o `ajuste` aplicado. Os eventos são publicados depois
+# de soltar a trava do produto, então uma edição e uma reserva de
+# carrinho podem chegar ao diário fora da ordem em que aconteceram; como
+# as duas são gravadas como variações, a soma sai a mesma em qualquer
+# ordem.
+
+import json
+import os
+import threading
+from models import Produto, CLIENTE_LOCAL
+from utils import para_centavos
+
+class Diario:
+    def __init__(self, caminho: str, seq: int = 0, fsync: bool = False):
+        self.caminho = caminho
+        self.seq = seq
+        self.fsync = fsync
+        self.registros = _contar_linhas(caminho)  # já gravados em sessões anteriores
+        self.pendentes = 0  # escritos mas ainda sem fsync
+        self.trava = threading.RLock()
+        self._arquivo = open(caminho, "a", encoding="utf-8")
+
+    def registrar(self, tipo: str, dados: dict):
+        with self.trava:
+            self.seq += 1
+            registro = {"seq": self.seq, "tipo": tipo, **dados}
+            self._arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            self._arquivo.flush()
+            if self.fsync:
+                os.fsync(self._arquivo.fileno())
+            else:
+                self.pendentes += 1
+            self.registros += 1
+
+    def sincronizar(self):
+        """fsync do que já foi escrito, sem segurar a trava durante a espera do disco."""
+        with self.trava:
+            if not self.pendentes or self._arquivo.closed:
+                return
+            self.pendentes = 0
+            descritor = os.dup(self._arquivo.fileno())
+        try:
+            os.fsync(descritor)
+        finally:
+            os.close(descritor)
+
+    def rotacionar(self, destino: str):
+        """Fecha o segmento atual, renomeia para `destino` e abre um novo."""
+        with self.trava:
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+            self._arquivo.close()
+            os.replace(self.caminho, destino)
+            self._arquivo = open(self.caminho, "a", encoding="utf-8")
+            self.registros = 0
+            self.pendentes = 0
+
+    def fechar(self):
+        if not self._arquivo.closed:
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+            self._arquivo.close()
+
+
+def _contar_linhas(caminho: str) -> int:
+    if not os.path.exists(caminho):
+        return 0
+    with open(caminho, "rb") as f:
+        return sum(1 for _ in f)
+
+
+def ler_registros(caminho: str):
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            try:
+                yield json.loads(linha)
+            except ValueError:
+                # Última linha incompleta (queda no meio da escrita): descarta.
+                return
+
+
+def aplicar(registro: dict, produtos, sessoes, admins):
+    tipo = registro["tipo"]
+    if tipo in ("produto_cadastrado", "produto_editado"):
+        _aplicar_produto(registro, produtos, sessoes)
+    elif tipo in ("produtos_atualizados", "produtos_cadastrados"):
+        # Um lote da carga do fornecedor ou do cadastro em massa: uma linha
+        # só no diário, então ou o lote inteiro está aqui ou (linha
+        # cortada) nada dele está.
+        for dados in registro["produtos"]:
+            _aplicar_produto(dados, produtos, sessoes)
+    elif tipo == "produto_removido":
+        produtos.pop(registro["codigo"], None)
+    elif tipo.startswith("carrinho_") or tipo == "compra_finalizada":
+        _aplicar_carrinho(tipo, registro, produtos, sessoes)
+    elif tipo == "admin_cadastrado":
+        if "senha_hash" in registro:
+            admins.incluir(registro["cpf"], registro["senha_hash"])
+        else:
+            # Registro antigo, com a senha em texto puro.
+            admins.cadastrar(registro["cpf"], registro["senha"])
+            admins.migrados += 1
+    elif tipo == "admin_removido":
+        admins.remover(registro["cpf"])
+
+
+def _aplicar_produto(dados, produtos, sessoes):
+    codigo = dados["codigo"]
+    if codigo in produtos:
+        produto = produtos[codigo]
+        produto.nome = dados["nome"]
+        produto.preco = para_centavos(dados["preco"])
+        if "ajuste" in dados:
+            produto.estoque += dados["ajuste"]
+        else:
+            produto.estoque = dados["estoque"]
+        sessoes.reprecificar(codigo)
+    else:
+        produtos[codigo] = Produto.from_dict(dados)
+
+
+def _aplicar_carrinho(tipo, registro, produtos, sessoes):
+    # Registros antigos (de antes das sessões) não têm cliente nem instante.
+    cliente = registro.get("cliente", CLIENTE_LOCAL)
+    if tipo == "carrinho_expirado":
+        carrinho = sessoes.retirar(cliente)
+        if carrinho is not None:
+            carrinho.esvaziar()
+        return
+    carrinho = sessoes.obter(cliente, registro.get("instante"))
+    if tipo == "carrinho_adicionado":
+        produto = produtos.get(registro["codigo"])
+        if produto is not None:
+            produto.estoque -= registro["quantidade"]
+            carrinho.incluir(produto, registro["quantidade"])
+    elif tipo == "carrinho_removido":
+        item = carrinho.retirar(registro["codigo"])
+        if item is not None:
+            item["produto"].estoque += item["quantidade"]
+    elif tipo == "compra_finalizada":
+        carrinho.limpar()
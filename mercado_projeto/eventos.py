@@ -0,0 +1,19 @@
+# eventos.py
+#
+# Toda alteração de produto, carrinho ou admin é publicada aqui.
+# Quem precisa reagir a essas mudanças (o diário de persistência, por
+# exemplo) se inscreve com `assinar` e recebe (tipo, dados).
+
+_ouvintes = []
+
+def assinar(ouvinte):
+    if ouvinte not in _ouvintes:
+        _ouvintes.append(ouvinte)
+
+def cancelar(ouvinte):
+    if ouvinte in _ouvintes:
+        _ouvintes.remove(ouvinte)
+
+def publicar(tipo: str, **dados):
+    for ouvinte in _ouvintes:
+        ouvinte(tipo, dados)
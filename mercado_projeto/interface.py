@@ -1,60 +1,218 @@
-from utils import input_int, input_float, validar_cpf
-from models import Produto, Carrinho
+import heapq
+import sys
+from itertools import islice
+from utils import input_int, input_preco, para_centavos, formatar_reais, validar_cpf, normalizar_cpf
+from models import CLIENTE_LOCAL
+from eventos import publicar
+from reserva import trava_do_produto
 
 # =========================
 # Interface de Produtos
 # =========================
 
-def mostrar_produtos(produtos):
+TAMANHO_PAGINA = 20
+
+ORDENACOES = {
+    "n": lambda p: p.nome.casefold(),
+    "p": lambda p: p.preco,
+    "e": lambda p: p.estoque,
+}
+
+def contar_paginas(produtos):
+    """Número de páginas de TAMANHO_PAGINA produtos (no mínimo 1)."""
+    return max(1, -(-len(produtos) // TAMANHO_PAGINA))
+
+def pagina_de_produtos(produtos, pagina, ordem):
+    """Produtos da página `pagina` (a partir de 1), por código ou pela chave `ordem` de ORDENACOES."""
+    # Só os produtos da página são formatados: sem ordenação, os códigos
+    # anteriores são pulados; com ordenação, basta um heap com os
+    # `inicio + TAMANHO_PAGINA` primeiros.
+    inicio = (pagina - 1) * TAMANHO_PAGINA
+    if ordem is None:
+        return [produtos[codigo] for codigo in islice(iter(produtos), inicio, inicio + TAMANHO_PAGINA)]
+    primeiros = heapq.nsmallest(inicio + TAMANHO_PAGINA, produtos.values(), key=ORDENACOES[ordem])
+    return primeiros[inicio:]
+
+def mostrar_produtos(produtos, pagina=1, ordem=None):
     if not produtos:
         print("\nNenhum produto cadastrado.")
         return
-    print("\n=== Produtos Disponíveis ===")
-    print(f"{'Código':<6} | {'Produto':<20} | {'Preço':<10} | {'Estoque':<6}")
-    print("-" * 50)
-    for p in produtos.values():
-        print(f"{p.codigo:<6} | {p.nome:<20} | R$ {p.preco:<9.2f} | {p.estoque:<6}")
-    print("-" * 50)
+    total_paginas = contar_paginas(produtos)
+    pagina = min(max(pagina, 1), total_paginas)
+    linhas = [
+        "\n=== Produtos Disponíveis ===",
+        f"{'Código':<6} | {'Produto':<20} | {'Preço':<10} | {'Estoque':<6}",
+        "-" * 50,
+    ]
+    for p in pagina_de_produtos(produtos, pagina, ordem):
+        linhas.append(f"{p.codigo:<6} | {p.nome:<20} | R$ {formatar_reais(p.preco):<9} | {p.estoque:<6}")
+    linhas.append("-" * 50)
+    if total_paginas > 1:
+        linhas.append(f"Página {pagina} de {total_paginas}")
+    sys.stdout.write("\n".join(linhas) + "\n")
+
+def _particoes():
+    # Com main.py --particoes, o estoque está nas partições (particoes.py).
+    # Se o módulo nem foi importado, não há serviço ligado.
+    particoes = sys.modules.get("particoes")
+    return particoes.servico_ativo() if particoes is not None else None
+
+def _estoque_em_dia():
+    servico = _particoes()
+    if servico is not None:
+        servico.sincronizar()
+
+def _retrato(produtos):
+    # Quem só mostra lê uma versão fixa do catálogo (versoes.py): uma edição
+    # no meio da listagem não aparece pela metade.
+    from versoes import obter_catalogo
+    return obter_catalogo(produtos).atual()
+
+def navegar_produtos(produtos):
+    _estoque_em_dia()
+    pagina, ordem = 1, None
+    while True:
+        versao = _retrato(produtos)
+        mostrar_produtos(versao, pagina, ordem)
+        total_paginas = contar_paginas(versao)
+        if total_paginas == 1:
+            return
+        comando = input("[p] próxima  [a] anterior  [nº] ir para a página  "
+                        "[on/op/oe] ordenar por nome/preço/estoque  [Enter] continuar: ").strip().lower()
+        if not comando:
+            return
+        if comando == "p":
+            pagina = min(pagina + 1, total_paginas)
+        elif comando == "a":
+            pagina = max(pagina - 1, 1)
+        elif comando.isdigit():
+            pagina = min(max(int(comando), 1), total_paginas)
+        elif comando[:1] == "o" and comando[1:] in ORDENACOES:
+            ordem, pagina = comando[1:], 1
+        else:
+            print("Comando inválido.")
+
+def buscar_produto(produtos):
+    from busca import obter_indice
+    consulta = input("Digite o nome (ou parte do nome) do produto: ")
+    codigos = obter_indice(produtos).buscar(consulta)
+    if not codigos:
+        print("Nenhum produto encontrado.")
+        return
+    mostrar_produtos({codigo: produtos[codigo] for codigo in codigos})
+
+def incluir_produto(produtos, nome: str, preco: int, estoque: int):
+    """Cadastra sem perguntar nada (usado pelo menu e pelos comandos).
+
+    Passa pelo mesmo caminho do cadastro em massa (cadastro.py): código da
+    sequência e recusa de nomes repetidos. Retorna (status, codigo, motivo).
+    """
+    from cadastro import obter_cadastro
+    return obter_cadastro(produtos).cadastrar(nome, formatar_reais(preco), estoque)
+
+def alterar_produto(produto, nome: str, preco: int, estoque: int = None, ajuste: int = 0):
+    """Edita o produto. O estoque fica `estoque` (ou o atual, se None) mais
+    `ajuste`, nunca negativo, calculado sob a trava do produto. O evento
+    leva a variação aplicada (`ajuste`), que é o que o diário refaz."""
+    # O nome muda fora da trava: no snapshot binário, trocar um nome copia
+    # as colunas mapeadas para a memória, e isso toma todas as travas de
+    # reserva (a deste produto não é reentrante).
+    produto.nome = nome
+    with trava_do_produto(produto.codigo):
+        produto.preco = preco
+        anterior = produto.estoque
+        produto.estoque = max((anterior if estoque is None else estoque) + ajuste, 0)
+        dados = produto.to_dict()
+        dados["ajuste"] = produto.estoque - anterior
+    publicar("produto_editado", **dados)
+
+def excluir_produto(produtos, codigo: int):
+    del produtos[codigo]
+    publicar("produto_removido", codigo=codigo)
 
 def cadastrar_produto(produtos):
-    codigo = max(produtos.keys()) + 1 if produtos else 1
     nome = input("Digite o nome do produto: ")
-    preco = input_float("Digite o preço do produto: ")
+    preco = input_preco("Digite o preço do produto: ")
     estoque = input_int("Digite a quantidade em estoque: ")
-    produtos[codigo] = Produto(codigo, nome, preco, estoque)
-    print(f"Produto {nome} cadastrado com sucesso! (Código: {codigo})")
+    status, codigo, motivo = incluir_produto(produtos, nome, preco, estoque)
+    if status == "cadastrado":
+        print(f"Produto {nome} cadastrado com sucesso! (Código: {codigo})")
+    else:
+        print(f"Produto não cadastrado: {motivo}.")
 
 def editar_produto(produtos):
-    mostrar_produtos(produtos)
+    navegar_produtos(produtos)
     codigo = input_int("Digite o código do produto que deseja editar: ")
     if codigo in produtos:
         produto = produtos[codigo]
+        exibido = produto.estoque
         nome = input(f"Novo nome ({produto.nome}): ") or produto.nome
-        preco = input(f"Novo preço ({produto.preco}): ") or produto.preco
-        estoque = input(f"Novo estoque ({produto.estoque}): ") or produto.estoque
+        preco = input(f"Novo preço ({formatar_reais(produto.preco)}): ") or None
+        estoque = input(f"Novo estoque ({exibido}): ") or exibido
         try:
-            preco = float(preco)
+            preco = produto.preco if preco is None else para_centavos(preco)
             estoque = int(estoque)
         except ValueError:
             print("Valores inválidos.")
             return
-        produto.nome = nome
-        produto.preco = preco
-        produto.estoque = estoque
+        # O estoque digitado vale sobre o que foi mostrado: o que os
+        # carrinhos reservaram enquanto o admin digitava continua descontado.
+        servico = _particoes()
+        if servico is not None:
+            # Catálogo particionado: a partição é a dona do estoque.
+            estoque = servico.roteador().ajustar(codigo, estoque - exibido)
+            alterar_produto(produto, nome, preco, estoque)
+        else:
+            alterar_produto(produto, nome, preco, ajuste=estoque - exibido)
         print("Produto atualizado com sucesso!")
     else:
         print("Código inválido.")
 
 def remover_produto(produtos):
-    mostrar_produtos(produtos)
+    navegar_produtos(produtos)
     codigo = input_int("Digite o código do produto que deseja remover: ")
     if codigo in produtos:
         nome = produtos[codigo].nome
-        del produtos[codigo]
+        excluir_produto(produtos, codigo)
         print(f"Produto {nome} removido com sucesso!")
     else:
         print("Código inválido.")
 
+LIMITE_REPOSICAO = 50
+
+def produtos_abaixo_do_minimo(produtos):
+    # O índice entrega os mais críticos primeiro, sem varrer o catálogo.
+    from reposicao import obter_indice
+    _estoque_em_dia()
+    indice = obter_indice(produtos)
+    abaixo = indice.abaixo_do_minimo(LIMITE_REPOSICAO)
+    if not abaixo:
+        print("Nenhum produto abaixo do estoque mínimo.")
+    else:
+        print(f"\n{'Código':<8} {'Produto':<30} {'Estoque':>8} {'Mínimo':>8}")
+        for codigo, estoque, minimo in abaixo:
+            print(f"{codigo:<8} {produtos[codigo].nome[:30]:<30} {estoque:>8} {minimo:>8}")
+        if len(abaixo) == LIMITE_REPOSICAO:
+            print(f"(mostrando os {LIMITE_REPOSICAO} mais críticos)")
+    resposta = input("\nCódigo para alterar o estoque mínimo (Enter para voltar): ").strip()
+    if not resposta:
+        return
+    try:
+        codigo = int(resposta)
+    except ValueError:
+        print("Código inválido.")
+        return
+    if codigo not in produtos:
+        print("Código inválido.")
+        return
+    minimo = input_int(f"Novo estoque mínimo ({indice.minimo(codigo)}): ")
+    if minimo < 0:
+        print("O mínimo não pode ser negativo.")
+        return
+    indice.definir_minimo(codigo, minimo)
+    indice.salvar_minimos()
+    print("Estoque mínimo atualizado!")
+
 # =========================
 # Interface de Admin
 # =========================
@@ -64,8 +222,8 @@ def listar_admins(admins):
         print("\nNenhum administrador cadastrado.")
         return
     print("\n=== Administradores Cadastrados ===")
-    for i, adm in enumerate(admins, 1):
-        print(f"{i}. CPF: {adm['cpf']}")
+    for i, cpf in enumerate(admins, 1):
+        print(f"{i}. CPF: {cpf}")
     print("-" * 40)
 
 def cadastrar_admin(admins):
@@ -73,12 +231,12 @@ def cadastrar_admin(admins):
     if not validar_cpf(cpf):
         print("CPF inválido!")
         return
-    for adm in admins:
-        if adm["cpf"] == cpf:
-            print("Admin já cadastrado!")
-            return
+    if cpf in admins:
+        print("Admin já cadastrado!")
+        return
     senha = input("Digite a senha do novo Admin: ")
-    admins.append({"cpf": cpf, "senha": senha})
+    senha_hash = admins.cadastrar(cpf, senha)
+    publicar("admin_cadastrado", cpf=normalizar_cpf(cpf), senha_hash=senha_hash)
     print("Admin cadastrado com sucesso!")
 
 def remover_admin(admins):
@@ -87,11 +245,10 @@ def remover_admin(admins):
         return
     listar_admins(admins)
     cpf = input("Digite o CPF do Admin que deseja remover: ")
-    for adm in admins:
-        if adm["cpf"] == cpf:
-            admins.remove(adm)
-            print("Admin removido com sucesso!")
-            return
+    if admins.remover(cpf):
+        publicar("admin_removido", cpf=normalizar_cpf(cpf))
+        print("Admin removido com sucesso!")
+        return
     print("Admin não encontrado!")
 
 def login_admin(admins):
@@ -100,12 +257,39 @@ def login_admin(admins):
         print("CPF inválido! Deve conter 11 números.")
         return False
     senha = input("Digite a senha do Admin: ")
-    for adm in admins:
-        if adm["cpf"] == cpf and adm["senha"] == senha:
-            return True
+    if admins.verificar(cpf, senha):
+        return True
     print("CPF ou senha incorretos!")
     return False
 
+def relatorio_vendas(produtos, dias=7, top=10):
+    # Só lê os resumos mantidos pelo livro: não percorre o histórico.
+    from persistencia import livro_vendas
+    livro = livro_vendas()
+    if livro is None or livro.resumo.vendas == 0:
+        print("Nenhuma venda registrada.")
+        return
+    resumo = livro.resumo
+    produtos = _retrato(produtos)
+    print(f"\nVendas: {resumo.vendas}  |  Receita total: R$ {formatar_reais(resumo.receita)}")
+    print(f"\nReceita dos últimos {dias} dias com vendas:")
+    for dia, receita in resumo.ultimos_dias(dias):
+        print(f"  {dia}  R$ {formatar_reais(receita):>12}")
+    print("\nMais vendidos:")
+    for posicao, (codigo, unidades) in enumerate(resumo.mais_vendidos(top), start=1):
+        nome = produtos[codigo].nome if codigo in produtos else "(removido)"
+        print(f"  {posicao:>2}. [{codigo}] {nome} - {unidades} unidades")
+
+def exportar_catalogo(produtos):
+    # A exportação lê uma versão fixa do catálogo (versoes.py), então roda
+    # em segundo plano enquanto o admin continua editando.
+    import threading
+    from versoes import exportar_csv
+    caminho = input("Arquivo de saída (CSV) [catalogo.csv]: ").strip() or "catalogo.csv"
+    versao = _retrato(produtos)
+    threading.Thread(target=exportar_csv, args=(versao, caminho), name="exportacao", daemon=True).start()
+    print(f"Exportando {len(versao)} produtos (versão {versao.numero}) para {caminho} em segundo plano.")
+
 def menu_admin(produtos, admins):
     while True:
         print("\n" + "=" * 40)
@@ -118,6 +302,7 @@ def menu_admin(produtos, admins):
         print("5️⃣  - Listar administradores")
         print("6️⃣  - Cadastrar administrador")
         print("7️⃣  - Remover administrador")
+        print("9️⃣  - Relatórios e exportação")
         print("8️⃣  - Sair do modo Admin")
         print("=" * 40)
 
@@ -130,25 +315,53 @@ def menu_admin(produtos, admins):
         elif opcao == "3":
             remover_produto(produtos)
         elif opcao == "4":
-            mostrar_produtos(produtos)
+            navegar_produtos(produtos)
         elif opcao == "5":
             listar_admins(admins)
         elif opcao == "6":
             cadastrar_admin(admins)
         elif opcao == "7":
             remover_admin(admins)
+        elif opcao == "9":
+            menu_relatorios(produtos)
         elif opcao == "8":
             print("Saindo do modo Admin...")
             break
         else:
             print("Opção inválida.")
 
+def menu_relatorios(produtos):
+    while True:
+        print("\n" + "=" * 40)
+        print("        📊 RELATÓRIOS E EXPORTAÇÃO      ")
+        print("=" * 40)
+        print("1️⃣  - Relatório de vendas")
+        print("2️⃣  - Produtos abaixo do mínimo")
+        print("3️⃣  - Exportar catálogo (CSV)")
+        print("4️⃣  - Voltar")
+        print("=" * 40)
+
+        opcao = input("Escolha uma opção: ")
+
+        if opcao == "1":
+            relatorio_vendas(produtos)
+        elif opcao == "2":
+            produtos_abaixo_do_minimo(produtos)
+        elif opcao == "3":
+            exportar_catalogo(produtos)
+        elif opcao == "4":
+            break
+        else:
+            print("Opção inválida.")
+
 # =========================
 # Menu Principal (ponto de entrada do sistema)
 # =========================
 
-def menu_principal(produtos, carrinho, admins):
+def menu_principal(produtos, sessoes, admins):
     while True:
+        # Busca o carrinho a cada volta: se ele expirou, o cliente recebe um novo.
+        carrinho = sessoes.obter(CLIENTE_LOCAL)
         print("\n" + "=" * 40)
         print("           🛒 MENU PRINCIPAL           ")
         print("=" * 40)
@@ -158,34 +371,38 @@ def menu_principal(produtos, carrinho, admins):
         print("4️⃣  - Remover item do carrinho")
         print("5️⃣  - Finalizar compra")
         print("6️⃣  - Acessar modo Admin")
+        print("8️⃣  - Buscar produto")
         print("7️⃣  - Sair")
         print("=" * 40)
 
         opcao = input("Escolha uma opção: ")
 
         if opcao == "1":
-            mostrar_produtos(produtos)
+            navegar_produtos(produtos)
         elif opcao == "2":
-            mostrar_produtos(produtos)
+            navegar_produtos(produtos)
             codigo = input_int("Digite o código do produto: ")
             quantidade = input_int("Digite a quantidade desejada: ")
             if codigo in produtos:
-                carrinho.adicionar(produtos[codigo], quantidade)
+                # De novo depois dos inputs: o carrinho pode ter expirado enquanto isso.
+                sessoes.obter(CLIENTE_LOCAL).adicionar(produtos[codigo], quantidade)
             else:
                 print("Código inválido.")
         elif opcao == "3":
-            carrinho.ver()
+            carrinho.ver(_retrato(produtos))
         elif opcao == "4":
-            carrinho.ver()
+            carrinho.ver(_retrato(produtos))
             codigo = input_int("Digite o código do produto para remover: ")
             carrinho.remover(codigo)
         elif opcao == "5":
-            carrinho.finalizar()
+            carrinho.finalizar(_retrato(produtos))
         elif opcao == "6":
             if login_admin(admins):
                 menu_admin(produtos, admins)
         elif opcao == "7":
             print("Saindo do sistema. Até logo!")
             break
+        elif opcao == "8":
+            buscar_produto(produtos)
         else:
             print("Opção inválida, tente novamente.")
@@ -0,0 +1,144 @@
+# lote.py
+#
+# Processamento em lote de pedidos (alternativa ao menu interativo).
+# Lê um arquivo CSV (colunas pedido,codigo,quantidade) ou JSONL (um objeto
+# com essas chaves por linha), valida os pedidos contra o catálogo e
+# baixa o estoque uma vez por produto, não uma vez por pedido.
+#
+# Um pedido pode ter várias linhas (mesmo valor na coluna `pedido`) e é
+# atendido inteiro ou recusado inteiro, na ordem em que aparece no
+# arquivo, enquanto houver estoque. O resultado é um por pedido.
+#
+# Uma linha ilegível (JSON inválido, sem a coluna `pedido`) é recusada
+# sozinha, com o número da linha no motivo e pedido None; um código ou
+# quantidade inválidos recusam só o pedido da linha. O resto do lote
+# segue, como na carga do fornecedor.
+#
+# Uso: python lote.py pedidos.csv [--saida resultados.jsonl]
+
+import argparse
+import json
+import sys
+import time
+
+ACEITO = "aceito"
+RECUSADO = "recusado"
+
+def ler_pedidos(caminho: str):
+    """Gera (pedido, codigo, quantidade) linha a linha, sem carregar o arquivo todo.
+
+    Uma linha sem pedido legível sai como o pedido `(None, numero_da_linha)`.
+    """
+    from carga_fornecedor import ler_feed
+
+    for numero, dados in ler_feed(caminho):
+        pedido = dados.get("pedido") if isinstance(dados, dict) else None
+        if not isinstance(pedido, (str, int)) or pedido == "":
+            yield (None, numero), None, None
+        else:
+            yield pedido, dados.get("codigo"), dados.get("quantidade")
+
+def _agrupar(pedidos, produtos):
+    """Junta as linhas de cada pedido: pedido -> {codigo: quantidade}, ou o motivo da recusa."""
+    grupos = {}
+    for pedido, codigo, quantidade in pedidos:
+        if isinstance(pedido, tuple):
+            grupos[pedido] = f"linha {pedido[1]} mal formada"
+            continue
+        itens = grupos.setdefault(pedido, {})
+        if isinstance(itens, str):
+            continue  # o pedido já foi recusado por outra linha
+        try:
+            codigo, quantidade = int(codigo), int(quantidade)
+        except (TypeError, ValueError, OverflowError):
+            grupos[pedido] = "código ou quantidade inválidos"
+            continue
+        if quantidade <= 0:
+            grupos[pedido] = "quantidade deve ser maior que 0"
+        elif codigo not in produtos:
+            grupos[pedido] = f"produto {codigo} inexistente"
+        else:
+            itens[codigo] = itens.get(codigo, 0) + quantidade
+    return grupos
+
+def _atender(grupos, estoques):
+    """Aceita cada pedido que cabe inteiro no que resta de `estoques` (codigo -> estoque).
+
+    Retorna {pedido: motivo da recusa ou ""} e o total aceito por produto.
+    """
+    restante = dict(estoques)
+    motivos = {}
+    totais = {}
+    for pedido, itens in grupos.items():
+        if isinstance(itens, str):
+            motivos[pedido] = itens
+            continue
+        faltando = [codigo for codigo, quantidade in itens.items() if quantidade > restante[codigo]]
+        if faltando:
+            motivos[pedido] = f"estoque insuficiente do produto {faltando[0]}"
+            continue
+        for codigo, quantidade in itens.items():
+            restante[codigo] -= quantidade
+            totais[codigo] = totais.get(codigo, 0) + quantidade
+        motivos[pedido] = ""
+    return motivos, totais
+
+def processar_lote(pedidos, produtos):
+    """Valida e aplica um lote de pedidos. Retorna (pedido, status, motivo) na ordem de entrada."""
+    from eventos import publicar
+    from reserva import todas_as_travas
+
+    grupos = _agrupar(pedidos, produtos)
+    codigos = {codigo for itens in grupos.values() if not isinstance(itens, str) for codigo in itens}
+    motivos, totais = _atender(grupos, {codigo: produtos[codigo].estoque for codigo in codigos})
+
+    # Uma baixa de estoque por produto, com as reservas dos carrinhos
+    # bloqueadas. Se um carrinho levou estoque enquanto o lote era
+    # calculado, o cálculo é refeito sobre o estoque de agora.
+    with todas_as_travas():
+        atuais = {codigo: produtos[codigo].estoque for codigo in codigos if codigo in produtos}
+        if any(atuais.get(codigo, 0) < total for codigo, total in totais.items()):
+            for pedido, itens in grupos.items():
+                if not isinstance(itens, str) and not all(codigo in atuais for codigo in itens):
+                    grupos[pedido] = "produto removido durante o lote"
+            motivos, totais = _atender(grupos, atuais)
+        for codigo, total in totais.items():
+            produtos[codigo].estoque -= total
+    for codigo, total in totais.items():
+        if total:
+            publicar("produto_editado", **produtos[codigo].to_dict(), ajuste=-total)
+    return [(None if isinstance(pedido, tuple) else pedido, ACEITO if not motivo else RECUSADO, motivo)
+            for pedido, motivo in motivos.items()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processa um arquivo de pedidos em lote.")
+    parser.add_argument("arquivo", help="pedidos em CSV (pedido,codigo,quantidade) ou JSONL")
+    parser.add_argument("--saida", help="grava o resultado de cada pedido neste arquivo JSONL")
+    args = parser.parse_args(argv)
+
+    from persistencia import carregar_dados, fechar_dados
+    produtos, sessoes, admins = carregar_dados()
+    try:
+        inicio = time.perf_counter()
+        resultados = processar_lote(ler_pedidos(args.arquivo), produtos)
+        decorrido = time.perf_counter() - inicio
+    finally:
+        fechar_dados()
+
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    try:
+        for pedido, status, motivo in resultados:
+            saida.write(json.dumps({"pedido": pedido, "status": status, "motivo": motivo},
+                                   ensure_ascii=False) + "\n")
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+    aceitos = sum(1 for _, status, _ in resultados if status == ACEITO)
+    print(f"\nPedidos: {len(resultados)}  aceitos: {aceitos}  recusados: {len(resultados) - aceitos}",
+          file=sys.stderr)
+    print(f"Tempo: {decorrido:.2f} s  ({len(resultados) / max(decorrido, 1e-9):,.0f} pedidos/s)",
+          file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
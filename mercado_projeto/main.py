@@ -1,18 +1,70 @@
-from persistencia import carregar_dados, salvar_dados
-from interface import menu_principal
+import argparse
+import sys
+
+# Primeiro argumento que, se presente, leva ao modo de comandos (comandos.py)
+# em vez dos menus.
+COMANDOS = ("produtos", "carrinho", "estoque", "vendas", "executar")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMANDOS:
+        # Uma operação e sai: sem menus e sem carregar interface/persistência
+        # além do que o comando usa.
+        import comandos
+        sys.exit(comandos.executar_cli(argv))
+
+    parser = argparse.ArgumentParser(description="Mercado Projeto",
+                                     epilog=f"Modo de comandos: main.py {{{','.join(COMANDOS)}}} ... (veja comandos.py)")
+    parser.add_argument("--profile", metavar="ARQUIVO",
+                        help="mede chamadas e latência das operações e grava as métricas (JSON) ao sair")
+    parser.add_argument("--cprofile", metavar="ARQUIVO",
+                        help="grava também um perfil do cProfile (abrir com pstats ou snakeviz)")
+    parser.add_argument("--particoes", type=int, metavar="N",
+                        help="estoque dividido entre N processos (particoes.py); reservas e edições passam por eles")
+    args = parser.parse_args(argv)
+
+    import persistencia
+    from interface import menu_principal
+
+    # Sem as opções, nada é instrumentado: custo zero.
+    perfil = None
+    if args.profile:
+        import metricas
+        metricas.instrumentar()
+    if args.cprofile:
+        import cProfile
+        perfil = cProfile.Profile()
+        perfil.enable()
 
-def main():
     print("============== Mercado Projeto ==============")
     print("Bem-vindo ao sistema de mercado!")
     print("============================================")
 
-    produtos, carrinho, admins = carregar_dados()
+    produtos, sessoes, admins = persistencia.carregar_dados()
+    sessoes.expirar()  # carrinhos abandonados enquanto o sistema estava fechado
+    servico = None
+    if args.particoes:
+        from particoes import ServicoParticionado
+        servico = ServicoParticionado(produtos, max(args.particoes, 1))
+        servico.ativar(sessoes)
+    sessoes.iniciar_expiracao()
+    persistencia.iniciar_autosalvamento()
 
     try:
-        menu_principal(produtos, carrinho, admins)
+        menu_principal(produtos, sessoes, admins)
     finally:
-        salvar_dados(produtos, carrinho, admins)
+        sessoes.parar_expiracao()
+        if servico is not None:
+            servico.fechar()  # traz o estoque das partições para o diário
+        persistencia.fechar_dados()
         print("Dados salvos com sucesso. Até logo!")
+        if perfil is not None:
+            perfil.disable()
+            perfil.dump_stats(args.cprofile)
+            print(f"Perfil do cProfile gravado em {args.cprofile}")
+        if args.profile:
+            metricas.gravar(args.profile)
+            print(f"Métricas gravadas em {args.profile}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,129 @@
+# metricas.py
+#
+# Instrumentação opcional: número de chamadas e histograma de latência
+# (p50/p95/p99) das ações dos menus, das operações do Carrinho e da carga
+# e gravação dos dados. Desligada, não custa nada: nenhuma função é
+# embrulhada até `instrumentar()` ser chamado (main.py --profile), e
+# `desinstrumentar()` devolve as originais.
+#
+# O histograma tem baldes logarítmicos (8 por potência de 2, ~12% de
+# resolução): registrar é O(1) e a memória não cresce com as chamadas.
+# As ações interativas incluem o tempo em que o menu espera o usuário.
+
+import functools
+import importlib
+import json
+import threading
+import time
+
+ALVOS = {
+    "interface": (
+        "mostrar_produtos", "navegar_produtos", "buscar_produto", "cadastrar_produto",
+        "editar_produto", "remover_produto", "produtos_abaixo_do_minimo", "relatorio_vendas",
+        "exportar_catalogo",
+        "listar_admins", "cadastrar_admin", "remover_admin", "login_admin",
+    ),
+    "models.Carrinho": ("adicionar", "remover", "ver", "finalizar", "esvaziar"),
+    "persistencia": ("carregar_dados", "salvar_dados", "fechar_dados", "compactar"),
+}
+SUBBALDES = 3  # bits após o mais significativo: 2**3 baldes por potência de 2
+
+
+class Histograma:
+    def __init__(self):
+        self.chamadas = 0
+        self.total_ns = 0
+        self.maximo_ns = 0
+        self._baldes = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, ns: int):
+        # Balde = (expoente, mantissa com SUBBALDES bits), como num HDR histogram.
+        deslocamento = max(ns.bit_length() - SUBBALDES - 1, 0)
+        balde = (deslocamento << SUBBALDES) + (ns >> deslocamento)
+        with self._trava:
+            self.chamadas += 1
+            self.total_ns += ns
+            self.maximo_ns = max(self.maximo_ns, ns)
+            self._baldes[balde] = self._baldes.get(balde, 0) + 1
+
+    @staticmethod
+    def _limite(balde: int) -> int:
+        """Maior valor (ns) que cai no balde."""
+        if balde < 2 << SUBBALDES:
+            return balde
+        deslocamento = (balde >> SUBBALDES) - 1
+        mantissa = balde - (deslocamento << SUBBALDES)
+        return ((mantissa + 1) << deslocamento) - 1
+
+    def percentil(self, p: float) -> int:
+        with self._trava:
+            alvo = p / 100 * self.chamadas
+            acumulado = 0
+            for balde in sorted(self._baldes):
+                acumulado += self._baldes[balde]
+                if acumulado >= alvo:
+                    return min(self._limite(balde), self.maximo_ns)
+        return 0
+
+    def resumo(self):
+        def ms(ns):
+            return round(ns / 1e6, 4)
+        return {
+            "chamadas": self.chamadas,
+            "total_ms": ms(self.total_ns),
+            "media_ms": ms(self.total_ns / max(self.chamadas, 1)),
+            "p50_ms": ms(self.percentil(50)),
+            "p95_ms": ms(self.percentil(95)),
+            "p99_ms": ms(self.percentil(99)),
+            "max_ms": ms(self.maximo_ns),
+        }
+
+
+_histogramas = {}
+_originais = {}
+_inicio = None
+
+def _medida(nome: str, funcao):
+    histograma = _histogramas.setdefault(nome, Histograma())
+    relogio = time.perf_counter_ns
+
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        inicio = relogio()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            histograma.registrar(relogio() - inicio)
+    return medida
+
+def instrumentar(alvos=ALVOS):
+    """Troca as funções de `alvos` por versões que medem cada chamada."""
+    global _inicio
+    _inicio = time.time() if _inicio is None else _inicio
+    for caminho, nomes in alvos.items():
+        modulo, _, classe = caminho.partition(".")
+        dono = importlib.import_module(modulo)
+        if classe:
+            dono = getattr(dono, classe)
+        for nome in nomes:
+            if (dono, nome) not in _originais:
+                original = getattr(dono, nome)
+                _originais[(dono, nome)] = original
+                setattr(dono, nome, _medida(f"{caminho}.{nome}", original))
+
+def desinstrumentar():
+    for (dono, nome), original in _originais.items():
+        setattr(dono, nome, original)
+    _originais.clear()
+
+def resumo():
+    return {nome: h.resumo() for nome, h in sorted(_histogramas.items()) if h.chamadas}
+
+def gravar(caminho: str):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({
+            "gerado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duracao_s": time.time() - _inicio if _inicio else 0,
+            "operacoes": resumo(),
+        }, f, ensure_ascii=False, indent=4)
@@ -1,49 +1,155 @@
 # models.py
 
+import threading
+import time
+from eventos import publicar
+from reserva import reservar, liberar
+from utils import para_centavos, para_reais, formatar_reais
+
+# Preços são sempre centavos inteiros em memória. Os arquivos e os eventos
+# continuam com o preço em reais ("preco": 9.9); a conversão acontece em
+# to_dict/from_dict.
+
 class Produto:
-    def __init__(self, codigo: int, nome: str, preco: float, estoque: int):
+    def __init__(self, codigo: int, nome: str, preco: int, estoque: int):
         self.codigo = codigo
         self.nome = nome
         self.preco = preco
         self.estoque = estoque
 
     def to_dict(self):
-        return {"codigo": self.codigo, "nome": self.nome, "preco": self.preco, "estoque": self.estoque}
+        return {"codigo": self.codigo, "nome": self.nome, "preco": para_reais(self.preco),
+                "estoque": self.estoque}
 
     @staticmethod
     def from_dict(data):
-        return Produto(data["codigo"], data["nome"], data["preco"], data["estoque"])
+        return Produto(data["codigo"], data["nome"], para_centavos(data["preco"]), data["estoque"])
+
+
+CLIENTE_LOCAL = "local"  # carrinho de quem usa o menu interativo
 
 
 class Carrinho:
-    def __init__(self):
+    """Itens do cliente: codigo -> {"produto", "quantidade", "preco"}.
+
+    `preco` é o preço unitário (centavos) já somado em `total`; o total é
+    mantido a cada inclusão/remoção, sem percorrer os itens.
+    """
+
+    def __init__(self, cliente: str = CLIENTE_LOCAL):
+        self.cliente = cliente
         self.itens = {}
+        self.total = 0
+        self.ultimo_acesso = time.time()
+        self.expirado = False
+        self.gerenciador = None  # GerenciadorCarrinhos que indexa os produtos deste carrinho
+        self._trava = threading.Lock()
 
     def adicionar(self, produto: Produto, quantidade: int):
+        self.ultimo_acesso = time.time()
         if quantidade <= 0:
             print("A quantidade deve ser maior que 0.")
-            return
-        if produto.estoque < quantidade:
+            return False
+        if self.expirado:
+            print("Este carrinho expirou; os itens voltaram ao estoque.")
+            return False
+        if not reservar(produto, quantidade):
             print(f"Estoque insuficiente! Disponível: {produto.estoque}")
-            return
-        produto.estoque -= quantidade
-        if produto.codigo in self.itens:
-            self.itens[produto.codigo]["quantidade"] += quantidade
-        else:
-            self.itens[produto.codigo] = {"produto": produto, "quantidade": quantidade}
+            return False
+        if not self.incluir(produto, quantidade):
+            # Expirou entre a reserva e a inclusão: ninguém mais devolveria.
+            liberar(produto, quantidade)
+            print("Este carrinho expirou; os itens voltaram ao estoque.")
+            return False
+        publicar("carrinho_adicionado", cliente=self.cliente, instante=self.ultimo_acesso,
+                 codigo=produto.codigo, quantidade=quantidade)
         print(f"{quantidade}x {produto.nome} adicionado ao carrinho!")
+        return True
+
+    def incluir(self, produto: Produto, quantidade: int) -> bool:
+        """Põe o item no carrinho sem mexer no estoque; False se o carrinho expirou."""
+        with self._trava:
+            if self.expirado:
+                return False
+            item = self.itens.get(produto.codigo)
+            if item is None:
+                item = self.itens[produto.codigo] = {"produto": produto, "quantidade": 0,
+                                                     "preco": produto.preco}
+                if self.gerenciador is not None:
+                    self.gerenciador.indexar(self, (produto.codigo,))
+            item["quantidade"] += quantidade
+            self.total += item["preco"] * quantidade
+            return True
+
+    def retirar(self, codigo: int):
+        """Tira o item do carrinho sem mexer no estoque. Retorna o item (ou None)."""
+        with self._trava:
+            item = self.itens.pop(codigo, None)
+            if item is not None:
+                self.total -= item["preco"] * item["quantidade"]
+                if self.gerenciador is not None:
+                    self.gerenciador.desindexar(self, (codigo,))
+        return item
+
+    def limpar(self):
+        with self._trava:
+            itens, self.itens = self.itens, {}
+            self.total = 0
+            if self.gerenciador is not None:
+                self.gerenciador.desindexar(self, itens)
+        return itens
+
+    def reprecificar(self, codigo: int):
+        """Atualiza a linha do produto (se houver) com o preço atual dele."""
+        with self._trava:
+            item = self.itens.get(codigo)
+            if item is None:
+                return
+            preco = item["produto"].preco
+            self.total += (preco - item["preco"]) * item["quantidade"]
+            item["preco"] = preco
 
     def remover(self, codigo: int):
-        if codigo in self.itens:
-            item = self.itens.pop(codigo)
-            produto = item["produto"]
-            quantidade = item["quantidade"]
-            produto.estoque += quantidade
-            print(f"{quantidade}x {produto.nome} removido do carrinho.")
-        else:
+        self.ultimo_acesso = time.time()
+        item = self.retirar(codigo)
+        if item is None:
             print("Produto não encontrado no carrinho.")
+            return False
+        produto = item["produto"]
+        quantidade = item["quantidade"]
+        liberar(produto, quantidade)
+        publicar("carrinho_removido", cliente=self.cliente, instante=self.ultimo_acesso,
+                 codigo=codigo, quantidade=quantidade)
+        print(f"{quantidade}x {produto.nome} removido do carrinho.")
+        return True
+
+    def esvaziar(self):
+        """Devolve ao estoque tudo o que está no carrinho (carrinho abandonado)."""
+        itens = self.limpar()
+        for item in itens.values():
+            liberar(item["produto"], item["quantidade"])
+        return itens
+
+    def encerrar(self):
+        """Expira o carrinho: devolve os itens e recusa inclusões daqui em diante.
+
+        Quem ainda tiver a referência (o menu, esperando um input) não
+        consegue mais reservar num carrinho que ninguém acompanha.
+        """
+        with self._trava:
+            self.expirado = True
+        return self.esvaziar()
+
+    def entregar(self):
+        """Encerra o carrinho sem devolver os itens ao estoque e os retorna,
+        para outro carrinho assumir as reservas."""
+        with self._trava:
+            self.expirado = True
+        return self.limpar()
 
-    def ver(self):
+    def ver(self, catalogo=None):
+        """Mostra os itens; os nomes vêm de `catalogo` (uma versão fixa), se dado."""
+        self.ultimo_acesso = time.time()
         if not self.itens:
             print("\nCarrinho vazio!")
             return
@@ -51,24 +157,26 @@ class Carrinho:
         print("\n=== Seu Carrinho ===")
         print(f"{'Produto':<20} | {'Qtd':<4} | {'Preço Unit.':<12} | {'Subtotal':<10}")
         print("-" * 55)
-        total = 0
-        for item in self.itens.values():
-            produto = item["produto"]
+        with self._trava:
+            itens, total = list(self.itens.items()), self.total
+        for codigo, item in itens:
             quantidade = item["quantidade"]
-            subtotal = produto.preco * quantidade
-            print(f"{produto.nome:<20} | {quantidade:<4} | R$ {produto.preco:<10.2f} | R$ {subtotal:<8.2f}")
-            total += subtotal
+            produto = item["produto"] if catalogo is None else catalogo.get(codigo, item["produto"])
+            print(f"{produto.nome:<20} | {quantidade:<4} | R$ {formatar_reais(item['preco']):<10} | "
+                  f"R$ {formatar_reais(item['preco'] * quantidade):<8}")
         print("-" * 55)
-        print(f"{'TOTAL':<20} | {'':<4} | {'':<12} | R$ {total:<8.2f}")
+        print(f"{'TOTAL':<20} | {'':<4} | {'':<12} | R$ {formatar_reais(total):<8}")
         print("-" * 55)
 
-    def finalizar(self):
+    def finalizar(self, catalogo=None):
         if not self.itens:
             print("\nCarrinho está vazio!")
             return
-        self.ver()
+        self.ver(catalogo)
         print("\nCompra finalizada. Obrigado pela preferência!")
-        self.itens.clear()
+        vendidos = [{"codigo": codigo, "quantidade": item["quantidade"], "preco": para_reais(item["preco"])}
+                    for codigo, item in self.limpar().items()]
+        publicar("compra_finalizada", cliente=self.cliente, instante=self.ultimo_acesso, itens=vendidos)
 
     def to_dict(self):
         return {codigo: {"quantidade": item["quantidade"]} for codigo, item in self.itens.items()}
@@ -77,4 +185,4 @@ class Carrinho:
         for codigo, info in data.items():
             codigo = int(codigo)
             if codigo in produtos:
-                self.itens[codigo] = {"produto": produtos[codigo], "quantidade": info["quantidade"]}
+                self.incluir(produtos[codigo], info["quantidade"])
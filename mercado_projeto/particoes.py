@@ -0,0 +1,475 @@
+# particoes.py
+#
+# Catálogo particionado entre processos, para a vazão do checkout não ficar
+# presa a um núcleo (e ao GIL). O estoque de cada produto pertence a uma
+# partição, codigo % N; cada partição é um processo que guarda só o
+# estoque dos seus códigos e atende reservas e devoluções por conexões
+# (multiprocessing.Pipe), uma para cada processo cliente, então os clientes
+# não disputam um canal só.
+#
+# Cada cliente fala com as partições por um Roteador (o coordenador): os
+# itens são agrupados pela partição dona e cada partição recebe uma
+# mensagem só com todos os pedidos de um lote de carrinhos. Dentro de uma
+# partição a reserva de um carrinho é tudo-ou-nada; um carrinho com itens
+# em várias partições só fica reservado se todas aceitarem, senão as
+# partes já reservadas são devolvidas antes da resposta (compensação).
+# Nesse intervalo outro cliente pode ver o estoque mais baixo e ser
+# recusado, mas nenhuma unidade é vendida duas vezes.
+#
+# Enquanto o serviço roda, as partições são as donas do estoque e o
+# `produtos` do processo principal fica parado. `sincronizar()` traz de
+# volta os estoques que mudaram e publica um `produtos_atualizados` (diário
+# ou SQLite, índices); `fechar()` sincroniza e encerra as partições. Os
+# eventos de carrinho continuam indo para o diário, então, numa queda,
+# reaplicar o diário refaz as reservas que ainda não foram sincronizadas.
+#
+# No menu (python main.py --particoes N), `ativar(sessoes)` faz os
+# carrinhos da sessão reservarem pelas partições, e o estoque digitado pelo
+# admin vira uma variação aplicada na partição dona (`Roteador.ajustar`),
+# nunca uma escrita direta em `produtos`, que a próxima sincronização
+# apagaria. Produtos cadastrados ou removidos chegam às partições pelos
+# eventos. A interface sincroniza antes de mostrar estoques.
+#
+# Uso: python particoes.py [--processos 1 2 4 8] [--produtos 100000]
+#                          [--carrinhos 200000] [--lote 100]
+
+import argparse
+import multiprocessing
+import os
+import random
+import threading
+import time
+from multiprocessing.connection import wait
+from catalogo import ProdutoStore
+import eventos
+from eventos import publicar
+from models import Carrinho, CLIENTE_LOCAL
+from reserva import trava_do_produto
+
+RESERVAR = "r"
+LIBERAR = "l"
+CONSULTAR = "c"
+AJUSTAR = "a"
+DEFINIR = "d"
+SINCRONIZAR = "s"
+PARAR = "p"
+
+
+def _particao(estoques, conexoes, controle):
+    """Laço de uma partição: dona de `estoques` (codigo -> estoque)."""
+    alterados = set()
+    abertas = list(conexoes) + [controle]
+    while abertas:
+        for conexao in wait(abertas):
+            try:
+                mensagem = conexao.recv()
+            except EOFError:
+                abertas.remove(conexao)
+                continue
+            if conexao is controle:
+                conexao.send({codigo: estoques[codigo] for codigo in alterados})
+                alterados.clear()
+                if mensagem == PARAR:
+                    return
+                continue
+            respostas = []
+            for operacao, itens in mensagem:
+                if operacao == RESERVAR:
+                    aceito = all(estoques.get(codigo, -1) >= quantidade for codigo, quantidade in itens)
+                    if aceito:
+                        for codigo, quantidade in itens:
+                            estoques[codigo] -= quantidade
+                            alterados.add(codigo)
+                    respostas.append(aceito)
+                elif operacao == LIBERAR:
+                    for codigo, quantidade in itens:
+                        if codigo in estoques:
+                            estoques[codigo] += quantidade
+                            alterados.add(codigo)
+                    respostas.append(True)
+                elif operacao == CONSULTAR:
+                    respostas.append([estoques.get(codigo) for codigo in itens])
+                elif operacao == AJUSTAR:
+                    novos = []
+                    for codigo, variacao in itens:
+                        if codigo in estoques:
+                            estoques[codigo] = max(estoques[codigo] + variacao, 0)
+                            alterados.add(codigo)
+                        novos.append(estoques.get(codigo))
+                    respostas.append(novos)
+                elif operacao == DEFINIR:
+                    # Produto cadastrado (estoque) ou removido (None).
+                    for codigo, estoque in itens:
+                        if estoque is None:
+                            estoques.pop(codigo, None)
+                            alterados.discard(codigo)
+                        else:
+                            estoques[codigo] = estoque
+                    respostas.append(True)
+            conexao.send(respostas)
+
+
+class Roteador:
+    """Coordenador de um processo cliente: uma conexão por partição."""
+
+    def __init__(self, conexoes):
+        self.conexoes = conexoes
+        self._trava = threading.Lock()
+
+    def particao(self, codigo: int) -> int:
+        return codigo % len(self.conexoes)
+
+    def _dividir(self, itens):
+        """{particao: [(codigo, quantidade), ...]}, somando códigos repetidos."""
+        partes = {}
+        for codigo, quantidade in itens:
+            parte = partes.setdefault(codigo % len(self.conexoes), {})
+            parte[codigo] = parte.get(codigo, 0) + quantidade
+        return {p: list(parte.items()) for p, parte in partes.items()}
+
+    def _trocar(self, mensagens):
+        """Manda a mensagem de cada partição (as vazias não) e espera as respostas."""
+        with self._trava:
+            enviadas = [p for p, mensagem in enumerate(mensagens) if mensagem]
+            for p in enviadas:
+                self.conexoes[p].send(mensagens[p])
+            respostas = [[] for _ in mensagens]
+            for p in enviadas:
+                respostas[p] = self.conexoes[p].recv()
+        return respostas
+
+    def reservar_varios(self, carrinhos):
+        """Reserva cada carrinho (lista de (codigo, quantidade)) inteiro ou nada dele.
+
+        Retorna um bool por carrinho, na ordem dada. Cada partição recebe
+        uma mensagem para o lote todo (mais uma, se houver compensação).
+        """
+        n = len(self.conexoes)
+        mensagens = [[] for _ in range(n)]
+        donos = [[] for _ in range(n)]  # índice do carrinho de cada pedido, por partição
+        resultados = []
+        for indice, itens in enumerate(carrinhos):
+            valido = bool(itens) and all(quantidade > 0 for _, quantidade in itens)
+            resultados.append(valido)
+            if not valido:
+                continue
+            for p, parte in self._dividir(itens).items():
+                mensagens[p].append((RESERVAR, parte))
+                donos[p].append(indice)
+        respostas = self._trocar(mensagens)
+        for p in range(n):
+            for indice, aceito in zip(donos[p], respostas[p]):
+                if not aceito:
+                    resultados[indice] = False
+        devolver = [[] for _ in range(n)]
+        for p in range(n):
+            for (_, parte), indice, aceito in zip(mensagens[p], donos[p], respostas[p]):
+                if aceito and not resultados[indice]:
+                    devolver[p].append((LIBERAR, parte))
+        if any(devolver):
+            self._trocar(devolver)
+        return resultados
+
+    def reservar(self, itens) -> bool:
+        return self.reservar_varios([itens])[0]
+
+    def liberar_varios(self, carrinhos):
+        """Devolve ao estoque os itens de cada carrinho (reservados antes)."""
+        mensagens = [[] for _ in self.conexoes]
+        for itens in carrinhos:
+            for p, parte in self._dividir(itens).items():
+                mensagens[p].append((LIBERAR, parte))
+        self._trocar(mensagens)
+
+    def liberar(self, itens):
+        self.liberar_varios([itens])
+
+    def estoque(self, codigo: int):
+        mensagens = [[] for _ in self.conexoes]
+        mensagens[self.particao(codigo)].append((CONSULTAR, [codigo]))
+        return self._trocar(mensagens)[self.particao(codigo)][0][0]
+
+    def ajustar(self, codigo: int, variacao: int):
+        """Soma `variacao` ao estoque na partição (sem passar de 0). Retorna o estoque novo."""
+        mensagens = [[] for _ in self.conexoes]
+        mensagens[self.particao(codigo)].append((AJUSTAR, [(codigo, variacao)]))
+        return self._trocar(mensagens)[self.particao(codigo)][0][0]
+
+    def definir(self, pares):
+        """Põe (codigo, estoque) nas partições; estoque None tira o código."""
+        mensagens = [[] for _ in self.conexoes]
+        for codigo, estoque in pares:
+            p = self.particao(codigo)
+            if not mensagens[p]:
+                mensagens[p].append((DEFINIR, []))
+            mensagens[p][0][1].append((codigo, estoque))
+        self._trocar(mensagens)
+
+
+class ServicoParticionado:
+    def __init__(self, produtos, processos: int = os.cpu_count(), clientes: int = 1):
+        """Inicia `processos` partições com o estoque de `produtos`.
+
+        `clientes` é o número de processos que vão falar com as partições
+        (cada um recebe as suas conexões por `conexoes(cliente)`); o cliente
+        0 é o processo atual, por `roteador()`.
+        """
+        self.produtos = produtos
+        estoques = [{} for _ in range(processos)]
+        if isinstance(produtos, ProdutoStore):
+            pares = produtos.estoques()
+        else:
+            pares = ((p.codigo, p.estoque) for p in produtos.values())
+        for codigo, estoque in pares:
+            estoques[codigo % processos][codigo] = estoque
+        self._clientes = [[] for _ in range(clientes)]
+        self._controles = []
+        self._processos = []
+        for p in range(processos):
+            pares_clientes = [multiprocessing.Pipe() for _ in range(clientes)]
+            controle, controle_particao = multiprocessing.Pipe()
+            processo = multiprocessing.Process(
+                target=_particao, name=f"particao-{p}", daemon=True,
+                args=(estoques[p], [lado for _, lado in pares_clientes], controle_particao),
+            )
+            processo.start()
+            for cliente, (lado_cliente, lado_particao) in enumerate(pares_clientes):
+                self._clientes[cliente].append(lado_cliente)
+                lado_particao.close()
+            controle_particao.close()
+            self._controles.append(controle)
+            self._processos.append(processo)
+        self._roteador = None
+
+    def conexoes(self, cliente: int):
+        """Conexões (uma por partição) do cliente; passe-as ao processo dele."""
+        return self._clientes[cliente]
+
+    def roteador(self) -> Roteador:
+        if self._roteador is None:
+            self._roteador = Roteador(self.conexoes(0))
+        return self._roteador
+
+    def _aplicar(self, mensagem) -> int:
+        for controle in self._controles:
+            controle.send(mensagem)
+        alterados = []
+        for controle in self._controles:
+            for codigo, estoque in controle.recv().items():
+                produto = self.produtos.get(codigo)
+                if produto is None:
+                    continue
+                with trava_do_produto(codigo):
+                    produto.estoque = estoque
+                alterados.append(produto.to_dict())
+        if alterados:
+            publicar("produtos_atualizados", produtos=alterados)
+        return len(alterados)
+
+    def sincronizar(self) -> int:
+        """Grava em `produtos` os estoques alterados nas partições. Retorna quantos."""
+        return self._aplicar(SINCRONIZAR)
+
+    def ativar(self, sessoes):
+        """Liga o serviço à sessão do menu: carrinhos e edições de estoque passam pelas partições."""
+        global _ativo
+        roteador = self.roteador()
+        sessoes.usar_fabrica(lambda cliente: CarrinhoParticionado(roteador, cliente))
+        eventos.assinar(self.registrar)
+        _ativo = self
+
+    def registrar(self, tipo: str, dados: dict):
+        """Ouvinte de eventos: produtos novos ou removidos no processo principal."""
+        if tipo == "produto_cadastrado":
+            self.roteador().definir([(dados["codigo"], dados["estoque"])])
+        elif tipo == "produtos_cadastrados":
+            self.roteador().definir((p["codigo"], p["estoque"]) for p in dados["produtos"])
+        elif tipo == "produto_removido":
+            self.roteador().definir([(dados["codigo"], None)])
+
+    def fechar(self) -> int:
+        global _ativo
+        if _ativo is self:
+            eventos.cancelar(self.registrar)
+            _ativo = None
+        alterados = self._aplicar(PARAR)
+        for processo in self._processos:
+            processo.join()
+        for conexao in (c for conexoes in self._clientes for c in conexoes):
+            conexao.close()
+        return alterados
+
+
+_ativo = None
+
+def servico_ativo():
+    """Serviço ligado ao menu por `ativar` (ou None)."""
+    return _ativo
+
+
+class CarrinhoParticionado(Carrinho):
+    """Carrinho cujas reservas passam pelas partições donas do estoque."""
+
+    def __init__(self, roteador: Roteador, cliente: str = CLIENTE_LOCAL):
+        super().__init__(cliente)
+        self.roteador = roteador
+
+    def adicionar(self, produto, quantidade: int):
+        return self.adicionar_varios([(produto, quantidade)])
+
+    def adicionar_varios(self, itens):
+        """Reserva todos os (produto, quantidade), de qualquer partição, ou nenhum."""
+        itens = list(itens)
+        self.ultimo_acesso = time.time()
+        if any(quantidade <= 0 for _, quantidade in itens):
+            print("A quantidade deve ser maior que 0.")
+            return False
+        if self.expirado:
+            print("Este carrinho expirou; os itens voltaram ao estoque.")
+            return False
+        if not self.roteador.reservar([(produto.codigo, quantidade) for produto, quantidade in itens]):
+            print("Estoque insuficiente para um ou mais itens.")
+            return False
+        for i, (produto, quantidade) in enumerate(itens):
+            if not self.incluir(produto, quantidade):
+                # Expirou no meio: os já incluídos voltaram com o carrinho,
+                # o resto ninguém mais devolveria.
+                self.roteador.liberar([(p.codigo, q) for p, q in itens[i:]])
+                print("Este carrinho expirou; os itens voltaram ao estoque.")
+                return False
+            publicar("carrinho_adicionado", cliente=self.cliente, instante=self.ultimo_acesso,
+                     codigo=produto.codigo, quantidade=quantidade)
+            print(f"{quantidade}x {produto.nome} adicionado ao carrinho!")
+        return True
+
+    def remover(self, codigo: int):
+        self.ultimo_acesso = time.time()
+        item = self.retirar(codigo)
+        if item is None:
+            print("Produto não encontrado no carrinho.")
+            return False
+        quantidade = item["quantidade"]
+        self.roteador.liberar([(codigo, quantidade)])
+        publicar("carrinho_removido", cliente=self.cliente, instante=self.ultimo_acesso,
+                 codigo=codigo, quantidade=quantidade)
+        print(f"{quantidade}x {item['produto'].nome} removido do carrinho.")
+        return True
+
+    def esvaziar(self):
+        itens = self.limpar()
+        if itens:
+            self.roteador.liberar([(codigo, item["quantidade"]) for codigo, item in itens.items()])
+        return itens
+
+
+# =========================
+# Benchmark
+# =========================
+
+def _carrinhos(aleatorio, num_produtos: int, quantos: int):
+    return [[(aleatorio.randint(1, num_produtos), aleatorio.randint(1, 3))
+             for _ in range(aleatorio.randint(1, 5))] for _ in range(quantos)]
+
+def _cliente(conexoes, num_produtos, carrinhos, lote, semente, saida):
+    """Processo cliente do benchmark: reserva em lotes e desiste de ~30% dos carrinhos."""
+    roteador = Roteador(conexoes)
+    aleatorio = random.Random(semente)
+    aceitos = unidades = 0
+    feitos = 0
+    while feitos < carrinhos:
+        pedidos = _carrinhos(aleatorio, num_produtos, min(lote, carrinhos - feitos))
+        feitos += len(pedidos)
+        resultados = roteador.reservar_varios(pedidos)
+        desistencias = []
+        for itens, aceito in zip(pedidos, resultados):
+            if not aceito:
+                continue
+            aceitos += 1
+            if aleatorio.random() < 0.3:
+                desistencias.append(itens)
+            else:
+                unidades += sum(quantidade for _, quantidade in itens)
+        if desistencias:
+            roteador.liberar_varios(desistencias)
+    saida.send((aceitos, unidades))
+    saida.close()
+
+def _sem_particoes(produtos, num_produtos, carrinhos, semente):
+    """Referência: o mesmo trabalho num processo só, com as travas de reserva.py."""
+    aleatorio = random.Random(semente)
+    aceitos = unidades = 0
+    for itens in _carrinhos(aleatorio, num_produtos, carrinhos):
+        reservados = []
+        for codigo, quantidade in itens:
+            produto = produtos[codigo]
+            with trava_do_produto(codigo):
+                if produto.estoque < quantidade:
+                    break
+                produto.estoque -= quantidade
+            reservados.append((produto, quantidade))
+        else:
+            aceitos += 1
+            if aleatorio.random() < 0.3:
+                for produto, quantidade in reservados:
+                    with trava_do_produto(produto.codigo):
+                        produto.estoque += quantidade
+            else:
+                unidades += sum(quantidade for _, quantidade in itens)
+            continue
+        for produto, quantidade in reservados:
+            with trava_do_produto(produto.codigo):
+                produto.estoque += quantidade
+    return aceitos, unidades
+
+def _catalogo(num_produtos: int, semente: int = 0) -> ProdutoStore:
+    aleatorio = random.Random(semente)
+    return ProdutoStore.from_dicts(
+        {"codigo": c, "nome": f"produto {c}", "preco": 1.0, "estoque": aleatorio.randint(0, 40)}
+        for c in range(1, num_produtos + 1)
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vazão de reservas com o catálogo particionado.")
+    parser.add_argument("--processos", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="números de partições a medir (cada uma com um cliente)")
+    parser.add_argument("--produtos", type=int, default=100_000)
+    parser.add_argument("--carrinhos", type=int, default=200_000, help="total de carrinhos por medição")
+    parser.add_argument("--lote", type=int, default=100, help="carrinhos por mensagem de cada cliente")
+    args = parser.parse_args(argv)
+
+    print(f"{args.produtos} produtos, {args.carrinhos} carrinhos de 1 a 5 itens, {os.cpu_count()} CPUs")
+    produtos = _catalogo(args.produtos)
+    inicial = sum(e for _, e in produtos.estoques())
+    inicio = time.perf_counter()
+    aceitos, unidades = _sem_particoes(produtos, args.produtos, args.carrinhos, semente=1)
+    decorrido = time.perf_counter() - inicio
+    assert inicial - sum(e for _, e in produtos.estoques()) == unidades
+    print(f"{'sem partições':>14}: {args.carrinhos / decorrido:>10,.0f} carrinhos/s  ({aceitos} aceitos)")
+
+    for processos in args.processos:
+        produtos = _catalogo(args.produtos)
+        servico = ServicoParticionado(produtos, processos, clientes=processos)
+        clientes = []
+        for cliente in range(processos):
+            recebe, envia = multiprocessing.Pipe(duplex=False)
+            quantos = args.carrinhos // processos + (cliente < args.carrinhos % processos)
+            processo = multiprocessing.Process(target=_cliente, args=(
+                servico.conexoes(cliente), args.produtos, quantos, args.lote, 1 + cliente, envia))
+            clientes.append((processo, recebe))
+        inicio = time.perf_counter()
+        for processo, _ in clientes:
+            processo.start()
+        totais = [recebe.recv() for _, recebe in clientes]
+        decorrido = time.perf_counter() - inicio
+        for processo, _ in clientes:
+            processo.join()
+        servico.fechar()
+        aceitos = sum(a for a, _ in totais)
+        unidades = sum(u for _, u in totais)
+        # Conservação: o que saiu do estoque é exatamente o que ficou reservado.
+        assert inicial - sum(e for _, e in produtos.estoques()) == unidades
+        assert all(e >= 0 for _, e in produtos.estoques())
+        print(f"{processos:>3} partições: {args.carrinhos / decorrido:>10,.0f} carrinhos/s  ({aceitos} aceitos)")
+
+if __name__ == "__main__":
+    main()
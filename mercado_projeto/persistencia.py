@@ -1,26 +1,345 @@
 import json
 import os
-from models import Produto, Carrinho
+import subprocess
+import sys
+import threading
+from models import CLIENTE_LOCAL
+from catalogo import ProdutoStore
+from sessoes import GerenciadorCarrinhos
+from credenciais import RegistroAdmins
+from utils import para_reais
+from diario import Diario, ler_registros, aplicar
+from vendas import LivroVendas
+import snapshot_binario
+import eventos
 
+FORMATO_DADOS = "json"  # "json" ou "binario" (snapshot + diário), ou "sqlite"
 ARQUIVO_DADOS = "mercado.json"
+ARQUIVO_BINARIO = "mercado.bin"
+ARQUIVO_BANCO = "mercado.db"
+ARQUIVO_DIARIO = "mercado.diario.jsonl"
+ARQUIVO_DIARIO_SELADO = "mercado.diario.selado.jsonl"
+LIMITE_DIARIO = 1000  # registros no diário antes de compactar em segundo plano
+TENTATIVAS_COMPACTACAO = 3  # falhas seguidas do processo filho antes de desistir na sessão
+INTERVALO_AUTOSALVAR = 30  # segundos entre as verificações do salvamento automático
 
-def salvar_dados(produtos, carrinho, admins):
-    data = {
-        "produtos": [p.to_dict() for p in produtos.values()],
-        "carrinho": carrinho.to_dict(),
-        "admins": admins
-    }
-    with open(ARQUIVO_DADOS, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+_diario = None
+_compactacao = None
+_trava_compactacao = threading.Lock()
+_falhas_compactacao = 0
+_autosalvamento = None
+_parar_autosalvamento = threading.Event()
+_banco = None
+_leitura = None   # banco aberto só para consulta por ler_dados
+_sessoes = None
+_vendas = None
+
+# =========================
+# Snapshot
+# =========================
+
+def admins_padrao():
+    """Registro com o admin inicial, para quando ainda não há admins gravados."""
+    admins = RegistroAdmins()
+    admins.cadastrar("12345678901", "1234")
+    return admins
+
+def _ler_snapshot():
+    if FORMATO_DADOS == "binario":
+        caminho = snapshot_binario.atual(ARQUIVO_BINARIO)
+    else:
+        caminho = ARQUIVO_DADOS if os.path.exists(ARQUIVO_DADOS) else None
+    if caminho is None:
+        return ProdutoStore(), GerenciadorCarrinhos(), admins_padrao(), 0
+    if FORMATO_DADOS == "binario":
+        # Os produtos ficam no arquivo mapeado; só carrinhos e admins são lidos.
+        produtos, data, seq = snapshot_binario.abrir(ARQUIVO_BINARIO)
+    else:
+        with open(caminho, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        produtos = ProdutoStore.from_dicts(data.get("produtos", []))
+        seq = data.get("seq", 0)
+    sessoes = GerenciadorCarrinhos()
+    if "carrinho" in data:
+        # Formato antigo: um único carrinho, sem horário de acesso.
+        sessoes.obter(CLIENTE_LOCAL).from_dict(data["carrinho"], produtos)
+    sessoes.from_dict(data.get("carrinhos", {}), produtos)
+    admins = RegistroAdmins.from_list(data["admins"]) if "admins" in data else admins_padrao()
+    return produtos, sessoes, admins, seq
+
+def _linhas_produtos(produtos):
+    if isinstance(produtos, ProdutoStore):
+        return produtos.linhas()
+    return ((p.codigo, p.nome, p.preco, p.estoque) for p in produtos.values())
+
+def salvar_dados(produtos, sessoes, admins, seq=None):
+    """Grava o snapshot completo de forma atômica (temporário + rename).
+
+    Os produtos são escritos um por linha, direto das colunas do
+    catálogo, sem montar a lista de dicts inteira em memória.
+    """
+    if seq is None:
+        seq = _diario.seq if _diario else 0
+    if FORMATO_DADOS == "binario":
+        snapshot_binario.salvar(ARQUIVO_BINARIO, _linhas_produtos(produtos),
+                                {"carrinhos": sessoes.to_dict(), "admins": admins.to_list()}, seq)
+        return
+    temporario = ARQUIVO_DADOS + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write('{\n    "seq": %d,\n    "produtos": [' % seq)
+        separador = "\n"
+        for codigo, nome, preco, estoque in _linhas_produtos(produtos):
+            nome = json.dumps(nome, ensure_ascii=False)
+            f.write(f'{separador}        {{"codigo": {codigo}, "nome": {nome}, '
+                    f'"preco": {json.dumps(para_reais(preco))}, "estoque": {estoque}}}')
+            separador = ",\n"
+        f.write("\n    ],\n")
+        f.write('    "carrinhos": %s,\n' % json.dumps(sessoes.to_dict(), ensure_ascii=False))
+        f.write('    "admins": %s\n}\n' % json.dumps(admins.to_list(), ensure_ascii=False))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, ARQUIVO_DADOS)
+    _sincronizar_pasta(ARQUIVO_DADOS)
+
+def _sincronizar_pasta(caminho):
+    # Sem isso, uma queda logo após o rename pode deixar a pasta apontando
+    # para o arquivo antigo.
+    if os.name != "posix":
+        return
+    pasta = os.open(os.path.dirname(os.path.abspath(caminho)), os.O_RDONLY)
+    try:
+        os.fsync(pasta)
+    finally:
+        os.close(pasta)
+
+# =========================
+# Diário e compactação
+# =========================
+
+def _registrar(tipo, dados):
+    with _diario.trava:
+        _diario.registrar(tipo, dados)
+        cheio = _diario.registros >= LIMITE_DIARIO
+    if cheio:
+        # Fora da trava: quem publica depois não espera o processo filho subir.
+        compactar()
+
+def _dobrar_selado(formato=None):
+    # Trabalha só com o que está em disco: não toca no estado da sessão.
+    global FORMATO_DADOS
+    FORMATO_DADOS = formato or FORMATO_DADOS
+    produtos, sessoes, admins, seq = _ler_snapshot()
+    for registro in ler_registros(ARQUIVO_DIARIO_SELADO):
+        if registro["seq"] > seq:
+            aplicar(registro, produtos, sessoes, admins)
+            seq = registro["seq"]
+    salvar_dados(produtos, sessoes, admins, seq)
+    os.remove(ARQUIVO_DIARIO_SELADO)
+
+def _iniciar_compactacao():
+    # Em outro processo, não numa thread: ler e gravar um snapshot de
+    # centenas de MB segura o GIL por segundos (json.load é uma chamada C
+    # só), e o menu ficaria sem responder nesse tempo. Como o trabalho sai
+    # todo do disco, o processo filho não precisa de nada da sessão.
+    global _compactacao
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (pasta, os.environ.get("PYTHONPATH")))))
+    _compactacao = subprocess.Popen(
+        [sys.executable, "-c", f"import persistencia; persistencia._dobrar_selado({FORMATO_DADOS!r})"],
+        env=ambiente, stdin=subprocess.DEVNULL,
+    )
+
+def _conferir_compactacao():
+    # Chamado sob _trava_compactacao. Retorna False se o filho ainda roda.
+    global _compactacao, _falhas_compactacao
+    if _compactacao is None:
+        return True
+    codigo = _compactacao.poll()
+    if codigo is None:
+        return False
+    _compactacao = None
+    if codigo == 0:
+        _falhas_compactacao = 0
+    else:
+        _falhas_compactacao += 1
+        print(f"Aviso: a compactação do diário falhou (código {codigo}, "
+              f"tentativa {_falhas_compactacao} de {TENTATIVAS_COMPACTACAO}).", file=sys.stderr)
+    return True
+
+def _aguardar_compactacao():
+    with _trava_compactacao:
+        if _compactacao is not None:
+            _compactacao.wait()
+        _conferir_compactacao()
+
+def compactar(forcar=False):
+    """Sela o diário atual e o incorpora ao snapshot em segundo plano."""
+    diario = _diario
+    if diario is None:
+        return
+    # Uma compactação por vez. Quem chega com outra em andamento não espera:
+    # ela já vai levar o que está selado.
+    if not _trava_compactacao.acquire(blocking=False):
+        return
+    try:
+        if not _conferir_compactacao():
+            return
+        if os.path.exists(ARQUIVO_DIARIO_SELADO):
+            # Sobrou de uma compactação que falhou (ou de uma sessão
+            # interrompida): tenta de novo, até TENTATIVAS_COMPACTACAO vezes.
+            if _falhas_compactacao >= TENTATIVAS_COMPACTACAO:
+                return
+        elif diario.registros == 0 and not forcar:
+            return
+        else:
+            # `rotacionar` toma a trava do diário só para trocar o arquivo; o
+            # processo filho sobe fora dela, sem segurar quem está publicando.
+            diario.rotacionar(ARQUIVO_DIARIO_SELADO)
+        _iniciar_compactacao()
+    finally:
+        _trava_compactacao.release()
+
+def _autosalvar():
+    # Só garante em disco o que já foi escrito no diário. A compactação fica
+    # por conta de LIMITE_DIARIO (em _registrar).
+    diario = _diario
+    if diario is None:
+        return
+    diario.sincronizar()
+
+def iniciar_autosalvamento(intervalo: float = INTERVALO_AUTOSALVAR):
+    """Salva periodicamente numa thread em segundo plano (só nos formatos com diário)."""
+    global _autosalvamento
+    if _diario is None or _autosalvamento is not None:
+        return  # SQLite: cada alteração já é uma transação
+    def laco():
+        while not _parar_autosalvamento.wait(intervalo):
+            _autosalvar()
+    _parar_autosalvamento.clear()
+    _autosalvamento = threading.Thread(target=laco, name="autosalvamento", daemon=True)
+    _autosalvamento.start()
+
+def parar_autosalvamento():
+    global _autosalvamento
+    _parar_autosalvamento.set()
+    if _autosalvamento is not None:
+        _autosalvamento.join()
+        _autosalvamento = None
+
+# =========================
+# Carga e encerramento
+# =========================
+
+def _estado_json():
+    produtos, sessoes, admins, seq = _ler_snapshot()
+    for caminho in (ARQUIVO_DIARIO_SELADO, ARQUIVO_DIARIO):
+        for registro in ler_registros(caminho):
+            if registro["seq"] > seq:
+                aplicar(registro, produtos, sessoes, admins)
+                seq = registro["seq"]
+    return produtos, sessoes, admins, seq
+
+def _converter_snapshot():
+    if FORMATO_DADOS == "binario" and snapshot_binario.atual(ARQUIVO_BINARIO) is None \
+            and os.path.exists(ARQUIVO_DADOS):
+        # Primeira execução no formato binário: converte o snapshot JSON.
+        # O `seq` é mantido, então o diário continua valendo.
+        snapshot_binario.json_para_binario(ARQUIVO_DADOS, ARQUIVO_BINARIO)
+
+def _carregar_json():
+    global _diario
+    _converter_snapshot()
+    produtos, sessoes, admins, seq = _estado_json()
+    _diario = Diario(ARQUIVO_DIARIO, seq)
+    eventos.assinar(_registrar)
+    if os.path.exists(ARQUIVO_DIARIO_SELADO):
+        # Sobrou de uma compactação interrompida.
+        compactar()
+    if admins.migrados:
+        # Ainda há senhas em texto puro no disco: regrava o snapshot com hashes.
+        _aguardar_compactacao()
+        compactar(forcar=True)
+    return produtos, sessoes, admins
+
+def migrar_para_sqlite():
+    """Copia o estado do mercado.json (e do diário) para o banco SQLite."""
+    from banco_sqlite import BancoSQLite
+    produtos, sessoes, admins, _ = _estado_json()
+    banco = BancoSQLite(ARQUIVO_BANCO)
+    banco.importar(produtos, sessoes, admins)
+    return banco
+
+def _carregar_sqlite():
+    global _banco
+    from banco_sqlite import BancoSQLite
+    if not os.path.exists(ARQUIVO_BANCO) and os.path.exists(ARQUIVO_DADOS):
+        _banco = migrar_para_sqlite()
+    else:
+        _banco = BancoSQLite(ARQUIVO_BANCO)
+    eventos.assinar(_banco.registrar)
+    return _banco.carregar(admins_padrao)
 
 def carregar_dados():
-    if not os.path.exists(ARQUIVO_DADOS):
-        admins = [{"cpf": "12345678901", "senha": "1234"}]
-        return {}, Carrinho(), admins
-    with open(ARQUIVO_DADOS, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    produtos = {p["codigo"]: Produto.from_dict(p) for p in data.get("produtos", [])}
-    carrinho = Carrinho()
-    carrinho.from_dict(data.get("carrinho", {}), produtos)
-    admins = data.get("admins", [{"cpf": "12345678901", "senha": "1234"}])
-    return produtos, carrinho, admins
+    """Retorna (produtos, sessoes, admins); `sessoes` guarda os carrinhos por cliente."""
+    global _sessoes, _vendas
+    if FORMATO_DADOS == "sqlite":
+        produtos, sessoes, admins = _carregar_sqlite()
+    else:
+        produtos, sessoes, admins = _carregar_json()
+    # Preço editado: os carrinhos atualizam só a linha daquele produto.
+    _sessoes = sessoes
+    eventos.assinar(sessoes.registrar)
+    # Compras finalizadas vão para o livro de vendas (nunca compactado).
+    _vendas = LivroVendas()
+    eventos.assinar(_vendas.registrar)
+    return produtos, sessoes, admins
+
+def ler_dados():
+    """Como `carregar_dados`, só para consulta: não abre o diário nem o
+    livro de vendas e não assina eventos. No SQLite, o banco é aberto só
+    para leitura (sem esquema nem migrações) e fica aberto até
+    `fechar_dados` ou a próxima leitura, porque os produtos são lidos sob
+    demanda."""
+    global _leitura
+    if FORMATO_DADOS == "sqlite":
+        from banco_sqlite import BancoSQLite
+        if not os.path.exists(ARQUIVO_BANCO):
+            return _estado_json()[:3]
+        _fechar_leitura()
+        _leitura = BancoSQLite(ARQUIVO_BANCO, somente_leitura=True)
+        return _leitura.carregar(admins_padrao)
+    _converter_snapshot()
+    return _estado_json()[:3]
+
+def _fechar_leitura():
+    global _leitura
+    if _leitura is not None:
+        _leitura.fechar()
+        _leitura = None
+
+def livro_vendas():
+    """Livro de vendas da sessão aberta por `carregar_dados` (ou None)."""
+    return _vendas
+
+def fechar_dados():
+    """Encerra a sessão: as alterações já estão no diário ou no banco."""
+    global _diario, _banco, _sessoes, _vendas
+    parar_autosalvamento()
+    _fechar_leitura()
+    if _sessoes is not None:
+        eventos.cancelar(_sessoes.registrar)
+        _sessoes = None
+    if _vendas is not None:
+        eventos.cancelar(_vendas.registrar)
+        _vendas.fechar()
+        _vendas = None
+    if _banco is not None:
+        eventos.cancelar(_banco.registrar)
+        _banco.fechar()
+        _banco = None
+    if _diario is None:
+        return
+    eventos.cancelar(_registrar)
+    _aguardar_compactacao()
+    _diario.fechar()
+    _diario = None
@@ -0,0 +1,169 @@
+# reposicao.py
+#
+# Índice ordenado do estoque, para o relatório de produtos abaixo do
+# mínimo. Cada produto tem um estoque mínimo (ESTOQUE_MINIMO_PADRAO ou o
+# definido pelo admin) e o índice é ordenado pela folga, estoque - mínimo:
+# os produtos abaixo do mínimo são justamente os de folga negativa, e
+# aparecem primeiro.
+#
+# O índice é um heap de inteiros (folga << 32 | codigo) com remoção
+# preguiçosa: cada mudança de estoque empilha a folga nova, e a folga
+# atual de cada código fica num array. Entradas que não batem com o array
+# estão velhas e são puladas; quando passam de metade do heap, ele é
+# refeito. O relatório percorre o heap do menor para o maior sem
+# desmontá-lo (uma fila com os filhos dos nós já vistos), então listar os
+# k primeiros custa O(k log n) e não uma varredura do catálogo.
+#
+# O índice é montado na primeira consulta e mantido pelos eventos de
+# produto e de carrinho (a reserva do estoque acontece ao adicionar ao
+# carrinho; expirar, remover e editar devolvem ou mudam o estoque).
+
+import heapq
+import json
+import os
+import threading
+from array import array
+import eventos
+from catalogo import ProdutoStore
+
+ARQUIVO_MINIMOS = "mercado.minimos.json"
+ESTOQUE_MINIMO_PADRAO = 10
+AUSENTE = -(2 ** 63)
+BITS_CODIGO = 32
+MASCARA_CODIGO = (1 << BITS_CODIGO) - 1
+
+
+def _chave(folga: int, codigo: int) -> int:
+    return (folga << BITS_CODIGO) | codigo
+
+
+class IndiceReposicao:
+    def __init__(self, produtos, minimos=None, padrao: int = ESTOQUE_MINIMO_PADRAO):
+        self.produtos = produtos
+        self.padrao = padrao
+        self.minimos = dict(minimos or {})  # codigo -> mínimo, só os diferentes do padrão
+        self._trava = threading.Lock()
+        self._folgas = array("q")            # codigo -> folga atual (AUSENTE se não indexado)
+        self._heap = []
+        self._indexados = 0
+        if isinstance(produtos, ProdutoStore):
+            pares = produtos.estoques()
+        else:
+            pares = ((p.codigo, p.estoque) for p in produtos.values())
+        for codigo, estoque in pares:
+            folga = estoque - self.minimo(codigo)
+            self._gravar_folga(codigo, folga)
+            self._heap.append(_chave(folga, codigo))
+        heapq.heapify(self._heap)
+
+    def minimo(self, codigo: int) -> int:
+        return self.minimos.get(codigo, self.padrao)
+
+    def _folga(self, codigo: int) -> int:
+        return self._folgas[codigo] if codigo < len(self._folgas) else AUSENTE
+
+    def _gravar_folga(self, codigo: int, folga: int):
+        if codigo >= len(self._folgas):
+            self._folgas.extend([AUSENTE] * (codigo + 1 - len(self._folgas)))
+        if self._folgas[codigo] == AUSENTE and folga != AUSENTE:
+            self._indexados += 1
+        elif self._folgas[codigo] != AUSENTE and folga == AUSENTE:
+            self._indexados -= 1
+        self._folgas[codigo] = folga
+
+    def atualizar(self, codigo: int):
+        """Relê o estoque do produto (ou o retira do índice, se não existe mais)."""
+        produto = self.produtos.get(codigo)
+        with self._trava:
+            if produto is None:
+                self._gravar_folga(codigo, AUSENTE)
+                return
+            # O estoque é lido dentro da trava: a última atualização sempre
+            # vê o valor mais novo, mesmo com reservas em outras threads.
+            folga = produto.estoque - self.minimo(codigo)
+            if self._folga(codigo) == folga:
+                return
+            self._gravar_folga(codigo, folga)
+            heapq.heappush(self._heap, _chave(folga, codigo))
+            if len(self._heap) > 2 * self._indexados + 1024:
+                self._refazer()
+
+    def _refazer(self):
+        self._heap = [_chave(folga, codigo) for codigo, folga in enumerate(self._folgas) if folga != AUSENTE]
+        heapq.heapify(self._heap)
+
+    def definir_minimo(self, codigo: int, minimo: int):
+        if minimo == self.padrao:
+            self.minimos.pop(codigo, None)
+        else:
+            self.minimos[codigo] = minimo
+        self.atualizar(codigo)
+
+    def menores(self, k: int, so_abaixo: bool = False):
+        """Até k produtos com menor folga, como (codigo, estoque, minimo).
+
+        Com `so_abaixo`, para no primeiro produto que já está no mínimo.
+        """
+        resultado = {}  # codigo -> folga; uma entrada repetida (mesma folga) conta uma vez
+        with self._trava:
+            heap = self._heap
+            fronteira = [(heap[0], 0)] if heap else []
+            while fronteira and len(resultado) < k:
+                chave, i = heapq.heappop(fronteira)
+                folga, codigo = chave >> BITS_CODIGO, chave & MASCARA_CODIGO
+                if so_abaixo and folga >= 0:
+                    break
+                if self._folga(codigo) == folga:
+                    resultado[codigo] = folga
+                for filho in (2 * i + 1, 2 * i + 2):
+                    if filho < len(heap):
+                        heapq.heappush(fronteira, (heap[filho], filho))
+        return [(codigo, folga + self.minimo(codigo), self.minimo(codigo)) for codigo, folga in resultado.items()]
+
+    def abaixo_do_minimo(self, k: int):
+        return self.menores(k, so_abaixo=True)
+
+    def registrar(self, tipo: str, dados: dict):
+        if tipo in ("produto_cadastrado", "produto_editado", "produto_removido",
+                    "carrinho_adicionado", "carrinho_removido"):
+            self.atualizar(dados["codigo"])
+        elif tipo in ("produtos_atualizados", "produtos_cadastrados"):
+            for produto in dados["produtos"]:
+                self.atualizar(produto["codigo"])
+        elif tipo == "carrinho_expirado":
+            for codigo in dados["itens"]:
+                self.atualizar(int(codigo))
+
+    # =========================
+    # Mínimos por produto
+    # =========================
+
+    @staticmethod
+    def ler_minimos(caminho: str = ARQUIVO_MINIMOS):
+        if not os.path.exists(caminho):
+            return ESTOQUE_MINIMO_PADRAO, {}
+        with open(caminho, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("padrao", ESTOQUE_MINIMO_PADRAO), {int(c): m for c, m in data.get("minimos", {}).items()}
+
+    def salvar_minimos(self, caminho: str = ARQUIVO_MINIMOS):
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"padrao": self.padrao, "minimos": self.minimos}, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+
+
+_indice = None
+
+def obter_indice(produtos) -> IndiceReposicao:
+    """Índice do catálogo, construído na primeira consulta e mantido pelos eventos."""
+    global _indice
+    if _indice is None or _indice.produtos is not produtos:
+        if _indice is not None:
+            eventos.cancelar(_indice.registrar)
+        padrao, minimos = IndiceReposicao.ler_minimos()
+        _indice = IndiceReposicao(produtos, minimos, padrao)
+        eventos.assinar(_indice.registrar)
+    return _indice
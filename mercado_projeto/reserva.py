@@ -0,0 +1,41 @@
+# reserva.py
+#
+# Reserva de estoque segura entre threads. Em vez de uma trava global,
+# cada produto cai em uma de NUM_TRAVAS travas (pelo código), então
+# carrinhos mexendo em produtos diferentes não disputam a mesma trava.
+# A conferência do estoque e o desconto acontecem dentro da trava, o que
+# impede duas compras simultâneas de venderem a mesma unidade.
+
+import contextlib
+import threading
+
+NUM_TRAVAS = 256
+
+_travas = [threading.Lock() for _ in range(NUM_TRAVAS)]
+
+def trava_do_produto(codigo: int) -> threading.Lock:
+    return _travas[hash(codigo) % NUM_TRAVAS]
+
+def reservar(produto, quantidade: int) -> bool:
+    """Desconta `quantidade` do estoque se houver o suficiente."""
+    with trava_do_produto(produto.codigo):
+        if produto.estoque < quantidade:
+            return False
+        produto.estoque -= quantidade
+        return True
+
+def liberar(produto, quantidade: int):
+    """Devolve ao estoque uma quantidade reservada antes."""
+    with trava_do_produto(produto.codigo):
+        produto.estoque += quantidade
+
+@contextlib.contextmanager
+def todas_as_travas():
+    """Bloqueia todas as reservas (para reorganizar o catálogo inteiro)."""
+    for trava in _travas:
+        trava.acquire()
+    try:
+        yield
+    finally:
+        for trava in reversed(_travas):
+            trava.release()
@@ -0,0 +1,181 @@
+# sessoes.py
+#
+# Vários carrinhos ao mesmo tempo, um por cliente. Um carrinho parado há
+# mais de `ttl` segundos expira: o que estava reservado volta para o
+# estoque e o carrinho é descartado.
+#
+# Os prazos ficam num heap (prazo, n, cliente, carrinho). O Carrinho só
+# atualiza o próprio `ultimo_acesso`; quando uma entrada chega ao topo do
+# heap o prazo real é conferido e, se o carrinho foi usado nesse meio
+# tempo, ele volta para o heap com o prazo novo. Assim cada carrinho tem
+# uma entrada só e expirar custa O(log n) por carrinho.
+#
+# Quando um preço muda, só os carrinhos que têm o produto são refeitos: o
+# gerenciador mantém um índice codigo -> carrinhos, atualizado pelo próprio
+# Carrinho quando um produto entra ou sai dele.
+
+import heapq
+import itertools
+import threading
+import time
+from eventos import publicar
+from models import Carrinho, CLIENTE_LOCAL
+
+TTL_PADRAO = 30 * 60        # segundos sem uso até o carrinho expirar
+INTERVALO_EXPIRACAO = 30    # segundos entre verificações da thread de expiração
+
+
+class GerenciadorCarrinhos:
+    def __init__(self, ttl: float = TTL_PADRAO, relogio=time.time):
+        self.ttl = ttl
+        self.relogio = relogio
+        self.fabrica = Carrinho  # fabrica(cliente) cria cada carrinho novo
+        self._carrinhos = {}
+        self._por_produto = {}  # codigo -> set de carrinhos com o produto
+        self._prazos = []
+        self._contador = itertools.count()
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._carrinhos)
+
+    def __contains__(self, cliente):
+        return cliente in self._carrinhos
+
+    def __iter__(self):
+        return iter(list(self._carrinhos.values()))
+
+    def obter(self, cliente: str = CLIENTE_LOCAL, ultimo_acesso: float = None) -> Carrinho:
+        """Carrinho do cliente; cria um novo se ele não tiver.
+
+        `ultimo_acesso` é usado ao restaurar carrinhos do disco, para que o
+        prazo continue contando de onde parou.
+        """
+        with self._trava:
+            carrinho = self._carrinhos.get(cliente)
+            if carrinho is None:
+                carrinho = self._carrinhos[cliente] = self.fabrica(cliente)
+                carrinho.gerenciador = self
+                if ultimo_acesso is not None:
+                    carrinho.ultimo_acesso = ultimo_acesso
+                self._agendar(carrinho)
+            elif ultimo_acesso is not None:
+                carrinho.ultimo_acesso = max(carrinho.ultimo_acesso, ultimo_acesso)
+            return carrinho
+
+    def usar_fabrica(self, fabrica):
+        """Cria os carrinhos com `fabrica(cliente)` daqui em diante e refaz os
+        já abertos com ela: mesmos itens e prazo, sem mexer no estoque."""
+        with self._trava:
+            self.fabrica = fabrica
+            antigos = list(self._carrinhos.values())
+        # Fora da trava do gerenciador: entregar e incluir tomam a do carrinho.
+        for antigo in antigos:
+            novo = fabrica(antigo.cliente)
+            novo.gerenciador = self
+            novo.ultimo_acesso = antigo.ultimo_acesso
+            for item in antigo.entregar().values():
+                novo.incluir(item["produto"], item["quantidade"])
+            with self._trava:
+                if self._carrinhos.get(antigo.cliente) is antigo:
+                    self._carrinhos[antigo.cliente] = novo
+                    self._agendar(novo)
+
+    def _agendar(self, carrinho: Carrinho):
+        prazo = carrinho.ultimo_acesso + self.ttl
+        heapq.heappush(self._prazos, (prazo, next(self._contador), carrinho.cliente, carrinho))
+
+    def retirar(self, cliente: str):
+        """Tira o carrinho do gerenciador sem mexer no estoque."""
+        with self._trava:
+            return self._carrinhos.pop(cliente, None)
+
+    def descartar(self, cliente: str):
+        """Remove o carrinho do cliente, devolvendo os itens ao estoque."""
+        carrinho = self.retirar(cliente)
+        if carrinho is not None:
+            self._liberar(carrinho)
+
+    def indexar(self, carrinho: Carrinho, codigos):
+        # Chamado pelo Carrinho, com a trava dele: a ordem é sempre carrinho -> gerenciador.
+        with self._trava:
+            for codigo in codigos:
+                self._por_produto.setdefault(codigo, set()).add(carrinho)
+
+    def desindexar(self, carrinho: Carrinho, codigos):
+        with self._trava:
+            for codigo in codigos:
+                carrinhos = self._por_produto.get(codigo)
+                if carrinhos is not None:
+                    carrinhos.discard(carrinho)
+                    if not carrinhos:
+                        del self._por_produto[codigo]
+
+    def reprecificar(self, codigo: int):
+        """Recalcula a linha do produto cujo preço mudou, só nos carrinhos que o têm."""
+        self.reprecificar_varios((codigo,))
+
+    def reprecificar_varios(self, codigos):
+        """Como `reprecificar`, para um lote de produtos."""
+        with self._trava:
+            afetados = [(codigo, list(self._por_produto.get(codigo, ()))) for codigo in set(codigos)]
+        # Fora da trava do gerenciador: reprecificar toma a trava do carrinho.
+        for codigo, carrinhos in afetados:
+            for carrinho in carrinhos:
+                carrinho.reprecificar(codigo)
+
+    def registrar(self, tipo: str, dados: dict):
+        """Ouvinte de eventos: mantém os totais dos carrinhos quando um preço muda."""
+        if tipo == "produto_editado":
+            self.reprecificar(dados["codigo"])
+        elif tipo == "produtos_atualizados":
+            self.reprecificar_varios(p["codigo"] for p in dados["produtos"])
+
+    def _liberar(self, carrinho: Carrinho):
+        itens = carrinho.encerrar()
+        if itens:
+            publicar("carrinho_expirado", cliente=carrinho.cliente,
+                     itens={codigo: item["quantidade"] for codigo, item in itens.items()})
+
+    def expirar(self, agora: float = None):
+        """Descarta os carrinhos parados há mais de `ttl`. Retorna os clientes expirados."""
+        agora = self.relogio() if agora is None else agora
+        vencidos = []
+        with self._trava:
+            while self._prazos and self._prazos[0][0] <= agora:
+                _, _, cliente, carrinho = heapq.heappop(self._prazos)
+                if self._carrinhos.get(cliente) is not carrinho:
+                    continue  # entrada de um carrinho já descartado
+                if carrinho.ultimo_acesso + self.ttl > agora:
+                    self._agendar(carrinho)
+                    continue
+                del self._carrinhos[cliente]
+                vencidos.append(carrinho)
+        for carrinho in vencidos:
+            self._liberar(carrinho)
+        return [carrinho.cliente for carrinho in vencidos]
+
+    def iniciar_expiracao(self, intervalo: float = INTERVALO_EXPIRACAO):
+        """Roda `expirar` periodicamente numa thread em segundo plano."""
+        def laco():
+            while not self._parar.wait(intervalo):
+                self.expirar()
+        self._parar.clear()
+        self._thread = threading.Thread(target=laco, name="expiracao-carrinhos", daemon=True)
+        self._thread.start()
+
+    def parar_expiracao(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def to_dict(self):
+        return {cliente: {"ultimo_acesso": c.ultimo_acesso, "itens": c.to_dict()}
+                for cliente, c in list(self._carrinhos.items()) if c.itens}
+
+    def from_dict(self, data, produtos):
+        for cliente, info in data.items():
+            self.obter(cliente, info["ultimo_acesso"]).from_dict(info["itens"], produtos)
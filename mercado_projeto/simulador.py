@@ -0,0 +1,267 @@
+# simulador.py
+#
+# Gerador de carga: N clientes simulados (threads), cada um com o seu
+# Carrinho, fazem uma mistura configurável de operações direto no
+# catálogo e nos carrinhos, sem menus:
+#
+#   navegar    uma página do catálogo e o detalhe de um produto
+#   adicionar  Carrinho.adicionar (1 a 3 unidades)
+#   remover    Carrinho.remover de um item do carrinho
+#   finalizar  Carrinho.finalizar
+#   editar     edição de admin: preço novo e reposição de estoque
+#
+# A popularidade dos produtos segue uma distribuição de Zipf (expoente
+# --zipf): o produto de posição k é escolhido com peso 1/k^s, e as
+# posições são embaralhadas pela semente, para a popularidade não
+# coincidir com a ordem dos códigos. As páginas navegadas também seguem
+# Zipf (as primeiras são as mais vistas).
+#
+# Ao final mostra a vazão, os percentis de latência de cada operação
+# (histograma do metricas.py) e a taxa de conflito de estoque (adições
+# recusadas por falta de estoque), e confere que nenhuma unidade sumiu ou
+# foi vendida duas vezes. Os carrinhos são de um GerenciadorCarrinhos
+# inscrito nos eventos, como na sessão do menu: uma edição de preço refaz
+# o total dos carrinhos que têm o produto.
+#
+# A sequência de operações de cada cliente sai da semente; com mais de um
+# cliente, o resultado de cada uma depende também da ordem em que as
+# threads rodam. Com --reprodutivel os clientes rodam numa thread só,
+# intercalados numa ordem sorteada pela semente: a mesma semente dá o
+# mesmo resultado (sem medir a disputa entre threads).
+#
+# Uso: python simulador.py [--clientes 16] [--operacoes 5000] [--produtos 10000]
+#                          [--estoque 50] [--zipf 1.1] [--semente 42] [--reprodutivel]
+#                          [--mix navegar=50,adicionar=25,remover=8,finalizar=12,editar=5]
+#                          [--ouvintes] [--saida resultado.json]
+
+import argparse
+import bisect
+import contextlib
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from catalogo import ProdutoStore
+from interface import alterar_produto, contar_paginas, pagina_de_produtos
+import eventos
+from metricas import Histograma
+from sessoes import GerenciadorCarrinhos
+
+OPERACOES = ("navegar", "adicionar", "remover", "finalizar", "editar")
+MIX_PADRAO = "navegar=50,adicionar=25,remover=8,finalizar=12,editar=5"
+
+
+class Zipf:
+    """Sorteia posições 0..n-1 com peso 1/(posição+1)^s."""
+
+    def __init__(self, n: int, s: float):
+        self._acumulado = list(itertools.accumulate(1 / (k ** s) for k in range(1, n + 1)))
+        self._total = self._acumulado[-1]
+
+    def sortear(self, aleatorio) -> int:
+        return bisect.bisect_left(self._acumulado, aleatorio.random() * self._total)
+
+
+def ler_mix(texto: str):
+    mix = {}
+    for parte in texto.split(","):
+        operacao, _, peso = parte.partition("=")
+        operacao = operacao.strip()
+        if operacao not in OPERACOES:
+            raise ValueError(f"operação desconhecida: {operacao!r} (use {', '.join(OPERACOES)})")
+        try:
+            mix[operacao] = float(peso)
+        except ValueError:
+            raise ValueError(f"peso inválido para {operacao}: {peso!r}") from None
+    if not any(peso > 0 for peso in mix.values()):
+        raise ValueError("a mistura precisa de ao menos uma operação com peso > 0")
+    return mix
+
+
+class Simulacao:
+    def __init__(self, produtos, mix, zipf: float = 1.1, semente: int = 42):
+        self.produtos = produtos
+        self.operacoes, self.pesos = zip(*mix.items())
+        self.semente = semente
+        self.codigos = list(produtos)
+        random.Random(semente).shuffle(self.codigos)  # posição de popularidade -> código
+        self.popularidade = Zipf(len(self.codigos), zipf)
+        self.paginas = Zipf(contar_paginas(produtos), zipf)
+        self.latencias = {operacao: Histograma() for operacao in OPERACOES}
+        self.sessoes = GerenciadorCarrinhos()
+        self._trava = threading.Lock()
+        self.contagem = dict.fromkeys(("adicoes", "recusadas", "vendidas", "repostas", "vazias"), 0)
+
+    def _somar(self, **valores):
+        with self._trava:
+            for chave, valor in valores.items():
+                self.contagem[chave] += valor
+
+    def _produto(self, aleatorio):
+        return self.produtos[self.codigos[self.popularidade.sortear(aleatorio)]]
+
+    # Cada operação devolve o que contar em `contagem`.
+
+    def navegar(self, carrinho, aleatorio):
+        pagina_de_produtos(self.produtos, self.paginas.sortear(aleatorio) + 1, None)
+        self._produto(aleatorio).to_dict()
+
+    def adicionar(self, carrinho, aleatorio):
+        if carrinho.adicionar(self._produto(aleatorio), aleatorio.randint(1, 3)):
+            self._somar(adicoes=1)
+        else:
+            self._somar(adicoes=1, recusadas=1)
+
+    def remover(self, carrinho, aleatorio):
+        if not carrinho.itens:
+            self._somar(vazias=1)
+            return
+        carrinho.remover(aleatorio.choice(list(carrinho.itens)))
+
+    def finalizar(self, carrinho, aleatorio):
+        if not carrinho.itens:
+            self._somar(vazias=1)
+            return
+        unidades = sum(item["quantidade"] for item in carrinho.itens.values())
+        carrinho.finalizar()
+        self._somar(vendidas=unidades)
+
+    def editar(self, carrinho, aleatorio):
+        produto = self._produto(aleatorio)
+        reposicao = aleatorio.randint(0, 10)
+        # A reposição é uma variação: `alterar_produto` soma sob a trava do
+        # produto, sem perder uma reserva feita por outro cliente no meio.
+        alterar_produto(produto, produto.nome, max(produto.preco + aleatorio.randint(-50, 50), 1),
+                        ajuste=reposicao)
+        self._somar(repostas=reposicao)
+
+    def _passos(self, indice: int, operacoes: int, carrinhos):
+        """Executa as operações do cliente, uma a cada `next`."""
+        aleatorio = random.Random(self.semente * 1_000_003 + indice)
+        carrinho = carrinhos[indice]
+        relogio = time.perf_counter_ns
+        escolhas = aleatorio.choices(self.operacoes, self.pesos, k=operacoes)
+        for operacao in escolhas:
+            funcao = getattr(self, operacao)
+            inicio = relogio()
+            funcao(carrinho, aleatorio)
+            self.latencias[operacao].registrar(relogio() - inicio)
+            yield
+
+    def _cliente(self, indice: int, operacoes: int, carrinhos):
+        for _ in self._passos(indice, operacoes, carrinhos):
+            pass
+
+    def _intercalar(self, clientes: int, operacoes: int, carrinhos):
+        # Uma thread só; a vez de cada cliente é sorteada pela semente.
+        ordem = random.Random(self.semente)
+        ativos = [self._passos(i, operacoes, carrinhos) for i in range(clientes)]
+        while ativos:
+            passos = ordem.choice(ativos)
+            if next(passos, StopIteration) is StopIteration:
+                ativos.remove(passos)
+
+    def executar(self, clientes: int, operacoes: int, reprodutivel: bool = False):
+        estoque_inicial = sum(p.estoque for p in self.produtos.values())
+        carrinhos = [self.sessoes.obter(f"simulado-{i}") for i in range(clientes)]
+        threads = [threading.Thread(target=self._cliente, args=(i, operacoes, carrinhos), name=f"cliente-{i}")
+                   for i in range(clientes)]
+        # Preço editado: os carrinhos com o produto são refeitos pelo gerenciador.
+        eventos.assinar(self.sessoes.registrar)
+        # As mensagens do Carrinho não interessam aqui.
+        try:
+            with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                inicio = time.perf_counter()
+                if reprodutivel:
+                    self._intercalar(clientes, operacoes, carrinhos)
+                else:
+                    for t in threads:
+                        t.start()
+                    for t in threads:
+                        t.join()
+                decorrido = time.perf_counter() - inicio
+        finally:
+            eventos.cancelar(self.sessoes.registrar)
+
+        # Conservação: estoque + carrinhos + vendido == inicial + reposto.
+        nos_carrinhos = sum(item["quantidade"] for c in carrinhos for item in c.itens.values())
+        estoque_final = sum(p.estoque for p in self.produtos.values())
+        assert all(p.estoque >= 0 for p in self.produtos.values()), "estoque negativo"
+        assert estoque_final + nos_carrinhos + self.contagem["vendidas"] == \
+            estoque_inicial + self.contagem["repostas"], "unidades sumiram ou foram vendidas duas vezes"
+        assert all(c.total == sum(item["produto"].preco * item["quantidade"] for item in c.itens.values())
+                   for c in carrinhos), "total de carrinho com preço antigo"
+
+        total = clientes * operacoes
+        adicoes = self.contagem["adicoes"]
+        return {
+            "clientes": clientes,
+            "operacoes": total,
+            "segundos": round(decorrido, 3),
+            "operacoes_por_segundo": round(total / decorrido, 1),
+            "conflitos_estoque": self.contagem["recusadas"],
+            "taxa_conflito": round(self.contagem["recusadas"] / adicoes, 4) if adicoes else 0.0,
+            "operacoes_sem_efeito": self.contagem["vazias"],
+            "unidades_vendidas": self.contagem["vendidas"],
+            "unidades_repostas": self.contagem["repostas"],
+            "latencias": {op: h.resumo() for op, h in self.latencias.items() if h.chamadas},
+        }
+
+
+def catalogo_sintetico(tamanho: int, estoque: int, semente: int) -> ProdutoStore:
+    aleatorio = random.Random(semente)
+    return ProdutoStore.from_dicts(
+        {"codigo": c, "nome": f"produto {c}", "preco": round(aleatorio.uniform(1, 100), 2), "estoque": estoque}
+        for c in range(1, tamanho + 1)
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simula clientes concorrentes sobre o catálogo e os carrinhos.")
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--operacoes", type=int, default=5000, help="operações por cliente")
+    parser.add_argument("--produtos", type=int, default=10_000)
+    parser.add_argument("--estoque", type=int, default=50, help="estoque inicial de cada produto")
+    parser.add_argument("--zipf", type=float, default=1.1, help="expoente da popularidade (0 = uniforme)")
+    parser.add_argument("--semente", type=int, default=42,
+                        help="sequência de operações de cada cliente; com mais de um cliente, o resultado "
+                             "só se repete com --reprodutivel")
+    parser.add_argument("--reprodutivel", action="store_true",
+                        help="clientes intercalados numa thread só, na ordem sorteada pela semente")
+    parser.add_argument("--mix", default=MIX_PADRAO, help="pesos das operações, ex.: " + MIX_PADRAO)
+    parser.add_argument("--ouvintes", action="store_true",
+                        help="mantém os índices de busca, reposição e versões (custo dos eventos incluído)")
+    parser.add_argument("--saida", help="grava o resultado em JSON")
+    args = parser.parse_args(argv)
+    try:
+        mix = ler_mix(args.mix)
+    except ValueError as erro:
+        parser.error(str(erro))
+
+    produtos = catalogo_sintetico(args.produtos, args.estoque, args.semente)
+    if args.ouvintes:
+        import busca, reposicao, versoes
+        busca.obter_indice(produtos)
+        reposicao.obter_indice(produtos)
+        versoes.obter_catalogo(produtos).atual()  # tira o retrato da versão 0
+    simulacao = Simulacao(produtos, mix, args.zipf, args.semente)
+    resultado = simulacao.executar(args.clientes, args.operacoes, args.reprodutivel)
+    resultado.update(semente=args.semente, reprodutivel=args.reprodutivel, zipf=args.zipf, mix=mix, produtos=args.produtos)
+
+    print(f"{resultado['clientes']} clientes, {resultado['operacoes']} operações em {resultado['segundos']:.2f} s: "
+          f"{resultado['operacoes_por_segundo']:,.0f} operações/s")
+    print(f"Conflitos de estoque: {resultado['conflitos_estoque']} de {simulacao.contagem['adicoes']} adições "
+          f"({resultado['taxa_conflito']:.1%})")
+    print(f"\n{'operação':<10} {'chamadas':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}")
+    for operacao, r in resultado["latencias"].items():
+        print(f"{operacao:<10} {r['chamadas']:>9} {r['p50_ms']:>9.4f} {r['p95_ms']:>9.4f} "
+              f"{r['p99_ms']:>9.4f} {r['max_ms']:>9.4f}")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=4)
+        print(f"\nResultado gravado em {args.saida}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+# snapshot_binario.py
+#
+# Snapshot binário do catálogo, lido por mmap. Layout (little-endian):
+#
+#   cabeçalho   CABECALHO: mágico, versão, nº de registros, seq e a
+#               tabela de seções (offset, tamanho) abaixo
+#   registros   um registro de CAMPOS int64 por produto:
+#               codigo, preco (centavos), estoque, inicio do nome, tamanho do nome
+#   índice      int64 por código: linha do registro, ou -1
+#   textos      nomes em UTF-8, um atrás do outro
+#   extras      JSON com os carrinhos e os admins (pequenos)
+#
+# `abrir` mapeia o arquivo em modo cópia-na-escrita e monta um
+# `CatalogoMapeado` cujas colunas são memoryviews (com passo) sobre os
+# registros: abrir é quase instantâneo, nada é copiado, e um nome só é
+# decodificado quando o produto é acessado. Estoque e preço são alterados
+# direto nas páginas mapeadas (o arquivo em disco nunca muda; as
+# alterações vão para o diário). Só cadastrar um produto ou trocar um nome
+# copia as colunas para a memória, porque aí elas precisam crescer.
+#
+# Cada snapshot gravado é uma geração nova, com nome próprio (mercado.bin.1,
+# mercado.bin.2, ...), e `abrir` lê a mais recente. Um arquivo mapeado não
+# pode ser substituído nem apagado no Windows, e a sessão mantém o snapshot
+# mapeado enquanto a compactação grava o próximo; por isso o snapshot novo
+# nunca ocupa o nome de um antigo. As gerações anteriores são apagadas
+# depois de cada gravação, quando o sistema deixa (no Windows, a que ainda
+# estiver mapeada fica para a próxima).
+#
+# Uso: python snapshot_binario.py para-binario mercado.json mercado.bin
+#      python snapshot_binario.py para-json mercado.bin mercado.json
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from catalogo import ProdutoStore, VAZIO
+from reserva import todas_as_travas
+
+MAGICO = b"MERCBIN\0"
+VERSAO = 1
+CAMPOS = 5  # codigo, preco, estoque, inicio_nome, tamanho_nome
+CODIGO, PRECO, ESTOQUE, INICIO_NOME, TAMANHO_NOME = range(CAMPOS)
+SECOES = ("registros", "indice", "textos", "extras")
+CABECALHO = struct.Struct("<8sIIqq" + "qq" * len(SECOES))
+
+
+def _alinhar(posicao: int) -> int:
+    return (posicao + 7) & ~7
+
+
+class CatalogoMapeado(ProdutoStore):
+    """ProdutoStore cujas colunas apontam para o arquivo mapeado."""
+
+    def __init__(self, mapa, secoes, total: int):
+        super().__init__()
+        self._mapa = mapa
+        inicio, tamanho = secoes["registros"]
+        campos = memoryview(mapa)[inicio:inicio + tamanho].cast("q")
+        self._codigos = campos[CODIGO::CAMPOS]
+        self._precos = campos[PRECO::CAMPOS]
+        self._estoques = campos[ESTOQUE::CAMPOS]
+        self._inicio_nome = campos[INICIO_NOME::CAMPOS]
+        self._tamanho_nome = campos[TAMANHO_NOME::CAMPOS]
+        inicio, tamanho = secoes["indice"]
+        self._linha_por_codigo = memoryview(mapa)[inicio:inicio + tamanho].cast("q")
+        inicio, tamanho = secoes["textos"]
+        self._textos = memoryview(mapa)[inicio:inicio + tamanho]
+        self._tamanho = total
+
+    @property
+    def mapeado(self) -> bool:
+        return isinstance(self._codigos, memoryview)
+
+    def _materializar(self):
+        """Copia as colunas do mapa para arrays/bytearray, que podem crescer."""
+        if not self.mapeado:
+            return
+        with todas_as_travas():
+            self._codigos = array("q", self._codigos)
+            self._precos = array("q", self._precos)
+            self._estoques = array("q", self._estoques)
+            self._inicio_nome = array("q", self._inicio_nome)
+            self._tamanho_nome = array("l", self._tamanho_nome)
+            self._linha_por_codigo = array("q", self._linha_por_codigo)
+            self._textos = bytearray(self._textos)
+
+    def _nomes_fixos(self):
+        # Enquanto mapeados, offsets e nomes nunca mudam no lugar (trocar um
+        # nome materializa antes): o retrato lê o próprio arquivo.
+        if self.mapeado:
+            return self._inicio_nome, self._tamanho_nome, self._textos
+        return super()._nomes_fixos()
+
+    def _guardar_texto(self, nome: str):
+        self._materializar()
+        return super()._guardar_texto(nome)
+
+    def _inserir(self, codigo: int, nome: str, preco: int, estoque: int):
+        if self._linha(codigo) == VAZIO:
+            self._materializar()
+        super()._inserir(codigo, nome, preco, estoque)
+
+
+# =========================
+# Gerações
+# =========================
+
+def _geracoes(caminho: str):
+    """[(numero, arquivo)] das gerações de `caminho` no disco, da mais antiga à mais nova."""
+    pasta = os.path.dirname(caminho) or "."
+    prefixo = os.path.basename(caminho) + "."
+    geracoes = [(0, caminho)] if os.path.exists(caminho) else []  # nome sem número: formato antigo
+    for nome in os.listdir(pasta):
+        if nome.startswith(prefixo) and nome[len(prefixo):].isdigit():
+            geracoes.append((int(nome[len(prefixo):]), os.path.join(os.path.dirname(caminho), nome)))
+    return sorted(geracoes)
+
+def atual(caminho: str):
+    """Arquivo da geração mais nova de `caminho`, ou None se não houver snapshot."""
+    geracoes = _geracoes(caminho)
+    return geracoes[-1][1] if geracoes else None
+
+def _apagar_antigas(caminho: str, manter: str):
+    for _, arquivo in _geracoes(caminho):
+        if arquivo != manter:
+            try:
+                os.remove(arquivo)
+            except OSError:
+                pass  # ainda mapeada (Windows): sai na próxima gravação
+
+# =========================
+# Leitura
+# =========================
+
+def abrir(caminho: str):
+    """Retorna (CatalogoMapeado, extras, seq) da geração mais nova, sem ler os produtos."""
+    arquivo = atual(caminho)
+    if arquivo is None:
+        raise FileNotFoundError(caminho)
+    with open(arquivo, "rb") as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    magico, versao, campos, total, seq, *tabela = CABECALHO.unpack_from(mapa, 0)
+    if magico != MAGICO or versao != VERSAO or campos != CAMPOS:
+        raise ValueError(f"{caminho}: não é um snapshot binário do mercado (versão {VERSAO})")
+    secoes = {nome: (tabela[2 * i], tabela[2 * i + 1]) for i, nome in enumerate(SECOES)}
+    inicio, tamanho = secoes["extras"]
+    extras = json.loads(mapa[inicio:inicio + tamanho]) if tamanho else {}
+    if sys.byteorder != "little":
+        # As colunas mapeadas seguem a ordem nativa; aqui é preciso converter.
+        catalogo = ProdutoStore.from_dicts(_dicts(CatalogoMapeado(mapa, secoes, total), trocar_bytes=True))
+        mapa.close()
+        return catalogo, extras, seq
+    return CatalogoMapeado(mapa, secoes, total), extras, seq
+
+def _dicts(catalogo, trocar_bytes=False):
+    def valor(x):
+        return int.from_bytes(x.to_bytes(8, "little", signed=True), "big", signed=True) if trocar_bytes else x
+    textos = catalogo._textos
+    for linha, codigo in enumerate(catalogo._codigos):
+        codigo = valor(codigo)
+        if codigo != VAZIO:
+            inicio = valor(catalogo._inicio_nome[linha])
+            nome = str(textos[inicio:inicio + valor(catalogo._tamanho_nome[linha])], "utf-8")
+            yield {"codigo": codigo, "nome": nome, "preco": valor(catalogo._precos[linha]) / 100,
+                   "estoque": valor(catalogo._estoques[linha])}
+
+# =========================
+# Escrita
+# =========================
+
+def salvar(caminho: str, linhas, extras: dict, seq: int):
+    """Grava o snapshot como uma geração nova de `caminho`, de forma atômica.
+
+    `linhas` gera (codigo, nome, preco em centavos, estoque), como
+    `ProdutoStore.linhas()`.
+    """
+    registros = array("q")
+    textos = bytearray()
+    maior_codigo = -1
+    for codigo, nome, preco, estoque in linhas:
+        dados = nome.encode("utf-8")
+        registros.extend((codigo, preco, estoque, len(textos), len(dados)))
+        textos += dados
+        maior_codigo = max(maior_codigo, codigo)
+    indice = array("q", [VAZIO]) * (maior_codigo + 1)
+    for linha in range(len(registros) // CAMPOS):
+        indice[registros[linha * CAMPOS + CODIGO]] = linha
+    corpo = {
+        "registros": registros.tobytes() if sys.byteorder == "little" else _trocado(registros),
+        "indice": indice.tobytes() if sys.byteorder == "little" else _trocado(indice),
+        "textos": bytes(textos),
+        "extras": json.dumps(extras, ensure_ascii=False).encode("utf-8"),
+    }
+    tabela = []
+    posicao = CABECALHO.size
+    for nome in SECOES:
+        posicao = _alinhar(posicao)
+        tabela += [posicao, len(corpo[nome])]
+        posicao += len(corpo[nome])
+
+    geracoes = _geracoes(caminho)
+    destino = f"{caminho}.{geracoes[-1][0] + 1 if geracoes else 1}"
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(CABECALHO.pack(MAGICO, VERSAO, CAMPOS, len(registros) // CAMPOS, seq, *tabela))
+        for i, nome in enumerate(SECOES):
+            f.write(b"\0" * (tabela[2 * i] - f.tell()))
+            f.write(corpo[nome])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, destino)  # nome novo: nenhum processo tem esse arquivo mapeado
+    _apagar_antigas(caminho, destino)
+
+def _trocado(valores: array) -> bytes:
+    copia = array(valores.typecode, valores)
+    copia.byteswap()
+    return copia.tobytes()
+
+# =========================
+# Conversão de/para mercado.json
+# =========================
+
+def json_para_binario(origem: str, destino: str):
+    from utils import para_centavos
+    with open(origem, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    linhas = ((p["codigo"], p["nome"], para_centavos(p["preco"]), p["estoque"])
+              for p in data.get("produtos", []))
+    extras = {chave: data[chave] for chave in ("carrinho", "carrinhos", "admins") if chave in data}
+    salvar(destino, linhas, extras, data.get("seq", 0))
+
+def binario_para_json(origem: str, destino: str):
+    catalogo, extras, seq = abrir(origem)
+    temporario = destino + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write('{\n    "seq": %d,\n    "produtos": [' % seq)
+        separador = "\n"
+        for produto in _dicts(catalogo):
+            f.write(separador + "        " + json.dumps(produto, ensure_ascii=False))
+            separador = ",\n"
+        f.write("\n    ]")
+        for chave, valor in extras.items():
+            f.write(',\n    "%s": %s' % (chave, json.dumps(valor, ensure_ascii=False)))
+        f.write("\n}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, destino)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converte o snapshot entre JSON e binário.")
+    parser.add_argument("direcao", choices=("para-binario", "para-json"))
+    parser.add_argument("origem")
+    parser.add_argument("destino")
+    args = parser.parse_args(argv)
+    if args.direcao == "para-binario":
+        json_para_binario(args.origem, args.destino)
+    else:
+        binario_para_json(args.origem, args.destino)
+    print(f"{args.origem} -> {args.destino}")
+
+if __name__ == "__main__":
+    main()
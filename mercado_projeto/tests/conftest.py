@@ -0,0 +1,38 @@
+# conftest.py
+#
+# Os módulos do mercado_projeto se importam pelo nome (`import eventos`),
+# como quando rodam de dentro da pasta; os testes fazem o mesmo. Os
+# arquivos de dados (mercado.json, diário, ...) ficam na pasta atual, então
+# cada teste roda numa pasta temporária própria.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import eventos
+
+
+@pytest.fixture(autouse=True)
+def pasta_temporaria(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def ouvintes():
+    # Índices e persistência se inscrevem em `eventos`; um teste não deixa
+    # ouvintes para o próximo.
+    antes = list(eventos._ouvintes)
+    yield
+    eventos._ouvintes[:] = antes
+
+
+@pytest.fixture
+def catalogo():
+    from catalogo import ProdutoStore
+    return ProdutoStore.from_dicts(
+        {"codigo": c, "nome": f"produto {c}", "preco": 2.5, "estoque": 20} for c in range(1, 51)
+    )
@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+
+import banco_sqlite
+from credenciais import conferir_hash
+
+
+def _banco_antigo(caminho):
+    # Formato de antes dos hashes: senha em texto puro.
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("CREATE TABLE admins (cpf TEXT PRIMARY KEY, senha TEXT NOT NULL)")
+    conexao.execute("INSERT INTO admins (cpf, senha) VALUES ('11122233344', 'segredo')")
+    conexao.commit()
+    conexao.close()
+
+
+def test_migracao_troca_senhas_por_hashes(pasta_temporaria):
+    caminho = str(pasta_temporaria / "mercado.db")
+    _banco_antigo(caminho)
+
+    conexao = banco_sqlite.abrir(caminho)
+    colunas = [linha[1] for linha in conexao.execute("PRAGMA table_info(admins)")]
+    assert colunas == ["cpf", "senha_hash"]
+    (cpf, senha_hash), = conexao.execute("SELECT cpf, senha_hash FROM admins").fetchall()
+    assert cpf == "11122233344"
+    assert conferir_hash("segredo", senha_hash)
+    conexao.close()
+
+
+class ConexaoQueFalha(sqlite3.Connection):
+    # Simula uma falha entre o DROP da tabela antiga e o fim da migração.
+    def execute(self, sql, *args):
+        if sql.startswith("ALTER TABLE"):
+            raise sqlite3.OperationalError("falha simulada")
+        return super().execute(sql, *args)
+
+
+def test_migracao_interrompida_nao_perde_os_admins(pasta_temporaria):
+    caminho = str(pasta_temporaria / "mercado.db")
+    _banco_antigo(caminho)
+
+    conexao = sqlite3.connect(caminho, factory=ConexaoQueFalha)
+    with pytest.raises(sqlite3.OperationalError):
+        banco_sqlite._migrar_senhas(conexao)
+    conexao.close()
+
+    conexao = sqlite3.connect(caminho)
+    assert conexao.execute("SELECT cpf, senha FROM admins").fetchall() == [("11122233344", "segredo")]
+    tabelas = {nome for (nome,) in conexao.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "admins_novo" not in tabelas
+    conexao.close()
+
+
+def test_leitura_nao_migra_e_fecha_a_conexao(pasta_temporaria, monkeypatch):
+    import persistencia
+    _banco_antigo(str(pasta_temporaria / "mercado.db"))
+    monkeypatch.setattr(persistencia, "FORMATO_DADOS", "sqlite")
+
+    produtos, sessoes, admins = persistencia.ler_dados()
+    assert admins.verificar("11122233344", "segredo")
+    conexao = persistencia._leitura.conexao
+    persistencia.fechar_dados()
+
+    assert persistencia._leitura is None
+    with pytest.raises(sqlite3.ProgrammingError):
+        conexao.execute("SELECT 1")
+    # O banco continua no formato antigo: quem migra é a sessão de escrita.
+    conexao = sqlite3.connect(str(pasta_temporaria / "mercado.db"))
+    assert [linha[1] for linha in conexao.execute("PRAGMA table_info(admins)")] == ["cpf", "senha"]
+    conexao.close()
@@ -0,0 +1,55 @@
+import math
+
+import cadastro
+from cadastro import CADASTRADO, DUPLICADO, INVALIDO, Cadastro
+
+
+def test_resultado_por_linha_na_ordem_de_entrada(catalogo):
+    linhas = [
+        (2, {"nome": "Café 500g", "preco": "18,90", "estoque": "7"}),
+        (3, {"nome": "  cafe   500G ", "preco": "19", "estoque": "1"}),
+        (4, {"nome": "Açúcar", "preco": math.inf, "estoque": "3"}),
+        (5, {"nome": "Sal", "preco": "2", "estoque": "-1"}),
+        (6, None),
+        (7, {"nome": "produto 1", "preco": "1", "estoque": "1"}),
+    ]
+    resultados = Cadastro(catalogo).cadastrar_varios(linhas)
+
+    assert [(numero, status) for numero, status, _, _ in resultados] == [
+        (2, CADASTRADO), (3, DUPLICADO), (4, INVALIDO), (5, INVALIDO), (6, INVALIDO), (7, DUPLICADO)]
+    codigo = resultados[0][2]
+    assert catalogo[codigo].preco == 1890
+    assert resultados[1][2] == codigo
+    assert resultados[5][2] == 1
+    assert "preço inválido" in resultados[2][3]
+
+
+def test_nomes_com_o_mesmo_hash_nao_se_sobrepoem(catalogo, monkeypatch):
+    # Todo nome com o mesmo hash: só o texto normalizado distingue os produtos.
+    monkeypatch.setattr(cadastro, "hash", lambda _: 0, raising=False)
+    registro = Cadastro(catalogo)
+
+    assert registro.duplicado("produto 7") == 7
+    assert registro.duplicado("produto 42") == 42
+    assert registro.cadastrar("produto 51", "1", 1)[0] == CADASTRADO
+    assert registro.cadastrar("produto 9", "1", 1)[:2] == (DUPLICADO, 9)
+
+
+def test_lote_no_sqlite_e_gravado_de_uma_vez_sem_encher_o_cache(pasta_temporaria, catalogo):
+    import banco_sqlite
+    from credenciais import RegistroAdmins
+    from sessoes import GerenciadorCarrinhos
+
+    banco = banco_sqlite.BancoSQLite(str(pasta_temporaria / "mercado.db"))
+    banco.importar(catalogo, GerenciadorCarrinhos(), RegistroAdmins())
+    try:
+        linhas = [(n, {"nome": f"novo {n % 3}", "preco": "1", "estoque": "1"}) for n in range(6)]
+        resultados = Cadastro(banco.produtos).cadastrar_varios(linhas, tamanho_lote=2)
+
+        # Repetido dentro do mesmo lote e em lotes seguintes, antes e depois de gravar.
+        assert [status for _, status, _, _ in resultados] == [CADASTRADO] * 3 + [DUPLICADO] * 3
+        assert banco.produtos._cache == {}
+        assert len(banco.produtos) == 53
+        assert banco.produtos[resultados[2][2]].nome == "novo 2"
+    finally:
+        banco.fechar()
@@ -0,0 +1,47 @@
+import pytest
+
+from carga_fornecedor import aplicar_feed, interpretar
+
+
+@pytest.mark.parametrize("dados", [
+    {"codigo": 1, "preco": float("inf")},
+    {"codigo": 1, "preco": float("nan")},
+    {"codigo": 1, "estoque": float("inf")},
+    {"codigo": 1, "estoque": float("nan")},
+    {"codigo": float("inf")},
+    {"codigo": 1, "preco": "abc"},
+    None,
+])
+def test_linha_com_valor_que_nao_converte_e_rejeitada(dados):
+    with pytest.raises(ValueError):
+        interpretar(dados)
+
+
+def test_feed_segue_depois_de_uma_linha_invalida(catalogo):
+    rejeitadas = []
+    linhas = [(1, {"codigo": 1, "preco": float("inf")}), (2, {"codigo": 2, "estoque": "5"})]
+    resumo = aplicar_feed(linhas, catalogo, rejeitar=lambda *linha: rejeitadas.append(linha))
+
+    assert resumo["rejeitadas"] == 1 and resumo["aplicadas"] == 1
+    assert rejeitadas[0][:2] == (1, 1)
+    assert catalogo[1].preco == 250
+    assert catalogo[2].estoque == 25
+
+
+def test_feed_no_sqlite_nao_enche_o_cache(pasta_temporaria, catalogo):
+    import banco_sqlite
+    from credenciais import RegistroAdmins
+    from eventos import assinar
+    from sessoes import GerenciadorCarrinhos
+
+    banco = banco_sqlite.BancoSQLite(str(pasta_temporaria / "mercado.db"))
+    banco.importar(catalogo, GerenciadorCarrinhos(), RegistroAdmins())
+    assinar(banco.registrar)
+    try:
+        resumo = aplicar_feed(((n, {"codigo": n, "estoque": "1"}) for n in range(1, 11)), banco.produtos)
+        assert resumo["aplicadas"] == 10
+        assert banco.produtos._cache == {}
+        assert banco.produtos[3].estoque == 21
+    finally:
+        banco.fechar()
+
@@ -0,0 +1,76 @@
+import json
+
+import persistencia
+from diario import ler_registros
+from interface import alterar_produto, incluir_produto
+from models import CLIENTE_LOCAL
+
+
+def _gravar(caminho, linhas, final=""):
+    with open(caminho, "w", encoding="utf-8") as f:
+        for linha in linhas:
+            f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+        f.write(final)
+
+
+def test_sessao_sem_compactar_e_refeita_pelo_diario(capsys):
+    produtos, sessoes, _ = persistencia.carregar_dados()
+    _, codigo, _ = incluir_produto(produtos, "arroz", 1800, 10)
+    sessoes.obter(CLIENTE_LOCAL).adicionar(produtos[codigo], 3)
+    alterar_produto(produtos[codigo], "arroz 5kg", 2490, produtos[codigo].estoque)
+    persistencia.fechar_dados()  # fecha sem compactar: tudo só no diário
+    capsys.readouterr()
+
+    produtos, sessoes, _ = persistencia.carregar_dados()
+    try:
+        produto = produtos[codigo]
+        assert (produto.nome, produto.preco, produto.estoque) == ("arroz 5kg", 2490, 7)
+        carrinho = sessoes.obter(CLIENTE_LOCAL)
+        assert carrinho.itens[codigo]["quantidade"] == 3
+        assert carrinho.total == 3 * 2490  # o preço editado depois da reserva vale no carrinho
+    finally:
+        persistencia.fechar_dados()
+
+
+def test_linha_cortada_no_fim_do_diario_e_descartada():
+    registros = [
+        {"seq": 1, "tipo": "produto_cadastrado", "codigo": 1, "nome": "arroz", "preco": 18.0, "estoque": 10},
+        {"seq": 2, "tipo": "produto_editado", "codigo": 1, "nome": "arroz", "preco": 18.0, "estoque": 8},
+    ]
+    # Queda no meio da escrita do terceiro registro.
+    _gravar(persistencia.ARQUIVO_DIARIO, registros, final='{"seq": 3, "tipo": "produto_ed')
+
+    assert [r["seq"] for r in ler_registros(persistencia.ARQUIVO_DIARIO)] == [1, 2]
+    produtos = persistencia.ler_dados()[0]
+    assert produtos[1].estoque == 8
+
+
+def test_registros_ja_no_snapshot_nao_sao_reaplicados():
+    with open(persistencia.ARQUIVO_DADOS, "w", encoding="utf-8") as f:
+        json.dump({"seq": 2, "produtos": [{"codigo": 1, "nome": "arroz", "preco": 18.0, "estoque": 5}]}, f)
+    _gravar(persistencia.ARQUIVO_DIARIO, [
+        # Já incorporados ao snapshot (seq <= 2): reaplicar desfaria a edição.
+        {"seq": 1, "tipo": "carrinho_adicionado", "cliente": "ana", "codigo": 1, "quantidade": 2},
+        {"seq": 2, "tipo": "produto_editado", "codigo": 1, "nome": "arroz", "preco": 18.0, "estoque": 5},
+        {"seq": 3, "tipo": "carrinho_adicionado", "cliente": "ana", "codigo": 1, "quantidade": 1},
+    ])
+
+    produtos, sessoes, _ = persistencia.ler_dados()
+    assert produtos[1].estoque == 4
+    assert sessoes.obter("ana").itens[1]["quantidade"] == 1
+
+
+def test_edicao_publicada_antes_da_reserva_anterior_e_refeita_como_variacao():
+    with open(persistencia.ARQUIVO_DADOS, "w", encoding="utf-8") as f:
+        json.dump({"seq": 0, "produtos": [{"codigo": 1, "nome": "arroz", "preco": 18.0, "estoque": 10}]}, f)
+    # Ana reservou 2 (estoque 8) e a reposição de +5 (estoque 13) saiu
+    # antes do evento da reserva: as duas chegam ao diário invertidas.
+    _gravar(persistencia.ARQUIVO_DIARIO, [
+        {"seq": 1, "tipo": "produto_editado", "codigo": 1, "nome": "arroz", "preco": 18.0, "estoque": 13,
+         "ajuste": 5},
+        {"seq": 2, "tipo": "carrinho_adicionado", "cliente": "ana", "codigo": 1, "quantidade": 2},
+    ])
+
+    produtos, sessoes, _ = persistencia.ler_dados()
+    assert produtos[1].estoque == 13
+    assert sessoes.obter("ana").itens[1]["quantidade"] == 2
@@ -0,0 +1,44 @@
+from lote import ACEITO, RECUSADO, ler_pedidos, processar_lote
+
+
+def test_pedido_com_varias_linhas_e_atendido_inteiro_ou_recusado(catalogo):
+    pedidos = [
+        ("A", 1, 15), ("B", 1, 3), ("B", 2, 25),  # B não cabe no produto 2
+        ("C", 1, 5), ("A", 2, 10),
+    ]
+    resultados = processar_lote(pedidos, catalogo)
+
+    assert resultados == [
+        ("A", ACEITO, ""),
+        ("B", RECUSADO, "estoque insuficiente do produto 2"),
+        ("C", ACEITO, ""),
+    ]
+    # Nada do pedido B foi baixado, nem a linha do produto 1.
+    assert catalogo[1].estoque == 0
+    assert catalogo[2].estoque == 10
+
+
+def test_linha_invalida_recusa_o_pedido_todo(catalogo):
+    resultados = processar_lote([("A", 1, 2), ("A", 999, 1)], catalogo)
+    assert resultados == [("A", RECUSADO, "produto 999 inexistente")]
+    assert catalogo[1].estoque == 20
+
+
+def test_linha_mal_formada_no_meio_do_arquivo_so_recusa_a_si_mesma(pasta_temporaria, catalogo):
+    arquivo = pasta_temporaria / "pedidos.jsonl"
+    arquivo.write_text('{"pedido": "A", "codigo": 1, "quantidade": 2}\n'
+                       '{"pedido": "B", "codigo": 1, "quanti\n'
+                       '{"pedido": "C", "codigo": 2}\n'
+                       '{"pedido": "D", "codigo": 2, "quantidade": Infinity}\n'
+                       '{"pedido": "E", "codigo": 2, "quantidade": 3}\n', encoding="utf-8")
+
+    resultados = processar_lote(ler_pedidos(str(arquivo)), catalogo)
+
+    assert resultados == [
+        ("A", ACEITO, ""),
+        (None, RECUSADO, "linha 2 mal formada"),
+        ("C", RECUSADO, "código ou quantidade inválidos"),
+        ("D", RECUSADO, "código ou quantidade inválidos"),
+        ("E", ACEITO, ""),
+    ]
+    assert (catalogo[1].estoque, catalogo[2].estoque) == (18, 17)
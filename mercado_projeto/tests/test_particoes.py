@@ -0,0 +1,49 @@
+import interface
+from particoes import CarrinhoParticionado, ServicoParticionado
+from sessoes import GerenciadorCarrinhos
+
+
+def test_sessao_particionada_reserva_e_edita_pelas_particoes(catalogo, monkeypatch, capsys):
+    sessoes = GerenciadorCarrinhos()
+    sessoes.obter("ana").adicionar(catalogo[1], 2)  # carrinho restaurado antes do serviço
+    servico = ServicoParticionado(catalogo, processos=2)
+    try:
+        servico.ativar(sessoes)
+        ana = sessoes.obter("ana")
+        assert isinstance(ana, CarrinhoParticionado) and ana.itens[1]["quantidade"] == 2
+        assert ana.remover(1)
+        bia = sessoes.obter("bia")
+        assert bia.adicionar(catalogo[2], 5)
+
+        # Admin põe 30 no produto 2; o menu mostra (e desconta) o que está nas partições.
+        respostas = iter(["", "2", "", "", "30"])
+        monkeypatch.setattr("builtins.input", lambda _="": next(respostas))
+        interface.editar_produto(catalogo)
+        assert catalogo[2].estoque == 30
+        assert bia.adicionar(catalogo[2], 1)
+
+        servico.sincronizar()
+        assert catalogo[1].estoque == 20
+        assert catalogo[2].estoque == 29
+
+        bia.encerrar()
+        assert not bia.adicionar(catalogo[2], 1)
+        assert servico.roteador().estoque(2) == 35
+    finally:
+        servico.fechar()
+    capsys.readouterr()
+    assert catalogo[2].estoque == 35
+
+
+def test_produto_cadastrado_durante_o_servico_chega_a_particao(catalogo, capsys):
+    sessoes = GerenciadorCarrinhos()
+    servico = ServicoParticionado(catalogo, processos=2)
+    try:
+        servico.ativar(sessoes)
+        status, codigo, _ = interface.incluir_produto(catalogo, "novo", 100, 4)
+        assert status == "cadastrado"
+        assert sessoes.obter("ana").adicionar(catalogo[codigo], 4)
+        assert servico.roteador().estoque(codigo) == 0
+    finally:
+        servico.fechar()
+    capsys.readouterr()
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+import persistencia
+
+
+def test_compactacao_que_falha_avisa_e_tenta_de_novo(monkeypatch, capsys):
+    iniciadas = []
+
+    def filho_que_falha():
+        iniciadas.append(1)
+        persistencia._compactacao = subprocess.Popen([sys.executable, "-c", "raise SystemExit(3)"])
+
+    monkeypatch.setattr(persistencia, "_iniciar_compactacao", filho_que_falha)
+    monkeypatch.setattr(persistencia, "_falhas_compactacao", 0)
+    persistencia.carregar_dados()
+    try:
+        persistencia.compactar(forcar=True)
+        for _ in range(persistencia.TENTATIVAS_COMPACTACAO):
+            persistencia._aguardar_compactacao()
+            persistencia.compactar()
+
+        assert len(iniciadas) == persistencia.TENTATIVAS_COMPACTACAO
+        assert os.path.exists(persistencia.ARQUIVO_DIARIO_SELADO)
+        assert "compactação do diário falhou (código 3" in capsys.readouterr().err
+    finally:
+        persistencia.fechar_dados()
@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+from interface import alterar_produto
+from sessoes import GerenciadorCarrinhos
+from utils import para_centavos
+
+
+@pytest.mark.parametrize("reais, centavos", [
+    (9.9, 990),
+    (19.99, 1999),
+    (3, 300),
+    (1.005, 101),     # o float é 1.00499..., o valor escrito é meio centavo
+    (2.675, 268),
+    (0.125, 13),      # meio centavo arredonda para cima, não para o par
+    ("1,005", 101),
+    (" 24,90 ", 2490),
+])
+def test_para_centavos_arredonda_meio_centavo_para_cima(reais, centavos):
+    assert para_centavos(reais) == centavos
+
+
+@pytest.mark.parametrize("reais", [math.inf, -math.inf, math.nan, "Infinity", "NaN", "abc", None])
+def test_para_centavos_recusa_valores_que_nao_sao_preco(reais):
+    with pytest.raises(ValueError):
+        para_centavos(reais)
+
+
+def test_preco_editado_reprecifica_so_os_carrinhos_com_o_produto(catalogo, monkeypatch):
+    sessoes = GerenciadorCarrinhos()
+    com_produto = sessoes.obter("ana")
+    sem_produto = sessoes.obter("bia")
+    com_produto.adicionar(catalogo[1], 2)
+    sem_produto.adicionar(catalogo[2], 1)
+
+    reprecificados = []
+    original = type(com_produto).reprecificar
+    monkeypatch.setattr(type(com_produto), "reprecificar",
+                        lambda self, codigo: (reprecificados.append(self.cliente), original(self, codigo)))
+
+    produto = catalogo[1]
+    alterar_produto(produto, produto.nome, 300, produto.estoque)
+    sessoes.reprecificar(1)
+
+    assert reprecificados == ["ana"]
+    assert com_produto.total == 600
+    assert sem_produto.total == 250
+
+    com_produto.remover(1)
+    reprecificados.clear()
+    sessoes.reprecificar(1)
+    assert reprecificados == []
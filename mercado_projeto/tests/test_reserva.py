@@ -0,0 +1,64 @@
+import random
+import threading
+
+import interface
+from models import Carrinho
+
+
+def _reservado(carrinhos):
+    total = {}
+    for carrinho in carrinhos:
+        for codigo, item in carrinho.itens.items():
+            total[codigo] = total.get(codigo, 0) + item["quantidade"]
+    return total
+
+
+def test_reservas_concorrentes_conservam_o_estoque(catalogo, capsys):
+    carrinhos = [Carrinho(f"cliente-{i}") for i in range(8)]
+
+    def cliente(indice):
+        aleatorio = random.Random(indice)
+        carrinho = carrinhos[indice]
+        for _ in range(2000):
+            codigo = aleatorio.randint(1, 10)  # poucos produtos: muita disputa
+            if codigo in carrinho.itens and aleatorio.random() < 0.4:
+                carrinho.remover(codigo)
+            else:
+                carrinho.adicionar(catalogo[codigo], aleatorio.randint(1, 3))
+
+    threads = [threading.Thread(target=cliente, args=(i,)) for i in range(len(carrinhos))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    capsys.readouterr()
+
+    reservado = _reservado(carrinhos)
+    for produto in catalogo.values():
+        assert produto.estoque >= 0
+        assert produto.estoque + reservado.get(produto.codigo, 0) == 20
+
+
+def test_reserva_recusa_alem_do_estoque(catalogo):
+    carrinho = Carrinho()
+    assert carrinho.adicionar(catalogo[1], 20)
+    assert not carrinho.adicionar(catalogo[1], 1)
+    assert catalogo[1].estoque == 0
+
+
+def test_edicao_do_admin_nao_desfaz_reserva_feita_durante_o_prompt(catalogo, monkeypatch):
+    carrinho = Carrinho()
+    respostas = iter(["", "1", "", ""])  # paginação, código, nome, preço
+
+    def responder(mensagem=""):
+        if mensagem.startswith("Novo estoque"):
+            # Um cliente reserva 5 unidades enquanto o admin digita.
+            assert carrinho.adicionar(catalogo[1], 5)
+            return "30"
+        return next(respostas)
+
+    monkeypatch.setattr("builtins.input", responder)
+    interface.editar_produto(catalogo)
+    # 20 mostrados, 30 pedidos: +10 sobre os 15 que sobraram da reserva.
+    assert catalogo[1].estoque == 25
+    assert carrinho.itens[1]["quantidade"] == 5
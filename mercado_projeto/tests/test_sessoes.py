@@ -0,0 +1,45 @@
+import time
+
+import eventos
+from sessoes import GerenciadorCarrinhos
+
+
+def test_carrinho_parado_expira_e_devolve_o_estoque(catalogo):
+    sessoes = GerenciadorCarrinhos(ttl=60)
+    publicados = []
+    eventos.assinar(lambda tipo, dados: publicados.append((tipo, dados)))
+
+    carrinho = sessoes.obter("ana")
+    assert carrinho.adicionar(catalogo[1], 5)
+    assert catalogo[1].estoque == 15
+
+    agora = carrinho.ultimo_acesso
+    assert sessoes.expirar(agora + 59) == []
+    assert sessoes.expirar(agora + 61) == ["ana"]
+    assert "ana" not in sessoes
+    assert catalogo[1].estoque == 20
+    assert ("carrinho_expirado", {"cliente": "ana", "itens": {1: 5}}) in publicados
+
+
+def test_carrinho_usado_ganha_prazo_novo():
+    sessoes = GerenciadorCarrinhos(ttl=60)
+    carrinho = sessoes.obter("ana")
+    criado = carrinho.ultimo_acesso
+    carrinho.ultimo_acesso = criado + 30  # usado depois de criado
+    assert sessoes.expirar(criado + 61) == []
+    assert "ana" in sessoes
+    assert sessoes.expirar(criado + 91) == ["ana"]
+
+
+def test_carrinho_expirado_recusa_novas_reservas(catalogo):
+    sessoes = GerenciadorCarrinhos(ttl=60)
+    carrinho = sessoes.obter("ana")  # referência guardada, como no menu
+    assert sessoes.expirar(time.time() + 61) == ["ana"]
+
+    assert not carrinho.adicionar(catalogo[1], 3)
+    assert catalogo[1].estoque == 20
+    assert not carrinho.itens
+
+    novo = sessoes.obter("ana")
+    assert novo is not carrinho
+    assert novo.adicionar(catalogo[1], 3)
@@ -0,0 +1,18 @@
+from simulador import MIX_PADRAO, Simulacao, catalogo_sintetico, ler_mix
+
+
+def _rodar(semente):
+    simulacao = Simulacao(catalogo_sintetico(200, 20, semente), ler_mix(MIX_PADRAO), semente=semente)
+    resultado = simulacao.executar(clientes=4, operacoes=500, reprodutivel=True)
+    return {chave: resultado[chave] for chave in
+            ("conflitos_estoque", "unidades_vendidas", "unidades_repostas", "operacoes_sem_efeito")}
+
+
+def test_mesma_semente_mesmo_resultado_com_varios_clientes():
+    assert _rodar(7) == _rodar(7)
+
+
+def test_edicao_de_preco_refaz_o_total_dos_carrinhos():
+    simulacao = Simulacao(catalogo_sintetico(20, 50, 1), ler_mix("adicionar=1,editar=1"), semente=1)
+    simulacao.executar(clientes=3, operacoes=300)  # a conferência dos totais está em executar
+    assert len(simulacao.sessoes) == 3
@@ -0,0 +1,47 @@
+import threading
+
+import snapshot_binario
+from interface import alterar_produto
+
+
+def test_snapshot_novo_nao_substitui_o_arquivo_mapeado(pasta_temporaria):
+    caminho = str(pasta_temporaria / "mercado.bin")
+    snapshot_binario.salvar(caminho, [(1, "arroz", 990, 5)], {}, seq=1)
+    mapeado, _, seq = snapshot_binario.abrir(caminho)
+    assert seq == 1
+
+    snapshot_binario.salvar(caminho, [(1, "arroz", 990, 4), (2, "feijão", 750, 3)], {}, seq=2)
+    # O catálogo aberto continua lendo a geração dele.
+    assert mapeado[1].estoque == 5
+    assert snapshot_binario.atual(caminho) == caminho + ".2"
+
+    novo, _, seq = snapshot_binario.abrir(caminho)
+    assert seq == 2
+    assert [(p.codigo, p.nome, p.estoque) for p in novo.values()] == [(1, "arroz", 4), (2, "feijão", 3)]
+    assert sorted(p.name for p in pasta_temporaria.iterdir()) == ["mercado.bin.2"]
+
+
+def test_snapshot_sem_numero_do_formato_antigo_e_lido(pasta_temporaria):
+    caminho = str(pasta_temporaria / "mercado.bin")
+    snapshot_binario.salvar(caminho, [(1, "arroz", 990, 5)], {}, seq=7)
+    (pasta_temporaria / "mercado.bin.1").rename(caminho)
+
+    assert snapshot_binario.abrir(caminho)[2] == 7
+    snapshot_binario.salvar(caminho, [(1, "arroz", 990, 5)], {}, seq=8)
+    assert snapshot_binario.atual(caminho) == caminho + ".1"
+
+
+def test_renomear_produto_do_arquivo_mapeado(pasta_temporaria):
+    caminho = str(pasta_temporaria / "mercado.bin")
+    snapshot_binario.salvar(caminho, [(1, "arroz", 990, 5), (2, "feijão", 750, 3)], {}, seq=1)
+    mapeado = snapshot_binario.abrir(caminho)[0]
+
+    # Trocar o nome copia as colunas do mapa (todas as travas de reserva);
+    # se a edição segurasse a trava do produto, a thread não terminaria.
+    edicao = threading.Thread(target=alterar_produto, args=(mapeado[1], "arroz integral", 1090, 4), daemon=True)
+    edicao.start()
+    edicao.join(timeout=5)
+
+    assert not edicao.is_alive()
+    assert not mapeado.mapeado
+    assert [(p.nome, p.preco, p.estoque) for p in mapeado.values()] == [("arroz integral", 1090, 4), ("feijão", 750, 3)]
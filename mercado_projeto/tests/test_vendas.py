@@ -0,0 +1,33 @@
+import os
+
+from vendas import ARQUIVO_RESUMO, ARQUIVO_VENDAS, LivroVendas, ResumoVendas
+
+
+def test_resumo_sem_topo_nao_quebra():
+    resumo = ResumoVendas(top_n=0)
+    resumo.incluir("2024-05-01", 500, [(1, 2, 250)])
+    assert resumo.mais_vendidos(5) == []
+    assert resumo.unidades_por_produto == {1: 2}
+
+
+def test_ultimos_dias_seguem_a_data_e_nao_a_ordem_de_chegada():
+    resumo = ResumoVendas.from_dict({
+        "top_n": 3, "vendas": 3, "receita": 600, "unidades_por_produto": {}, "topo": [],
+        "receita_por_dia": {"2024-05-03": 300, "2024-05-01": 100, "2024-05-02": 200},
+    })
+    assert resumo.ultimos_dias(2) == [("2024-05-03", 300), ("2024-05-02", 200)]
+    assert resumo.ultimos_dias(0) == []
+
+
+def test_leitura_nao_mexe_no_livro_nem_no_resumo():
+    conteudo = b'[1, "2024-05-01", 0, "ana", 500, [[1, 2, 250]]]\n[2, "2024-05-0'
+    with open(ARQUIVO_VENDAS, "wb") as f:
+        f.write(conteudo)  # a segunda linha ainda está sendo escrita
+
+    livro = LivroVendas(somente_leitura=True)
+    livro.fechar()
+
+    assert (livro.resumo.vendas, livro.resumo.receita) == (1, 500)
+    with open(ARQUIVO_VENDAS, "rb") as f:
+        assert f.read() == conteudo
+    assert not os.path.exists(ARQUIVO_RESUMO)
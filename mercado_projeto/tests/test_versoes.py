@@ -0,0 +1,67 @@
+import pytest
+
+import eventos
+import versoes
+from banco_sqlite import BancoSQLite
+from credenciais import RegistroAdmins
+from interface import alterar_produto, excluir_produto, incluir_produto
+from sessoes import GerenciadorCarrinhos
+from versoes import CatalogoVersionado
+
+
+def test_versao_fixada_nao_ve_as_alteracoes_seguintes(catalogo):
+    versionado = versoes.obter_catalogo(catalogo)
+    antes = versionado.atual()
+
+    alterar_produto(catalogo[3], "novo nome", 990, 7)
+    excluir_produto(catalogo, 4)
+    _, codigo, _ = incluir_produto(catalogo, "arroz", 1800, 10)
+
+    assert antes[3] == (3, "produto 3", 250, 20)
+    assert 4 in antes and codigo not in antes
+    assert len(antes) == len(list(antes)) == 50
+
+    depois = versionado.atual()
+    assert depois[3] == (3, "novo nome", 990, 7)
+    assert 4 not in depois and depois[codigo] == (codigo, "arroz", 1800, 10)
+    assert len(depois) == len(list(depois)) == 50
+
+
+def test_cadastrar_enquanto_uma_versao_e_lida(catalogo):
+    versionado = versoes.obter_catalogo(catalogo)
+    lidos = []
+    for produto in versionado.atual().values():
+        # O texto dos nomes cresce a cada cadastro; a versão lê uma cópia.
+        incluir_produto(catalogo, f"novo {produto.codigo}", 100, 1)
+        lidos.append(produto.codigo)
+    assert lidos == list(range(1, 51))
+    assert len(versionado.atual()) == 100
+
+
+def test_codigo_negativo_e_recusado_sem_mudar_a_versao(catalogo):
+    versionado = CatalogoVersionado(catalogo)
+    antes = versionado.atual()
+    with pytest.raises(ValueError):
+        versionado._aplicar([(-1, None)])
+    assert versionado.atual() is antes
+
+
+def test_versoes_do_sqlite_leem_uma_transacao_propria(pasta_temporaria, catalogo, monkeypatch):
+    monkeypatch.setattr(versoes, "RENOVAR_RETRATO", 3)
+    banco = BancoSQLite(str(pasta_temporaria / "mercado.db"))
+    banco.importar(catalogo, GerenciadorCarrinhos(), RegistroAdmins())
+    produtos = banco.produtos
+    eventos.assinar(banco.registrar)
+    versionado = versoes.obter_catalogo(produtos)
+    try:
+        antes = versionado.atual()
+        for estoque in (5, 6, 7):
+            alterar_produto(produtos[1], "produto 1", 250, estoque)
+
+        assert antes[1].estoque == 20  # gravado no banco, fora da transação da versão
+        depois = versionado.atual()
+        assert depois._base is not antes._base  # retrato novo depois de RENOVAR_RETRATO alterações
+        assert depois[1].estoque == 7 and len(depois) == 50
+        assert list(depois)[:3] == [1, 2, 3]
+    finally:
+        banco.fechar()
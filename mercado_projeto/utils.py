@@ -1,4 +1,6 @@
+import math
 import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 
 def input_int(msg: str) -> int:
     while True:
@@ -7,13 +9,47 @@ def input_int(msg: str) -> int:
         except ValueError:
             print("Digite um número inteiro válido.")
 
-def input_float(msg: str) -> float:
+def para_centavos(valor) -> int:
+    """Preço em reais (número ou texto digitado) -> centavos inteiros.
+
+    Meio centavo arredonda para cima sobre o valor decimal escrito
+    (1.005 -> 101), não sobre o float binário (1.00499...).
+    """
+    if isinstance(valor, int):
+        return valor * 100
+    if isinstance(valor, float) and math.isfinite(valor):
+        centavos = valor * 100
+        inteiro = round(centavos)
+        if abs(centavos - inteiro) < 1e-6:
+            return inteiro  # o caso comum: nenhuma fração de centavo
+        valor = str(valor)
+    texto = valor.strip().replace(",", ".") if isinstance(valor, str) else str(valor)
+    try:
+        decimal = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f"preço inválido: {valor!r}") from None
+    if not decimal.is_finite():
+        raise ValueError(f"preço inválido: {valor!r}")
+    return int((decimal * 100).to_integral_value(ROUND_HALF_UP))
+
+def para_reais(centavos: int) -> float:
+    """Centavos -> reais, só para gravar nos arquivos (que guardam reais)."""
+    return centavos / 100
+
+def formatar_reais(centavos: int) -> str:
+    sinal = "-" if centavos < 0 else ""
+    return f"{sinal}{abs(centavos) // 100}.{abs(centavos) % 100:02d}"
+
+def input_preco(msg: str) -> int:
+    """Lê um preço em reais e devolve em centavos."""
     while True:
         try:
-            return float(input(msg))
+            return para_centavos(input(msg))
         except ValueError:
-            print("Digite um número decimal válido.")
+            print("Digite um preço válido.")
+
+def normalizar_cpf(cpf: str) -> str:
+    return re.sub(r'\D', '', cpf)
 
 def validar_cpf(cpf: str) -> bool:
-    cpf = re.sub(r'\D', '', cpf)
-    return len(cpf) == 11
+    return len(normalizar_cpf(cpf)) == 11
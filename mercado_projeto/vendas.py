@@ -0,0 +1,234 @@
+# vendas.py
+#
+# Livro de vendas: cada compra finalizada vira uma linha acrescentada ao
+# fim de mercado.vendas.jsonl, que nunca é reescrito (o diário é
+# compactado; o livro não). Cada linha é um array JSON:
+#
+#   [venda, dia, instante, cliente, total, [[codigo, quantidade, preco], ...]]
+#
+# com valores em centavos e `dia` como "AAAA-MM-DD" (hora local).
+#
+# A cada venda os resumos são atualizados na hora: receita por dia,
+# unidades por produto e os TOP_N produtos mais vendidos. Como as unidades
+# só crescem, um produto só entra no topo passando o último colocado, então
+# a lista de TOP_N é exata e consultá-la custa O(k). Os resumos são
+# gravados em mercado.vendas.resumo.json junto com a posição do livro até
+# onde eles valem; ao abrir, só as vendas depois dessa posição são lidas.
+# Sem o resumo (ou com --reconstruir) tudo é refeito a partir do livro.
+# Somente leitura (`LivroVendas(somente_leitura=True)`, usado por quem só
+# consulta o resumo): o livro não é aberto para escrita, a linha
+# incompleta do fim não é cortada e o resumo não é regravado.
+#
+# Uso: python vendas.py [--reconstruir] [--top 10]
+
+import argparse
+import heapq
+import json
+import os
+import threading
+import time
+
+ARQUIVO_VENDAS = "mercado.vendas.jsonl"
+ARQUIVO_RESUMO = "mercado.vendas.resumo.json"
+TOP_N = 20
+
+
+class ResumoVendas:
+    """Agregados do livro, atualizados venda a venda."""
+
+    def __init__(self, top_n: int = TOP_N):
+        self.top_n = top_n
+        self.vendas = 0
+        self.receita = 0
+        self.receita_por_dia = {}        # dia (AAAA-MM-DD) -> centavos
+        self.unidades_por_produto = {}   # codigo -> unidades vendidas
+        self.topo = []                   # [unidades, codigo], do mais vendido ao menos
+
+    def incluir(self, dia: str, total: int, itens):
+        self.vendas += 1
+        self.receita += total
+        self.receita_por_dia[dia] = self.receita_por_dia.get(dia, 0) + total
+        unidades = self.unidades_por_produto
+        for codigo, quantidade, _ in itens:
+            atual = unidades[codigo] = unidades.get(codigo, 0) + quantidade
+            self._subir(codigo, atual)
+
+    def _subir(self, codigo: int, unidades: int):
+        # Ordem: mais unidades primeiro; no empate, o menor código.
+        topo = self.topo
+        chave = (unidades, -codigo)
+        for i, (_, c) in enumerate(topo):
+            if c == codigo:
+                break
+        else:
+            if len(topo) < self.top_n:
+                topo.append(None)
+            elif not topo or chave <= (topo[-1][0], -topo[-1][1]):
+                return  # top_n == 0, ou não entra no topo
+            i = len(topo) - 1  # toma o lugar do último
+        while i > 0 and (topo[i - 1][0], -topo[i - 1][1]) < chave:
+            topo[i] = topo[i - 1]
+            i -= 1
+        topo[i] = [unidades, codigo]
+
+    def mais_vendidos(self, k: int):
+        """Os k produtos mais vendidos (k <= top_n) como (codigo, unidades)."""
+        return [(codigo, unidades) for unidades, codigo in self.topo[:k]]
+
+    def ultimos_dias(self, k: int):
+        """Receita dos k dias mais recentes com vendas, do mais recente ao mais antigo."""
+        # Pela data (AAAA-MM-DD), não pela ordem do dict: um resumo lido de
+        # arquivo ou uma venda com data retroativa não chegam em ordem.
+        return heapq.nlargest(max(k, 0), self.receita_por_dia.items())
+
+    def refazer_topo(self):
+        self.topo = [[u, c] for c, u in heapq.nlargest(
+            self.top_n, self.unidades_por_produto.items(), key=lambda par: (par[1], -par[0]))]
+
+    def to_dict(self):
+        return {
+            "top_n": self.top_n,
+            "vendas": self.vendas,
+            "receita": self.receita,
+            "receita_por_dia": self.receita_por_dia,
+            "unidades_por_produto": self.unidades_por_produto,
+            "topo": self.topo,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        resumo = cls(data["top_n"])
+        resumo.vendas = data["vendas"]
+        resumo.receita = data["receita"]
+        resumo.receita_por_dia = data["receita_por_dia"]
+        resumo.unidades_por_produto = {int(c): u for c, u in data["unidades_por_produto"].items()}
+        resumo.topo = data["topo"]
+        return resumo
+
+
+class LivroVendas:
+    def __init__(self, caminho: str = ARQUIVO_VENDAS, caminho_resumo: str = ARQUIVO_RESUMO,
+                 top_n: int = TOP_N, somente_leitura: bool = False):
+        self.caminho = caminho
+        self.caminho_resumo = caminho_resumo
+        self.somente_leitura = somente_leitura
+        self.trava = threading.Lock()
+        self.resumo, posicao = self._ler_resumo(top_n)
+        self._posicao = self._ler_livro(posicao)
+        self._arquivo = None if somente_leitura else open(caminho, "ab")
+
+    def _ler_resumo(self, top_n):
+        try:
+            with open(self.caminho_resumo, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            tamanho = os.path.getsize(self.caminho)
+        except (OSError, ValueError):
+            return ResumoVendas(top_n), 0
+        if data["posicao"] > tamanho or data["top_n"] != top_n:
+            # O livro foi trocado ou o topo mudou de tamanho: refaz tudo.
+            return ResumoVendas(top_n), 0
+        return ResumoVendas.from_dict(data), data["posicao"]
+
+    def _ler_livro(self, posicao: int) -> int:
+        """Inclui no resumo as vendas a partir de `posicao`; retorna o fim da última linha completa."""
+        if not os.path.exists(self.caminho):
+            return 0
+        reconstruindo = posicao == 0
+        incluir = self.resumo.incluir
+        with open(self.caminho, "rb") as f:
+            f.seek(posicao)
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break  # última linha incompleta (queda no meio da escrita)
+                _, dia, _, _, total, itens = json.loads(linha)
+                if reconstruindo:
+                    self._incluir_sem_topo(dia, total, itens)
+                else:
+                    incluir(dia, total, itens)
+                posicao += len(linha)
+        if reconstruindo:
+            self.resumo.refazer_topo()
+        if not self.somente_leitura and posicao < os.path.getsize(self.caminho):
+            with open(self.caminho, "r+b") as f:
+                f.truncate(posicao)
+        return posicao
+
+    def _incluir_sem_topo(self, dia, total, itens):
+        # Reconstrução: o topo sai de um nlargest só no fim.
+        resumo = self.resumo
+        resumo.vendas += 1
+        resumo.receita += total
+        resumo.receita_por_dia[dia] = resumo.receita_por_dia.get(dia, 0) + total
+        unidades = resumo.unidades_por_produto
+        for codigo, quantidade, _ in itens:
+            unidades[codigo] = unidades.get(codigo, 0) + quantidade
+
+    def registrar_venda(self, cliente: str, instante: float, itens):
+        """Acrescenta uma venda; `itens` é uma lista de (codigo, quantidade, preco em centavos)."""
+        itens = [[codigo, quantidade, preco] for codigo, quantidade, preco in itens]
+        total = sum(quantidade * preco for _, quantidade, preco in itens)
+        dia = time.strftime("%Y-%m-%d", time.localtime(instante))
+        with self.trava:
+            venda = self.resumo.vendas + 1
+            linha = json.dumps([venda, dia, instante, cliente, total, itens], ensure_ascii=False)
+            dados = (linha + "\n").encode("utf-8")
+            self._arquivo.write(dados)
+            self._arquivo.flush()
+            self._posicao += len(dados)
+            self.resumo.incluir(dia, total, itens)
+        return venda
+
+    def registrar(self, tipo: str, dados: dict):
+        """Ouvinte de eventos: grava cada compra finalizada."""
+        if tipo == "compra_finalizada" and dados.get("itens"):
+            from utils import para_centavos
+            self.registrar_venda(dados["cliente"], dados["instante"], (
+                (item["codigo"], item["quantidade"], para_centavos(item["preco"]))
+                for item in dados["itens"]
+            ))
+
+    def reconstruir(self):
+        """Refaz os resumos lendo o livro inteiro."""
+        with self.trava:
+            self.resumo = ResumoVendas(self.resumo.top_n)
+            self._posicao = self._ler_livro(0)
+
+    def salvar_resumo(self):
+        with self.trava:
+            data = {"posicao": self._posicao, **self.resumo.to_dict()}
+            temporario = self.caminho_resumo + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.caminho_resumo)
+
+    def fechar(self):
+        if self.somente_leitura:
+            return
+        self._arquivo.close()
+        self.salvar_resumo()
+
+
+def main(argv=None):
+    from utils import formatar_reais
+    parser = argparse.ArgumentParser(description="Resumo do livro de vendas.")
+    parser.add_argument("--reconstruir", action="store_true", help="refaz os resumos a partir do livro")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    livro = LivroVendas()
+    if args.reconstruir:
+        livro.reconstruir()
+    decorrido = time.perf_counter() - inicio
+    resumo = livro.resumo
+    livro.fechar()
+    print(f"Vendas: {resumo.vendas}  receita: R$ {formatar_reais(resumo.receita)}  ({decorrido:.2f} s)")
+    for dia, receita in resumo.ultimos_dias(7):
+        print(f"  {dia}  R$ {formatar_reais(receita):>12}")
+    for posicao, (codigo, unidades) in enumerate(resumo.mais_vendidos(args.top), start=1):
+        print(f"  {posicao:>2}. produto {codigo}: {unidades} unidades")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# versoes.py
+#
+# Catálogo com versões, para relatórios e exportações longas lerem um
+# retrato fixo enquanto o catálogo continua sendo editado. No catálogo vivo
+# (ProdutoStore) uma edição muda nome, preço e estoque um de cada vez, e
+# até o nome são dois campos (início e tamanho); quem estiver lendo no
+# meio pode ver um produto pela metade.
+#
+# A versão 0 é um retrato do catálogo vivo, tirado no primeiro `atual()`:
+# no ProdutoStore, uma cópia das colunas (`ProdutoStore.retrato`, arrays
+# inteiros copiados de uma vez, sem um objeto por produto); no SQLite, uma
+# transação de leitura numa conexão própria (`ProdutosSQLite.retrato`). O
+# retrato não muda mais e é lido sob demanda: listar uma página monta só
+# os produtos dela.
+#
+# Cada alteração (um evento de produto ou de estoque) gera uma Versao nova
+# e imutável: o retrato mais o que mudou desde ele, numa árvore de prefixos
+# do código com 32 filhos por nó, com ProdutoFixo (tuplas) ou REMOVIDO nas
+# folhas. Mudar um produto copia só o caminho até ele (um nó por nível, 4
+# níveis para um milhão de códigos); o resto da árvore é compartilhado com
+# a versão anterior. Um lote (`produtos_atualizados`,
+# `produtos_cadastrados`) vira uma versão só.
+#
+# Ler não usa trava nenhuma além da do retrato do SQLite (a conexão dele):
+# `atual()` devolve a versão mais nova, e guardar a referência (ou usar
+# `with catalogo.fixar() as versao`) é o que a fixa. Só quem escreve
+# serializa numa trava. Uma versão que ninguém mais referencia é liberada
+# pelo contador de referências do Python, junto com os nós que só ela usava;
+# `versoes_vivas()` mostra quais ainda existem.
+#
+# No SQLite, a cada RENOVAR_RETRATO alterações a versão nova parte de um
+# retrato novo, sem nada sobreposto: a transação de leitura antiga fica só
+# com quem ainda lê as versões anteriores, e o WAL não cresce sem fim.
+#
+# Uso: python versoes.py catalogo.csv   (exporta a versão atual)
+
+import argparse
+import contextlib
+import csv
+import os
+import sys
+import threading
+import weakref
+from collections import namedtuple
+import eventos
+from catalogo import ProdutoStore
+from utils import para_centavos, para_reais
+
+BITS = 5
+LARGURA = 1 << BITS
+MASCARA = LARGURA - 1
+RENOVAR_RETRATO = 1000  # alterações sobre um retrato do SQLite antes de tirar outro
+
+REMOVIDO = object()  # na árvore: o produto saiu depois do retrato
+
+
+class ProdutoFixo(namedtuple("ProdutoFixo", "codigo nome preco estoque")):
+    """Produto de uma versão: só leitura, preço em centavos."""
+    __slots__ = ()
+
+    def to_dict(self):
+        return {"codigo": self.codigo, "nome": self.nome, "preco": para_reais(self.preco),
+                "estoque": self.estoque}
+
+
+class Versao:
+    """Retrato imutável do catálogo: codigo -> ProdutoFixo, em ordem de código."""
+
+    __slots__ = ("numero", "_raiz", "_altura", "_tamanho", "_limite", "_base", "__weakref__")
+
+    def __init__(self, numero: int, raiz, altura: int, tamanho: int, limite: int, base):
+        self.numero = numero
+        self._raiz = raiz  # o que mudou desde o retrato `base`
+        self._altura = altura
+        self._tamanho = tamanho
+        self._limite = limite  # nenhum código daqui para cima
+        self._base = base
+
+    def _folha(self, prefixo: int):
+        """Folha da árvore com os códigos `prefixo * LARGURA ...`, ou None se nada mudou neles."""
+        if prefixo >> (BITS * (self._altura - 1)):
+            return None
+        no = self._raiz
+        for nivel in range(self._altura - 1, 0, -1):
+            no = no[(prefixo >> (BITS * (nivel - 1))) & MASCARA]
+            if no is None:
+                return None
+        return no
+
+    def _da_base(self, codigo: int):
+        for linha in self._base.faixa(codigo, codigo + 1):
+            return ProdutoFixo._make(linha)
+        return None
+
+    def get(self, codigo, padrao=None):
+        if not isinstance(codigo, int) or codigo < 0:
+            return padrao
+        folha = self._folha(codigo >> BITS)
+        produto = folha[codigo & MASCARA] if folha is not None else None
+        if produto is None:
+            produto = self._da_base(codigo)
+        return padrao if produto is None or produto is REMOVIDO else produto
+
+    def __getitem__(self, codigo):
+        produto = self.get(codigo)
+        if produto is None:
+            raise KeyError(codigo)
+        return produto
+
+    def __contains__(self, codigo):
+        return self.get(codigo) is not None
+
+    def __len__(self):
+        return self._tamanho
+
+    def values(self):
+        # Uma folha por vez: o retrato lê só os LARGURA códigos dela.
+        for prefixo in range((self._limite + MASCARA) >> BITS):
+            inicio = prefixo << BITS
+            da_base = self._base.faixa(inicio, inicio + LARGURA)
+            folha = self._folha(prefixo)
+            if folha is None:
+                yield from map(ProdutoFixo._make, da_base)
+                continue
+            da_base = {linha[0]: linha for linha in da_base}
+            for indice, produto in enumerate(folha):
+                if produto is None:
+                    linha = da_base.get(inicio + indice)
+                    if linha is not None:
+                        yield ProdutoFixo._make(linha)
+                elif produto is not REMOVIDO:
+                    yield produto
+
+    def __iter__(self):
+        for produto in self.values():
+            yield produto.codigo
+
+    def items(self):
+        for produto in self.values():
+            yield produto.codigo, produto
+
+
+class CatalogoVersionado:
+    def __init__(self, produtos):
+        self.produtos = produtos
+        self._trava = threading.RLock()  # só entre quem escreve
+        self._vivas = weakref.WeakValueDictionary()  # numero -> Versao ainda referenciada
+        self._atual = None  # até o primeiro `atual()`, não há retrato nem versão
+        self._sobre_o_retrato = 0  # alterações desde o retrato da versão atual
+
+    def atual(self) -> Versao:
+        """A versão mais nova (a primeira chamada tira o retrato da versão 0)."""
+        versao = self._atual
+        if versao is None:
+            with self._trava:
+                # Na trava de quem escreve: um evento que chegue durante o
+                # retrato espera e entra numa versão depois dele. Quem
+                # publica nunca segura uma trava de reserva, e o retrato do
+                # ProdutoStore toma todas elas: a ordem é sempre esta.
+                if self._atual is None:
+                    self._publicar(_versao_zero(self.produtos, 0))
+                versao = self._atual
+        return versao
+
+    def _publicar(self, versao: Versao):
+        self._vivas[versao.numero] = versao
+        self._atual = versao
+
+    @contextlib.contextmanager
+    def fixar(self):
+        """A versão atual, fixa durante o bloco `with`."""
+        yield self.atual()
+
+    def versoes_vivas(self):
+        """Números das versões que ainda têm alguém lendo (mais a atual)."""
+        return sorted(self._vivas.keys())
+
+    def _aplicar(self, alteracoes):
+        """Gera uma versão nova com as alterações: ProdutoFixo, ou (codigo, None) para remover.
+
+        Os nós criados nesta versão podem ser alterados no lugar até ela
+        ser publicada; os herdados da versão anterior são copiados antes.
+        """
+        with self._trava:
+            anterior = self._atual
+            raiz, altura, tamanho, limite = anterior._raiz, anterior._altura, anterior._tamanho, anterior._limite
+            novos = {}  # id -> nó criado nesta versão (a referência evita reuso do id)
+
+            def copia(no):
+                if id(no) in novos:
+                    return no
+                no = list(no) if no is not None else [None] * LARGURA
+                novos[id(no)] = no
+                return no
+
+            raiz = copia(raiz)
+            for alteracao in alteracoes:
+                codigo, produto = (alteracao.codigo, alteracao) if isinstance(alteracao, ProdutoFixo) else alteracao
+                if codigo < 0:
+                    # Nada foi publicado ainda: os nós novos são descartados.
+                    raise ValueError(f"código inválido: {codigo!r}")
+                while codigo >> (BITS * altura):
+                    # Código maior que a árvore comporta: sobe um nível.
+                    acima = copia(None)
+                    acima[0] = raiz
+                    raiz, altura = acima, altura + 1
+                no = raiz
+                for nivel in range(altura - 1, 0, -1):
+                    indice = (codigo >> (BITS * nivel)) & MASCARA
+                    no[indice] = no = copia(no[indice])
+                indice = codigo & MASCARA
+                antes = no[indice]
+                if antes is None:
+                    existia = anterior._da_base(codigo) is not None
+                else:
+                    existia = antes is not REMOVIDO
+                tamanho += (produto is not None) - existia
+                no[indice] = REMOVIDO if produto is None else produto
+                limite = max(limite, codigo + 1)
+            versao = Versao(anterior.numero + 1, raiz, altura, tamanho, limite, anterior._base)
+            self._sobre_o_retrato += len(alteracoes)
+            renovar = getattr(versao._base, "renovar", None)
+            if renovar is not None and self._sobre_o_retrato >= RENOVAR_RETRATO:
+                # O banco já tem tudo o que esta versão tem: persistencia.py
+                # assina os eventos antes de versoes.py, então cada um é
+                # gravado antes de chegar aqui.
+                versao = _versao_zero(renovar(), versao.numero, tamanho)
+                self._sobre_o_retrato = 0
+            self._publicar(versao)
+            return versao
+
+    def _fixo(self, codigo):
+        produto = self.produtos.get(codigo)
+        if produto is None:
+            return (codigo, None)
+        return ProdutoFixo(codigo, produto.nome, produto.preco, produto.estoque)
+
+    def _com_estoque(self, codigo):
+        # Eventos de carrinho só mudam o estoque: o resto vem da versão atual.
+        anterior = self._atual.get(codigo)
+        produto = self.produtos.get(codigo)
+        if anterior is None or produto is None:
+            return self._fixo(codigo)
+        return anterior._replace(estoque=produto.estoque)
+
+    def registrar(self, tipo: str, dados: dict):
+        # Na trava desde já: o estoque novo de um evento de carrinho é
+        # combinado com a versão atual, que não pode mudar no meio.
+        with self._trava:
+            if self._atual is None:
+                return  # o retrato, quando for tirado, já terá a alteração
+            self._registrar(tipo, dados)
+
+    def _registrar(self, tipo: str, dados: dict):
+        if tipo in ("produto_cadastrado", "produto_editado"):
+            alteracoes = [_de_dict(dados)]
+        elif tipo in ("produtos_atualizados", "produtos_cadastrados"):
+            alteracoes = [_de_dict(produto) for produto in dados["produtos"]]
+        elif tipo == "produto_removido":
+            alteracoes = [(dados["codigo"], None)]
+        elif tipo in ("carrinho_adicionado", "carrinho_removido"):
+            alteracoes = [self._com_estoque(dados["codigo"])]
+        elif tipo == "carrinho_expirado":
+            alteracoes = [self._com_estoque(int(codigo)) for codigo in dados["itens"]]
+        else:
+            return
+        self._aplicar(alteracoes)
+
+
+def _retrato(produtos):
+    retrato = getattr(produtos, "retrato", None)
+    if retrato is not None:
+        return retrato()
+    # Um dict de Produto (benchmark, testes): já está todo em memória.
+    copia = ProdutoStore()
+    for produto in produtos.values():
+        copia._inserir(produto.codigo, produto.nome, produto.preco, produto.estoque)
+    return copia.retrato()
+
+def _versao_zero(produtos_ou_retrato, numero: int, tamanho: int = None) -> Versao:
+    """Versão sem nada sobreposto: tudo vem do retrato."""
+    base = produtos_ou_retrato if hasattr(produtos_ou_retrato, "faixa") else _retrato(produtos_ou_retrato)
+    return Versao(numero, [None] * LARGURA, 1, len(base) if tamanho is None else tamanho, base.limite, base)
+
+def _de_dict(dados) -> ProdutoFixo:
+    return ProdutoFixo(dados["codigo"], dados["nome"], para_centavos(dados["preco"]), dados["estoque"])
+
+def exportar_csv(versao: Versao, caminho: str):
+    """Grava a versão em CSV (codigo,nome,preco,estoque), de forma atômica."""
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(("codigo", "nome", "preco", "estoque"))
+        for produto in versao.values():
+            escritor.writerow((produto.codigo, produto.nome, f"{para_reais(produto.preco):.2f}", produto.estoque))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+_catalogo = None
+
+def obter_catalogo(produtos) -> CatalogoVersionado:
+    """Catálogo versionado, com o retrato tirado no primeiro `atual()` e mantido pelos eventos."""
+    global _catalogo
+    if _catalogo is None or _catalogo.produtos is not produtos:
+        if _catalogo is not None:
+            eventos.cancelar(_catalogo.registrar)
+        _catalogo = CatalogoVersionado(produtos)
+        eventos.assinar(_catalogo.registrar)
+    return _catalogo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta o catálogo em CSV.")
+    parser.add_argument("arquivo")
+    args = parser.parse_args(argv)
+
+    from persistencia import ler_dados, fechar_dados
+    try:
+        produtos = ler_dados()[0]
+        versao = CatalogoVersionado(produtos).atual()
+        exportar_csv(versao, args.arquivo)
+    finally:
+        fechar_dados()
+    print(f"{len(versao)} produtos exportados para {args.arquivo}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()